@@ -1,15 +1,27 @@
 import sys
 import os
+import time
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, 
-                             QWidget, QPushButton, QTableWidget, QTableWidgetItem, 
+                             QWidget, QPushButton, QTableView, 
                              QFileDialog, QLabel, QComboBox, QListWidget, QSplitter,
                              QTabWidget, QInputDialog, QMessageBox, QCheckBox,
-                             QSpinBox, QGroupBox, QTextEdit, QScrollArea)
-from PyQt6.QtCore import Qt, pyqtSignal
-from PyQt6.QtGui import QColor, QFont
+                             QSpinBox, QDoubleSpinBox, QGroupBox, QTextEdit, QScrollArea, QProgressBar,
+                             QStyledItemDelegate, QStyle, QToolTip, QDialog, QTableWidget, QTableWidgetItem,
+                             QHeaderView, QProgressDialog)
+from PyQt6.QtCore import (Qt, pyqtSignal, QObject, QTimer, QAbstractTableModel, QModelIndex, QItemSelectionModel, QRect, QEvent,
+                          QEventLoop)
+from PyQt6.QtGui import QColor, QPen, QKeySequence, QShortcut, QImage, QPainter, QPixmap
 import pandas as pd
 import numpy as np
+from bisect import bisect
 from pathlib import Path
+from collections import OrderedDict
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from tecan import background, cache, columnar, engine, heatmap, history, loader, profiling, qc, session, tables, xlsx
+from tecan import layout as plate_layout
+from tecan.plate import Plate
+from tecan.state import BACKGROUND, REMOVED, cell_arrays
 
 class DrugAssignmentDialog(QWidget):
     def __init__(self, parent=None):
@@ -50,24 +62,387 @@ class DrugAssignmentDialog(QWidget):
         
         self.setLayout(layout)
 
-class SelectableTableWidget(QTableWidget):
+CUBOID_BORDER_ROLE = Qt.ItemDataRole.UserRole + 1  # Color name of the cuboid border for a cell
+MAX_CACHED_VIEWS = 32  # Table views kept alive for quick switching back to a sheet; assignments live in the plates
+# Note: no light blue among the drug colors, QColor(200, 200, 255) is reserved for background
+DRUG_COLORS = [QColor(255, 200, 200), QColor(200, 255, 200), QColor(255, 255, 200), QColor(255, 200, 255),
+               QColor(200, 255, 255), QColor(255, 220, 180), QColor(220, 180, 255), QColor(255, 180, 180)]
+CUBOID_COLORS = [QColor(200, 200, 255), QColor(255, 220, 180), QColor(180, 255, 220), QColor(220, 180, 255),
+                 QColor(180, 220, 255), QColor(255, 255, 180), QColor(220, 255, 180), QColor(255, 180, 220)]
+
+class ColorPalette(QObject):
+    """Colors of drugs and cuboid counts shared by all tables, handed out in order of first use.
+
+    Emits drug_added / cuboid_added once per new entry, which is all the
+    legend needs to stay current.
+    """
+    drug_added = pyqtSignal(str, QColor)
+    cuboid_added = pyqtSignal(int, QColor)
+    cleared = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.drug_colors = {}  # {drug_name: QColor}
+        self.cuboid_colors = {}  # {cuboid_count: QColor}
+
+    def drug_color(self, drug_name):
+        if not drug_name:
+            return QColor(255, 255, 255)  # Default to white
+        color = self.drug_colors.get(drug_name)
+        if color is None:
+            color = self.drug_colors[drug_name] = DRUG_COLORS[len(self.drug_colors) % len(DRUG_COLORS)]
+            self.drug_added.emit(drug_name, color)
+        return color
+
+    def cuboid_color(self, cuboid_count):
+        color = self.cuboid_colors.get(cuboid_count)
+        if color is None:
+            color = self.cuboid_colors[cuboid_count] = CUBOID_COLORS[len(self.cuboid_colors) % len(CUBOID_COLORS)]
+            self.cuboid_added.emit(cuboid_count, color)
+        return color
+
+    def clear(self):
+        self.drug_colors = {}
+        self.cuboid_colors = {}
+        self.cleared.emit()
+
+class LegendWidget(QWidget):
+    """Legend of a ColorPalette: one label per drug and cuboid count, inserted in sorted position as they appear"""
+    def __init__(self, palette, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(0)
+        layout.addWidget(QLabel("<b>Background:</b> <span style='background-color: #c8c8ff; padding: 0 8px;'>&nbsp;</span>"))
+        self.sections = {}  # {'drug' or 'cuboid': (header QLabel, QVBoxLayout of entries, sorted keys)}
+        for kind, title in (('drug', "Drugs:"), ('cuboid', "Cuboid Counts:")):
+            header = QLabel(f"<b>{title}</b>")
+            header.setVisible(False)
+            entries = QVBoxLayout()
+            entries.setSpacing(0)
+            layout.addWidget(header)
+            layout.addLayout(entries)
+            self.sections[kind] = (header, entries, [])
+        self.setLayout(layout)
+        palette.drug_added.connect(self.add_drug)
+        palette.cuboid_added.connect(self.add_cuboid)
+        palette.cleared.connect(self.clear)
+
+    def add_drug(self, drug_name, color):
+        rgb = color.getRgb()[:3]
+        self.add_entry('drug', drug_name, f"&nbsp;&nbsp;<b>{drug_name}:</b> <span style='background-color: rgb{rgb}; padding: 0 8px;'>&nbsp;</span>")
+
+    def add_cuboid(self, cuboid_count, color):
+        rgb = color.getRgb()[:3]
+        self.add_entry('cuboid', cuboid_count, f"&nbsp;&nbsp;<b>{cuboid_count}:</b> <span style='border: 3px solid rgb{rgb}; display: inline-block; width: 16px; height: 12px; margin-left: 4px;'></span>")
+
+    def add_entry(self, kind, key, html):
+        header, entries, keys = self.sections[kind]
+        index = bisect(keys, key)
+        keys.insert(index, key)
+        label = QLabel(html)
+        label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        entries.insertWidget(index, label)
+        header.setVisible(True)
+
+    def clear(self):
+        for header, entries, keys in self.sections.values():
+            while entries.count():
+                entries.takeAt(0).widget().deleteLater()
+            keys.clear()
+            header.setVisible(False)
+
+class PlateOverview(QWidget):
+    """Small-multiple heatmaps of many plates in a grid; clicking one emits plate_clicked(sheet_name, file_name).
+
+    Each plate is one QImage with a pixel per well (see tecan.heatmap), scaled
+    up by the painter, and paintEvent only draws the tiles in the exposed
+    rectangle, so hundreds of plates repaint in milliseconds.
+    """
+    plate_clicked = pyqtSignal(str, str)
+    TILE_WIDTH, TILE_HEIGHT, CAPTION_HEIGHT, SPACING = 144, 96, 30, 8
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tiles = []  # [((sheet_name, file_name), QImage, null for an empty sheet, or None while it is parsed)]
+        self.setMouseTracking(True)
+
+    def set_tiles(self, tiles):
+        self.tiles = tiles
+        self.update_height()
+        self.update()
+
+    def columns(self):
+        return max(1, (self.width() - self.SPACING) // (self.TILE_WIDTH + self.SPACING))
+
+    def update_height(self):
+        n_rows = -(-len(self.tiles) // self.columns())
+        self.setMinimumHeight(self.SPACING + n_rows * (self.TILE_HEIGHT + self.CAPTION_HEIGHT + self.SPACING))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_height()
+
+    def tile_rect(self, index):
+        # Image area of tile index; the caption sits below it
+        row, col = divmod(index, self.columns())
+        x = self.SPACING + col * (self.TILE_WIDTH + self.SPACING)
+        y = self.SPACING + row * (self.TILE_HEIGHT + self.CAPTION_HEIGHT + self.SPACING)
+        return QRect(x, y, self.TILE_WIDTH, self.TILE_HEIGHT)
+
+    def tile_at(self, pos):
+        n_cols = self.columns()
+        col = (pos.x() - self.SPACING) // (self.TILE_WIDTH + self.SPACING)
+        row = (pos.y() - self.SPACING) // (self.TILE_HEIGHT + self.CAPTION_HEIGHT + self.SPACING)
+        index = row * n_cols + col
+        if 0 <= col < n_cols and 0 <= index < len(self.tiles):
+            rect = self.tile_rect(index)
+            if rect.adjusted(0, 0, 0, self.CAPTION_HEIGHT).contains(pos):
+                return index
+        return None
+
+    def paintEvent(self, event):
+        exposed = event.rect()
+        n_cols = self.columns()
+        row_height = self.TILE_HEIGHT + self.CAPTION_HEIGHT + self.SPACING
+        first = max(0, (exposed.top() - self.SPACING) // row_height) * n_cols
+        last = min(len(self.tiles), (exposed.bottom() // row_height + 1) * n_cols)
+        with profiling.span('paint_overview', tiles=max(0, last - first)):
+            self.paint_tiles(QPainter(self), first, last)
+
+    def paint_tiles(self, painter, first, last):
+        for index in range(first, last):
+            (sheet_name, file_name), image = self.tiles[index]
+            rect = self.tile_rect(index)
+            if image is None:
+                painter.fillRect(rect, QColor(245, 245, 245))
+                painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, "Parsing...")
+            elif image.isNull():
+                painter.fillRect(rect, QColor(245, 245, 245))
+                painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, "No values")
+            else:
+                # Largest whole-pixel well size that fits, so every well is a crisp block
+                scale = max(1, min(rect.width() // image.width(), rect.height() // image.height()))
+                target = QRect(rect.x(), rect.y(), image.width() * scale, image.height() * scale)
+                painter.drawImage(target, image)
+            caption = QRect(rect.x(), rect.bottom() + 2, rect.width(), self.CAPTION_HEIGHT - 2)
+            painter.drawText(caption, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop | Qt.TextFlag.TextWordWrap,
+                             f"{sheet_name}\n{file_name}")
+        painter.end()
+
+    def mousePressEvent(self, event):
+        index = self.tile_at(event.position().toPoint())
+        if index is not None and event.button() == Qt.MouseButton.LeftButton:
+            self.plate_clicked.emit(*self.tiles[index][0])
+        super().mousePressEvent(event)
+
+    def event(self, event):
+        if event.type() == QEvent.Type.ToolTip:
+            index = self.tile_at(event.pos())
+            if index is None:
+                QToolTip.hideText()
+            else:
+                QToolTip.showText(event.globalPos(), "{} ({})".format(*self.tiles[index][0]), self)
+            return True
+        return super().event(event)
+
+class PlateTableModel(QAbstractTableModel):
+    """Table model over a Plate, painting straight from its PlateState arrays.
+
+    Colors, tooltips and cuboid borders are derived in data() from the arrays, so
+    no per-cell item objects are kept. With a qc_threshold, QC outliers (see
+    tecan.qc) are shown in red; their QC is recomputed once per plate revision.
+    """
+    def __init__(self, plate, parent=None):
+        super().__init__(parent)
+        self.plate = plate
+        self.show_corrected = True  # Display background-corrected values when the plate has them
+        self.qc_threshold = None  # |Robust z| above which wells are marked as outliers, None = no QC
+        self._qc = None  # (plate revision, threshold, qc.PlateQC) of the last QC run
+        self.drug_color = lambda drug: QColor(255, 255, 255)
+        self.cuboid_color = lambda cuboids: QColor(0, 0, 0)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.plate.shape[0]
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.plate.shape[1]
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        labels = self.plate.col_labels if orientation == Qt.Orientation.Horizontal else self.plate.row_labels
+        return labels[section] if 0 <= section < len(labels) else None
+
+    def plate_qc(self):
+        """QC of the plate as it is now, or None when QC is off"""
+        if self.qc_threshold is None:
+            return None
+        revision = self.plate.revision
+        if self._qc is None or self._qc[0] != revision or self._qc[1] != self.qc_threshold:
+            self._qc = (revision, self.qc_threshold, qc.plate_qc(self.plate, self.qc_threshold))
+        return self._qc[2]
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.plate.cell_text(row, col, self.show_corrected)
+        state = self.plate.state
+        flags = state.flags[row, col]
+        removed = flags & REMOVED
+        if role == Qt.ItemDataRole.BackgroundRole:
+            if removed:
+                return QColor(220, 220, 220)  # Gray background
+            if flags & BACKGROUND:
+                return QColor(200, 200, 255)  # Light blue for background
+            if state.drug_ids[row, col] >= 0:
+                return self.drug_color(state.drug_name(row, col))
+            return None
+        if role == Qt.ItemDataRole.ForegroundRole:
+            if removed:
+                return QColor(120, 120, 120)
+            plate_qc = self.plate_qc()
+            if plate_qc is not None and plate_qc.outliers[row, col]:
+                return QColor(200, 0, 0)  # Red for QC outliers
+            return None
+        if role == Qt.ItemDataRole.ToolTipRole:
+            if removed:
+                return "Removed cell (NaN)"
+            plate_qc = self.plate_qc()
+            outlier = "" if plate_qc is None or not plate_qc.outliers[row, col] else \
+                f"\nQC outlier: robust z = {plate_qc.robust_z[row, col]:.1f}"
+            if flags & BACKGROUND:
+                return "Background cell" + outlier
+            drug = state.drug_name(row, col)
+            cuboids = int(state.cuboids[row, col])
+            concentration = state.concentrations[row, col]
+            if drug is None and not cuboids and np.isnan(concentration):
+                return None
+            tooltip_parts = []
+            if drug:
+                tooltip_parts.append(f"Drug: {drug}")
+            if cuboids:
+                tooltip_parts.append(f"Cuboids: {cuboids}")
+            if not np.isnan(concentration):
+                tooltip_parts.append(f"Concentration: {concentration:g}")
+            tooltip_parts.append("Background: False")
+            return "\n".join(tooltip_parts) + outlier
+        if role == CUBOID_BORDER_ROLE:
+            cuboids = int(state.cuboids[row, col])
+            if removed or not cuboids:
+                return None
+            return self.cuboid_color(cuboids).name()
+        return None
+
+    def sync_cells(self, cells):
+        """Repaint the given cells after their assignment state changed"""
+        self.sync_region(*cell_arrays(cells))
+
+    def sync_region(self, rows, cols):
+        """Repaint the bounding box of the cells at rows / cols"""
+        rows, cols = self.plate.state.cells(rows, cols)
+        if not len(rows):
+            return
+        if self.qc_threshold is not None:
+            self.sync_all()  # An edit can change the robust z of every well in the touched replicate groups
+            return
+        self.dataChanged.emit(self.index(int(rows.min()), int(cols.min())), self.index(int(rows.max()), int(cols.max())))
+
+    def sync_all(self):
+        """Repaint the whole table once"""
+        self.dataChanged.emit(self.index(0, 0), self.index(self.rowCount() - 1, self.columnCount() - 1))
+
+class PlateItemDelegate(QStyledItemDelegate):
+    """Draws the cuboid and selection borders of a cell as part of painting that cell.
+
+    The view only asks the delegate to paint visible cells, so border drawing
+    scales with the viewport instead of the plate size.
+    """
+    def paint(self, painter, option, index):
+        super().paint(painter, option, index)
+        selected = bool(option.state & QStyle.StateFlag.State_Selected)
+        cuboid_color_name = None if selected else index.data(CUBOID_BORDER_ROLE)
+        if not selected and not cuboid_color_name:
+            return
+        painter.save()
+        if selected:
+            # Draw selection border (blue, overrides cuboid border)
+            painter.setPen(QPen(QColor(0, 120, 215), 3))  # Windows blue
+            painter.drawRect(option.rect.adjusted(0, 0, -1, -1))
+        else:
+            # Draw cuboid border if assigned and not selected
+            painter.setPen(QPen(QColor(cuboid_color_name), 3))
+            painter.drawRect(option.rect.adjusted(1, 1, -2, -2))
+        painter.restore()
+
+class SelectableTableWidget(QTableView):
     assignment_requested = pyqtSignal(list, str, int, bool)  # cells, drug_name, cuboid_count, is_background
     
-    def __init__(self):
+    def __init__(self, color_palette=None):
         super().__init__()
-        self.setSelectionMode(QTableWidget.SelectionMode.MultiSelection)
+        self.setSelectionMode(QTableView.SelectionMode.MultiSelection)
         self.selected_ranges = []
-        self.cell_assignments = {}  # {(row, col): {'drug': str, 'cuboids': int, 'is_background': bool}}
-        self.removed_cells = set()  # Track cells that have been removed (set to NaN)
         self._saved_selection = set()  # Store selected cells as (row, col)
-        
+        self.registry = None  # TableWidgetRegistry this widget is registered in
+        self.color_palette = color_palette if color_palette is not None else ColorPalette(self)  # Usually the main window's
+        self.setItemDelegate(PlateItemDelegate(self))
+        self.set_plate_model(PlateTableModel(Plate(np.empty((0, 0)))))
+    
+    @property
+    def plate(self):
+        return self.plate_model.plate
+    
+    @property
+    def state(self):
+        return self.plate.state  # Drug, cuboids, background and removed arrays of the plate
+    
+    def removed_among(self, cells):
+        """The cells of a list that are removed on this plate"""
+        return [(row, col) for row, col in cells if self.plate.in_bounds(row, col) and self.state.flags[row, col] & REMOVED]
+    
+    def set_plate_model(self, model):
+        old_model = self.model()
+        model.setParent(self)
+        model.drug_color = self.color_palette.drug_color
+        model.cuboid_color = self.color_palette.cuboid_color
+        self.setModel(model)
+        self.plate_model = model
+        self.register_colors()
+        if old_model is not None:
+            old_model.deleteLater()
+    
+    def paintEvent(self, event):
+        with profiling.span('paint', cells=self.plate.values.size):
+            super().paintEvent(event)
+    
+    def register_colors(self):
+        # Give every drug and cuboid count already on the plate a color, in assignment order
+        state = self.state
+        rows, cols = state.assigned_cells()
+        for drug_id in pd.unique(state.drug_ids[rows, cols]):
+            if drug_id >= 0:
+                self.get_drug_color(state.drug_names[drug_id])
+        for cuboids in pd.unique(state.cuboids[rows, cols]):
+            if cuboids:
+                self.get_cuboid_color(int(cuboids))
+    
+    def rowCount(self):
+        return self.plate_model.rowCount()
+    
+    def columnCount(self):
+        return self.plate_model.columnCount()
+    
+    def selected_cells(self):
+        return [(index.row(), index.column()) for index in self.selectedIndexes()]
+    
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.RightButton:
             self.show_context_menu()
         else:
             # Check if clicking on empty space to deselect
-            item = self.itemAt(event.pos())
-            if item is None:
+            if not self.indexAt(event.pos()).isValid():
                 self.clearSelection()
             super().mousePressEvent(event)
     
@@ -76,17 +451,18 @@ class SelectableTableWidget(QTableWidget):
         self.save_selection()
     
     def save_selection(self):
-        self._saved_selection = set((item.row(), item.column()) for item in self.selectedItems())
+        self._saved_selection = set(self.selected_cells())
     
     def restore_selection(self):
         self.clearSelection()
+        selection_model = self.selectionModel()
         for row, col in self._saved_selection:
-            item = self.item(row, col)
-            if item:
-                item.setSelected(True)
+            index = self.plate_model.index(row, col)
+            if index.isValid():
+                selection_model.select(index, QItemSelectionModel.SelectionFlag.Select)
     
     def show_context_menu(self):
-        selected_cells = [(item.row(), item.column()) for item in self.selectedItems()]
+        selected_cells = self.selected_cells()
         if not selected_cells:
             QMessageBox.warning(self, "Warning", "Please select cells first")
             return
@@ -94,13 +470,15 @@ class SelectableTableWidget(QTableWidget):
         menu = QMenu(self)
         assign_drug_action = menu.addAction("Assign Drug")
         assign_cuboid_action = menu.addAction("Assign Cuboid Count")
+        assign_concentration_action = menu.addAction("Assign Concentration")
         background_action = menu.addAction("Mark as Background")
         remove_action = menu.addAction("Remove Cell (Set to NaN)")
         restore_action = menu.addAction("Restore Cell")
         menu.addSeparator()
         clear_assignment_action = menu.addAction("Clear Assignment")
-        has_removed_cells = any((row, col) in self.removed_cells for row, col in selected_cells)
-        has_assigned_cells = any((row, col) in self.cell_assignments for row, col in selected_cells)
+        rows, cols = self.state.cells(*cell_arrays(selected_cells))
+        has_removed_cells = bool(self.state.removed[rows, cols].any())
+        has_assigned_cells = bool(self.state.assigned[rows, cols].any())
         restore_action.setEnabled(has_removed_cells)
         clear_assignment_action.setEnabled(has_assigned_cells)
         action = menu.exec(self.mapToGlobal(self.viewport().mapFromGlobal(self.cursor().pos())))
@@ -108,6 +486,8 @@ class SelectableTableWidget(QTableWidget):
             self.show_assign_drug_dialog(selected_cells)
         elif action == assign_cuboid_action:
             self.show_assign_cuboid_dialog(selected_cells)
+        elif action == assign_concentration_action:
+            self.show_assign_concentration_dialog(selected_cells)
         elif action == background_action:
             self.assign_background(selected_cells)
         elif action == remove_action:
@@ -118,7 +498,7 @@ class SelectableTableWidget(QTableWidget):
             self.clear_cell_assignments(selected_cells)
 
     def show_assign_drug_dialog(self, selected_cells):
-        removed_selected = [cell for cell in selected_cells if cell in self.removed_cells]
+        removed_selected = self.removed_among(selected_cells)
         if removed_selected:
             QMessageBox.warning(self, "Warning", f"Cannot assign drugs to removed cells. Restore them first.\nRemoved cells: {removed_selected}")
             return
@@ -128,7 +508,7 @@ class SelectableTableWidget(QTableWidget):
         self.assign_cells(selected_cells, drug_name, None, False, assign_type='drug')
 
     def show_assign_cuboid_dialog(self, selected_cells):
-        removed_selected = [cell for cell in selected_cells if cell in self.removed_cells]
+        removed_selected = self.removed_among(selected_cells)
         if removed_selected:
             QMessageBox.warning(self, "Warning", f"Cannot assign cuboid count to removed cells. Restore them first.\nRemoved cells: {removed_selected}")
             return
@@ -137,362 +517,217 @@ class SelectableTableWidget(QTableWidget):
             return
         self.assign_cells(selected_cells, None, cuboid_count, False, assign_type='cuboid')
 
+    def show_assign_concentration_dialog(self, selected_cells):
+        removed_selected = self.removed_among(selected_cells)
+        if removed_selected:
+            QMessageBox.warning(self, "Warning", f"Cannot assign concentration to removed cells. Restore them first.\nRemoved cells: {removed_selected}")
+            return
+        concentration, ok = QInputDialog.getDouble(self, "Concentration", "Drug concentration (used for dose-response fits):", 1.0, 0.0, 1e12, 6)
+        if not ok:
+            return
+        self.assign_cells(selected_cells, None, None, False, assign_type='concentration', concentration=concentration)
+
     def get_drug_color(self, drug_name):
-        # Assign a unique color for each drug, ensuring background color is not used
-        if not hasattr(self, '_drug_colors'):
-            self._drug_colors = {}
-            self._drug_color_list = [
-                QColor(255, 200, 200),  # Light red
-                QColor(200, 255, 200),  # Light green
-                QColor(255, 255, 200),  # Light yellow
-                QColor(255, 200, 255),  # Light magenta
-                QColor(200, 255, 255),  # Light cyan
-                QColor(255, 220, 180),  # Light orange
-                QColor(220, 180, 255),  # Light purple
-                QColor(255, 180, 180),  # Another light red variant
-            ]
-            # Note: Removed QColor(200, 200, 255) as it's reserved for background
-            self._drug_color_idx = 0
-        
-        if drug_name and drug_name not in self._drug_colors:
-            color = self._drug_color_list[self._drug_color_idx % len(self._drug_color_list)]
-            self._drug_colors[drug_name] = color
-            self._drug_color_idx += 1
-        
-        return self._drug_colors.get(drug_name, QColor(255, 255, 255))  # Default to white
+        return self.color_palette.drug_color(drug_name)
 
     def get_cuboid_color(self, cuboid_count):
-        # Assign a unique color for each cuboid count
-        if not hasattr(self, '_cuboid_colors'):
-            self._cuboid_colors = {}
-            self._cuboid_color_list = [QColor(200, 200, 255), QColor(255, 220, 180), QColor(180, 255, 220), QColor(220, 180, 255), QColor(180, 220, 255), QColor(255, 255, 180), QColor(220, 255, 180), QColor(255, 180, 220)]
-            self._cuboid_color_idx = 0
-        if cuboid_count not in self._cuboid_colors:
-            color = self._cuboid_color_list[self._cuboid_color_idx % len(self._cuboid_color_list)]
-            self._cuboid_colors[cuboid_count] = color
-            self._cuboid_color_idx += 1
-        return self._cuboid_colors[cuboid_count]
-
-    def assign_cells(self, cells, drug_name, cuboid_count, is_background, assign_type=None):
-        # Find the parent GUI and determine which sheet this table belongs to
-        parent_gui = self.parent()
-        while parent_gui and not hasattr(parent_gui, 'table_widgets'):
-            parent_gui = parent_gui.parent() if hasattr(parent_gui, 'parent') else None
-        
-        sheet_name = None
-        if parent_gui:
-            for sname, file_widgets in parent_gui.table_widgets.items():
-                if self in file_widgets.values():
-                    sheet_name = sname
-                    break
-        
-        # Get all table widgets for this sheet name (across all files)
-        widgets = [self]  # Always include current widget
-        if parent_gui and sheet_name and sheet_name in parent_gui.table_widgets:
-            widgets = list(parent_gui.table_widgets[sheet_name].values())
-        
-        # Apply changes to all widgets for this sheet name
-        for widget in widgets:
-            for row, col in cells:
-                # Ensure proper initialization of cell_assignments
-                if (row, col) not in widget.cell_assignments:
-                    widget.cell_assignments[(row, col)] = {
-                        'drug': None, 
-                        'cuboids': None, 
-                        'is_background': False, 
-                        'original_value': None
-                    }
-                
-                # Update assignments based on type
-                assignment = widget.cell_assignments[(row, col)]
-                if assign_type == 'drug':
-                    assignment['drug'] = drug_name
-                elif assign_type == 'cuboid':
-                    assignment['cuboids'] = cuboid_count
-                else:
-                    # Full assignment
-                    assignment['drug'] = drug_name
-                    assignment['cuboids'] = cuboid_count
-                    assignment['is_background'] = is_background
-                
-                item = widget.item(row, col)
-                if item:
-                    # Save original value if not already saved
-                    if assignment['original_value'] is None:
-                        try:
-                            assignment['original_value'] = float(item.text())
-                        except ValueError:
-                            assignment['original_value'] = 0.0
-                    
-                    # Remove any dot prefix and reset text/foreground
-                    orig_text = item.text()
-                    if orig_text.startswith('\u25CF '):
-                        orig_text = orig_text[2:]
-                    elif orig_text.startswith('● '):
-                        orig_text = orig_text[2:]
-                    item.setText(orig_text)
-                    item.setForeground(QColor(0, 0, 0))
-                    
-                    # Set background color based on assignment
-                    if assignment['is_background']:
-                        item.setBackground(QColor(200, 200, 255))  # Light blue for background
-                    elif assignment['drug']:
-                        drug_color = widget.get_drug_color(assignment['drug'])
-                        item.setBackground(drug_color)
-                    else:
-                        item.setBackground(QColor(255, 255, 255))  # White for unassigned
-                    
-                    # Set cuboid border if cuboids assigned
-                    if assignment['cuboids']:
-                        cuboid_color = widget.get_cuboid_color(assignment['cuboids'])
-                        item.setData(Qt.ItemDataRole.UserRole + 1, cuboid_color.name())
-                    else:
-                        item.setData(Qt.ItemDataRole.UserRole + 1, None)
-                    
-                    # Update tooltip
-                    if assignment['is_background']:
-                        item.setToolTip("Background cell")
-                    else:
-                        tooltip_parts = []
-                        if assignment['drug']:
-                            tooltip_parts.append(f"Drug: {assignment['drug']}")
-                        if assignment['cuboids']:
-                            tooltip_parts.append(f"Cuboids: {assignment['cuboids']}")
-                        tooltip_parts.append(f"Background: {assignment['is_background']}")
-                        item.setToolTip("\n".join(tooltip_parts))
-        
-        if parent_gui and hasattr(parent_gui, 'update_legend'):
-            parent_gui.update_legend()
+        return self.color_palette.cuboid_color(cuboid_count)
 
-    def paintEvent(self, event):
-        # Custom paint to draw cuboid border and selection border
-        super().paintEvent(event)
-        from PyQt6.QtWidgets import QStyleOptionViewItem, QStyle
-        from PyQt6.QtGui import QPainter, QPen
-        painter = QPainter(self.viewport())
-        for i in range(self.rowCount()):
-            for j in range(self.columnCount()):
-                item = self.item(i, j)
-                if not item:
-                    continue
-                rect = self.visualItemRect(item)
-                # Draw cuboid border if assigned and not selected
-                cuboid_color_name = item.data(Qt.ItemDataRole.UserRole + 1)
-                if cuboid_color_name and not item.isSelected():
-                    pen = QPen(QColor(cuboid_color_name), 3)
-                    painter.setPen(pen)
-                    painter.drawRect(rect.adjusted(1, 1, -2, -2))
-                # Draw selection border (blue, overrides cuboid border)
-                if item.isSelected():
-                    pen = QPen(QColor(0, 120, 215), 3)  # Windows blue
-                    painter.setPen(pen)
-                    painter.drawRect(rect.adjusted(0, 0, -1, -1))
-        painter.end()
+    def apply_to_sheet(self, name, cells, update):
+        """Apply update(widget, cells) to this table and every table showing the same sheet in other files.
+
+        This is the shared path for all assignment actions: siblings come from
+        the widget registry in O(1), the change is recorded as one undoable
+        command named name, and each widget's model repaints only the touched
+        cells. New drugs and cuboid counts reach the legend through the palette.
+        """
+        widgets = self.registry.siblings(self) if self.registry else [self]
+        def edit():
+            for widget in widgets:
+                update(widget, cells)
+        with profiling.span('assign', action=name, cells=len(cells), plates=len(widgets)):
+            if self.registry and self.registry.history is not None:
+                rows, cols = cell_arrays(cells)
+                self.registry.history.record(name, [(widget.plate, rows, cols) for widget in widgets], edit)
+            else:
+                edit()
+            for widget in widgets:
+                widget.plate_model.sync_cells(cells)
+
+    def assign_cells(self, cells, drug_name, cuboid_count, is_background, assign_type=None, concentration=None):
+        # Update assignments based on type
+        if assign_type == 'drug':
+            name, fields = "Assign Drug", {'drug': drug_name}
+        elif assign_type == 'cuboid':
+            name, fields = "Assign Cuboid Count", {'cuboids': cuboid_count}
+        elif assign_type == 'concentration':
+            name, fields = "Assign Concentration", {'concentration': concentration}
+        else:
+            # Full assignment
+            name, fields = "Assign", {'drug': drug_name, 'cuboids': cuboid_count, 'is_background': is_background}
+        def update(widget, cells):
+            widget.plate.assign(*cell_arrays(cells), **fields)
+            # Register colors in assignment order; the model looks them up when painting
+            if fields.get('drug'):
+                widget.get_drug_color(fields['drug'])
+            if fields.get('cuboids'):
+                widget.get_cuboid_color(fields['cuboids'])
+        self.apply_to_sheet(name, cells, update)
 
     def remove_cells(self, selected_cells):
-        # Find the parent GUI and determine which sheet this table belongs to
-        parent_gui = self.parent()
-        while parent_gui and not hasattr(parent_gui, 'table_widgets'):
-            parent_gui = parent_gui.parent() if hasattr(parent_gui, 'parent') else None
-        
-        sheet_name = None
-        if parent_gui:
-            for sname, file_widgets in parent_gui.table_widgets.items():
-                if self in file_widgets.values():
-                    sheet_name = sname
-                    break
-        
-        # Get all table widgets for this sheet name (across all files)
-        widgets = [self]  # Always include current widget
-        if parent_gui and sheet_name and sheet_name in parent_gui.table_widgets:
-            widgets = list(parent_gui.table_widgets[sheet_name].values())
-        
-        # Apply cell removal to all widgets for this sheet name
-        for widget in widgets:
-            for row, col in selected_cells:
-                widget.removed_cells.add((row, col))
-                item = widget.item(row, col)
-                if item:
-                    # Save original value before removing
-                    if (row, col) not in widget.cell_assignments:
-                        widget.cell_assignments[(row, col)] = {
-                            'drug': None, 
-                            'cuboids': None, 
-                            'is_background': False, 
-                            'original_value': None
-                        }
-                    if widget.cell_assignments[(row, col)]['original_value'] is None:
-                        try:
-                            widget.cell_assignments[(row, col)]['original_value'] = float(item.text())
-                        except ValueError:
-                            widget.cell_assignments[(row, col)]['original_value'] = 0.0
-                    
-                    # Set cell to show as removed
-                    item.setText("NaN")
-                    item.setBackground(QColor(220, 220, 220))  # Gray background
-                    item.setForeground(QColor(120, 120, 120))  # Gray text
-                    item.setToolTip("Removed cell (NaN)")
-                    item.setData(Qt.ItemDataRole.UserRole + 1, None)  # Clear cuboid border
+        def update(widget, cells):
+            widget.plate.remove_cells(*cell_arrays(cells))  # Saves the original values before removing
+        self.apply_to_sheet("Remove Cells", selected_cells, update)
 
     def restore_cells(self, selected_cells):
-        # Find the parent GUI and determine which sheet this table belongs to
-        parent_gui = self.parent()
-        while parent_gui and not hasattr(parent_gui, 'table_widgets'):
-            parent_gui = parent_gui.parent() if hasattr(parent_gui, 'parent') else None
-        
-        sheet_name = None
-        if parent_gui:
-            for sname, file_widgets in parent_gui.table_widgets.items():
-                if self in file_widgets.values():
-                    sheet_name = sname
-                    break
-        
-        # Get all table widgets for this sheet name (across all files)
-        widgets = [self]  # Always include current widget
-        if parent_gui and sheet_name and sheet_name in parent_gui.table_widgets:
-            widgets = list(parent_gui.table_widgets[sheet_name].values())
-        
-        # Apply cell restoration to all widgets for this sheet name
-        for widget in widgets:
-            for row, col in selected_cells:
-                if (row, col) in widget.removed_cells:
-                    widget.removed_cells.remove((row, col))
-                    item = widget.item(row, col)
-                    if item and (row, col) in widget.cell_assignments:
-                        assignment = widget.cell_assignments[(row, col)]
-                        # Restore original value
-                        if assignment['original_value'] is not None:
-                            item.setText(str(assignment['original_value']))
-                        else:
-                            item.setText("0")
-                        
-                        # Restore proper formatting based on assignment
-                        if assignment['is_background']:
-                            item.setBackground(QColor(200, 200, 255))
-                            item.setToolTip("Background cell")
-                        elif assignment['drug']:
-                            drug_color = widget.get_drug_color(assignment['drug'])
-                            item.setBackground(drug_color)
-                            tooltip_parts = []
-                            if assignment['drug']:
-                                tooltip_parts.append(f"Drug: {assignment['drug']}")
-                            if assignment['cuboids']:
-                                tooltip_parts.append(f"Cuboids: {assignment['cuboids']}")
-                            tooltip_parts.append(f"Background: {assignment['is_background']}")
-                            item.setToolTip("\n".join(tooltip_parts))
-                        else:
-                            item.setBackground(QColor(255, 255, 255))
-                            item.setToolTip("")
-                        
-                        item.setForeground(QColor(0, 0, 0))
-                        
-                        # Restore cuboid border if applicable
-                        if assignment['cuboids']:
-                            cuboid_color = widget.get_cuboid_color(assignment['cuboids'])
-                            item.setData(Qt.ItemDataRole.UserRole + 1, cuboid_color.name())
+        def update(widget, cells):
+            widget.plate.restore_cells(*cell_arrays(cells))
+        self.apply_to_sheet("Restore Cells", selected_cells, update)
 
     def clear_cell_assignments(self, selected_cells):
-        # Find the parent GUI and determine which sheet this table belongs to
-        parent_gui = self.parent()
-        while parent_gui and not hasattr(parent_gui, 'table_widgets'):
-            parent_gui = parent_gui.parent() if hasattr(parent_gui, 'parent') else None
-        
-        sheet_name = None
-        if parent_gui:
-            for sname, file_widgets in parent_gui.table_widgets.items():
-                if self in file_widgets.values():
-                    sheet_name = sname
-                    break
-        
-        # Get all table widgets for this sheet name (across all files)
-        widgets = [self]  # Always include current widget
-        if parent_gui and sheet_name and sheet_name in parent_gui.table_widgets:
-            widgets = list(parent_gui.table_widgets[sheet_name].values())
-        
-        # Clear assignments for selected cells across all widgets for this sheet name
-        for widget in widgets:
-            for row, col in selected_cells:
-                if (row, col) in widget.cell_assignments:
-                    assignment = widget.cell_assignments[(row, col)]
-                    # Reset assignment but keep original value
-                    assignment['drug'] = None
-                    assignment['cuboids'] = None
-                    assignment['is_background'] = False
-                    
-                    item = widget.item(row, col)
-                    if item:
-                        # Reset visual appearance
-                        item.setBackground(QColor(255, 255, 255))  # White background
-                        item.setForeground(QColor(0, 0, 0))  # Black text
-                        item.setToolTip("")  # Clear tooltip
-                        item.setData(Qt.ItemDataRole.UserRole + 1, None)  # Clear cuboid border
-        
-        # Update legend after clearing assignments
-        if parent_gui and hasattr(parent_gui, 'update_legend'):
-            parent_gui.update_legend()
+        def update(widget, cells):
+            # Reset assignment but keep original value
+            widget.plate.clear_assignments(*cell_arrays(cells))
+        self.apply_to_sheet("Clear Assignment", selected_cells, update)
 
     def assign_background(self, selected_cells):
         # Prevent marking removed cells as background
-        removed_selected = [cell for cell in selected_cells if cell in self.removed_cells]
+        removed_selected = self.removed_among(selected_cells)
         if removed_selected:
             QMessageBox.warning(self, "Warning", f"Cannot mark removed cells as background. Restore them first.\nRemoved cells: {removed_selected}")
             return
         
-        # Find the parent GUI and determine which sheet this table belongs to
-        parent_gui = self.parent()
-        while parent_gui and not hasattr(parent_gui, 'table_widgets'):
-            parent_gui = parent_gui.parent() if hasattr(parent_gui, 'parent') else None
-        
-        sheet_name = None
-        if parent_gui:
-            for sname, file_widgets in parent_gui.table_widgets.items():
-                if self in file_widgets.values():
-                    sheet_name = sname
-                    break
-        
-        # Get all table widgets for this sheet name (across all files)
-        widgets = [self]  # Always include current widget
-        if parent_gui and sheet_name and sheet_name in parent_gui.table_widgets:
-            widgets = list(parent_gui.table_widgets[sheet_name].values())
-        
-        # Apply background assignment to all widgets for this sheet name
-        for widget in widgets:
-            for row, col in selected_cells:
-                if (row, col) not in widget.cell_assignments:
-                    widget.cell_assignments[(row, col)] = {'drug': None, 'cuboids': None, 'is_background': True, 'original_value': None}
-                else:
-                    widget.cell_assignments[(row, col)]['is_background'] = True
-                
-                item = widget.item(row, col)
-                if item:
-                    # Save original value if not already saved
-                    if widget.cell_assignments[(row, col)]['original_value'] is None:
-                        try:
-                            widget.cell_assignments[(row, col)]['original_value'] = float(item.text())
-                        except ValueError:
-                            widget.cell_assignments[(row, col)]['original_value'] = 0.0
-                    
-                    # Set background color to a distinct color for background
-                    item.setBackground(QColor(200, 200, 255))
-                    
-                    # Remove any dot prefix and reset text/foreground
-                    orig_text = item.text()
-                    if orig_text.startswith('\u25CF '):
-                        orig_text = orig_text[2:]
-                    elif orig_text.startswith('● '):
-                        orig_text = orig_text[2:]
-                    item.setText(orig_text)
-                    item.setForeground(QColor(0, 0, 0))
-                    
-                    # Remove cuboid border
-                    item.setData(Qt.ItemDataRole.UserRole + 1, None)
-                    
-                    # Tooltip
-                    item.setToolTip("Background cell")
-        
-        # Update legend if parent GUI exists
-        if parent_gui and hasattr(parent_gui, 'update_legend'):
-            parent_gui.update_legend()
+        def update(widget, cells):
+            widget.plate.assign(*cell_arrays(cells), is_background=True)
+        self.apply_to_sheet("Mark as Background", selected_cells, update)
+
+class TableWidgetRegistry:
+    """Index of the table widgets on screen: widget -> (sheet, file) and sheet -> {file: widget}."""
+    def __init__(self, history=None):
+        self.by_sheet = {}  # {sheet_name: {file_name: SelectableTableWidget}}
+        self._keys = {}  # {SelectableTableWidget: (sheet_name, file_name)}
+        self.history = history  # tecan.history.History that assignment actions are recorded in
+
+    def register(self, widget, sheet_name, file_name):
+        previous = self.by_sheet.get(sheet_name, {}).get(file_name)
+        if previous is not None and previous is not widget:
+            self.unregister(previous)
+        self.by_sheet.setdefault(sheet_name, {})[file_name] = widget
+        self._keys[widget] = (sheet_name, file_name)
+        widget.registry = self
+
+    def unregister(self, widget):
+        key = self._keys.pop(widget, None)
+        if key is None:
+            return
+        sheet_name, file_name = key
+        file_widgets = self.by_sheet.get(sheet_name, {})
+        if file_widgets.get(file_name) is widget:
+            del file_widgets[file_name]
+            if not file_widgets:
+                del self.by_sheet[sheet_name]
+        widget.registry = None
+
+    def key(self, widget):
+        return self._keys.get(widget)
+
+    def siblings(self, widget):
+        """All widgets for the same sheet name across files, including widget itself"""
+        key = self._keys.get(widget)
+        if key is None:
+            return [widget]
+        return list(self.by_sheet[key[0]].values())
+
+
+class DiagnosticsDialog(QDialog):
+    """Stage timings and loader errors from tecan.profiling, with JSON and Chrome trace export"""
+    SUMMARY_COLUMNS = ["Stage", "Calls", "Total ms", "Mean ms", "Max ms"]
+    RECENT_COLUMNS = ["Stage", "Start ms", "Duration ms", "Details"]
+    RECENT_SPANS = 200  # Latest spans listed below the summary
+
+    def __init__(self, parent=None, profiler=None):
+        super().__init__(parent)
+        self.profiler = profiler if profiler is not None else profiling.PROFILER
+        self.setWindowTitle("Diagnostics")
+        self.resize(760, 620)
+        layout = QVBoxLayout(self)
+
+        self.enabled_checkbox = QCheckBox("Record timings")
+        self.enabled_checkbox.setToolTip(f"Also on from startup when {profiling.ENV_VAR} is set, e.g. {profiling.ENV_VAR}=1")
+        self.enabled_checkbox.setChecked(self.profiler.enabled)
+        self.enabled_checkbox.toggled.connect(self.set_enabled)
+        layout.addWidget(self.enabled_checkbox)
+
+        layout.addWidget(QLabel("Per stage:"))
+        self.summary_table = self.make_table(self.SUMMARY_COLUMNS)
+        layout.addWidget(self.summary_table, 2)
+        layout.addWidget(QLabel(f"Latest {self.RECENT_SPANS} spans:"))
+        self.recent_table = self.make_table(self.RECENT_COLUMNS)
+        layout.addWidget(self.recent_table, 3)
+        layout.addWidget(QLabel("Loader errors:"))
+        self.errors_text = QTextEdit()
+        self.errors_text.setReadOnly(True)
+        self.errors_text.setMaximumHeight(100)
+        layout.addWidget(self.errors_text)
+
+        button_layout = QHBoxLayout()
+        for text, slot in (("Refresh", self.refresh), ("Clear", self.clear), ("Export JSON...", self.export_json),
+                           ("Export Chrome Trace...", self.export_chrome_trace), ("Close", self.close)):
+            button = QPushButton(text)
+            button.clicked.connect(slot)
+            button_layout.addWidget(button)
+        layout.addLayout(button_layout)
+        self.refresh()
+
+    def make_table(self, columns):
+        table = QTableWidget(0, len(columns))
+        table.setHorizontalHeaderLabels(columns)
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setSectionResizeMode(len(columns) - 1, QHeaderView.ResizeMode.Stretch)
+        return table
+
+    def fill_table(self, table, rows):
+        table.setRowCount(len(rows))
+        for i, row in enumerate(rows):
+            for j, value in enumerate(row):
+                text = f"{value:.2f}" if isinstance(value, float) else str(value)
+                item = QTableWidgetItem(text)
+                if not isinstance(value, str):
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                table.setItem(i, j, item)
+
+    def refresh(self):
+        self.fill_table(self.summary_table, self.profiler.summary())
+        recent = list(self.profiler.spans)[-self.RECENT_SPANS:][::-1]
+        self.fill_table(self.recent_table, [(name, (start - self.profiler.origin) / 1e6, duration / 1e6,
+                                             ", ".join(f"{key}={value}" for key, value in args.items()))
+                                            for name, start, duration, _, args in recent])
+        self.errors_text.setPlainText("\n".join(f"{time.strftime('%H:%M:%S', time.localtime(t))}  {message}"
+                                                for t, message in self.profiler.errors))
+
+    def set_enabled(self, enabled):
+        self.profiler.enabled = enabled
+        self.refresh()
+
+    def clear(self):
+        self.profiler.clear()
+        self.refresh()
+
+    def export_json(self):
+        self.export("Export Timings", "JSON Files (*.json)", self.profiler.write_json)
+
+    def export_chrome_trace(self):
+        self.export("Export Chrome Trace", "Chrome Trace (*.json)", self.profiler.write_chrome_trace)
+
+    def export(self, title, file_filter, write):
+        file_path, _ = QFileDialog.getSaveFileName(self, title, "", file_filter)
+        if not file_path:
+            return
+        try:
+            write(file_path)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to export timings: {str(e)}")
 
 class ExcelAnalyzerGUI(QMainWindow):
     def __init__(self):
@@ -500,8 +735,31 @@ class ExcelAnalyzerGUI(QMainWindow):
         self.excel_files = []
         self.sheet_data = {}  # {sheet_name: {file_path: dataframe}}
         self.current_sheet = None
-        self.table_widgets = {}  # {sheet_name: SelectableTableWidget}
+        self.history = history.History(on_change=self.update_history_actions)  # Undo / redo of assignment edits
+        self._results_cache = {}  # Per-plate result tables reused by exports until the plate changes, see engine.results_frame
+        self._fit_cache = {}  # Dose-response fits reused by exports until a group's wells change, see doseresponse.fit_curves
+        self.color_palette = ColorPalette(self)  # Drug and cuboid colors shared by every table and the legend
+        self._kinetics = {}  # {(sheet_name, file_name): kinetic.KineticRead} found while parsing; None after a session is opened
+        self.widget_registry = TableWidgetRegistry(history=self.history)
+        self.table_widgets = self.widget_registry.by_sheet  # {sheet_name: {file_name: SelectableTableWidget}}
         self.selections = {}  # {(sheet_name, file_name): set((row, col))}
+        self.plates = {}  # {(sheet_name, file_name): Plate} with the assignment state of each loaded table
+        self._table_views = OrderedDict()  # {(sheet_name, file_name): QScrollArea}, least recently shown first
+        self._load_executor = None  # ProcessPoolExecutor while a load is running
+        self._diagnostics_dialog = None  # Kept so its size and position persist between openings
+        self._load_started_ns = 0
+        self._load_futures = {}  # {Future: file_path}
+        self.parse_cache_dir = cache.default_cache_dir()  # On-disk cache of parsed workbooks, see tecan.cache
+        self.unparsed_sheets = {}  # {(sheet_name, file_name): file_path} listed from the workbook index, parsed on first view
+        self._lazy_workbooks = {}  # {file_name: (file_path, cache key, sheet_names, {sheet_name: (tables, errors)})} until fully parsed
+        self._prefetch_executor = None  # ProcessPoolExecutor parsing the next sheet ahead of time
+        self._prefetch_futures = {}  # {Future: [(sheet_name, file_name), ...] of one workbook}
+        self._prefetch_timer = QTimer(self)
+        self._prefetch_timer.setInterval(50)
+        self._prefetch_timer.timeout.connect(self.poll_prefetch_results)
+        self._load_timer = QTimer(self)
+        self._load_timer.setInterval(50)
+        self._load_timer.timeout.connect(self.poll_load_results)
         self.init_ui()
     
     def init_ui(self):
@@ -526,9 +784,13 @@ class ExcelAnalyzerGUI(QMainWindow):
         left_panel = self.create_left_panel()
         content_splitter.addWidget(left_panel)
         
-        # Right panel - table display
+        # Right panel - table display, and heatmaps of every plate
         self.tab_widget = QTabWidget()
-        content_splitter.addWidget(self.tab_widget)
+        self.view_tabs = QTabWidget()
+        self.view_tabs.addTab(self.tab_widget, "Tables")
+        self.view_tabs.addTab(self.create_overview_panel(), "Plate Overview")
+        self.view_tabs.currentChanged.connect(self.refresh_overview_if_visible)
+        content_splitter.addWidget(self.view_tabs)
         
         content_splitter.setSizes([300, 1100])
         main_layout.addWidget(content_splitter)
@@ -551,9 +813,44 @@ class ExcelAnalyzerGUI(QMainWindow):
         self.load_data_btn = QPushButton("Load Data")
         self.load_data_btn.clicked.connect(self.load_data)
         self.load_data_btn.setEnabled(False)
-        
+
+        self.load_progress = QProgressBar()
+        self.load_progress.setFormat("%v / %m files")
+        self.load_progress.setVisible(False)
+
+        self.cancel_load_btn = QPushButton("Cancel")
+        self.cancel_load_btn.clicked.connect(self.cancel_load)
+        self.cancel_load_btn.setVisible(False)
+
+        self.lazy_load_checkbox = QCheckBox("Parse sheets on first view")
+        self.lazy_load_checkbox.setToolTip("List sheets straight from the workbook index and parse each one when it is opened")
+        self.lazy_load_checkbox.setChecked(True)
+
+        self.clear_cache_btn = QPushButton("Clear Parse Cache")
+        self.clear_cache_btn.setToolTip(f"Parsed workbooks are cached in {self.parse_cache_dir}")
+        self.clear_cache_btn.clicked.connect(self.clear_parse_cache)
+
+        self.save_session_btn = QPushButton("Save Session...")
+        self.save_session_btn.setToolTip("Save the loaded plates, assignments and settings to one file")
+        self.save_session_btn.clicked.connect(self.save_session)
+
+        self.open_session_btn = QPushButton("Open Session...")
+        self.open_session_btn.setToolTip("Reopen a saved session without parsing the workbooks again")
+        self.open_session_btn.clicked.connect(self.open_session)
+
+        self.diagnostics_btn = QPushButton("Diagnostics...")
+        self.diagnostics_btn.setToolTip("Stage timings and loader errors of this session")
+        self.diagnostics_btn.clicked.connect(self.show_diagnostics)
+
         button_layout.addWidget(self.select_files_btn)
         button_layout.addWidget(self.load_data_btn)
+        button_layout.addWidget(self.lazy_load_checkbox)
+        button_layout.addWidget(self.load_progress)
+        button_layout.addWidget(self.cancel_load_btn)
+        button_layout.addWidget(self.clear_cache_btn)
+        button_layout.addWidget(self.save_session_btn)
+        button_layout.addWidget(self.open_session_btn)
+        button_layout.addWidget(self.diagnostics_btn)
         button_layout.addStretch()
         
         layout.addWidget(self.file_list)
@@ -585,25 +882,44 @@ class ExcelAnalyzerGUI(QMainWindow):
         info_label.setStyleSheet("font-weight: bold; color: #0066cc;")
         assign_layout.addWidget(info_label)
         
-        options_label = QLabel("• Assign Drug\n• Remove Cell (NaN)\n• Restore Cell\n• Clear Assignment")
+        options_label = QLabel("• Assign Drug\n• Assign Concentration\n• Remove Cell (NaN)\n• Restore Cell\n• Clear Assignment")
         options_label.setStyleSheet("font-size: 10px; color: #666;")
         assign_layout.addWidget(options_label)
         
         assign_layout.addWidget(QLabel(""))  # Spacer
         
+        history_layout = QHBoxLayout()
+        self.undo_btn = QPushButton("Undo")
+        self.undo_btn.clicked.connect(self.undo_assignment)
+        history_layout.addWidget(self.undo_btn)
+        self.redo_btn = QPushButton("Redo")
+        self.redo_btn.clicked.connect(self.redo_assignment)
+        history_layout.addWidget(self.redo_btn)
+        assign_layout.addLayout(history_layout)
+        QShortcut(QKeySequence.StandardKey.Undo, self, activated=self.undo_assignment)
+        QShortcut(QKeySequence.StandardKey.Redo, self, activated=self.redo_assignment)
+        self.update_history_actions()
+        
         self.clear_assignments_btn = QPushButton("Clear All Assignments")
         self.clear_assignments_btn.clicked.connect(self.clear_assignments)
         assign_layout.addWidget(self.clear_assignments_btn)
         
+        self.save_layout_btn = QPushButton("Save Layout Template...")
+        self.save_layout_btn.clicked.connect(self.save_layout_template)
+        assign_layout.addWidget(self.save_layout_btn)
+        
+        self.apply_layout_btn = QPushButton("Apply Layout Template...")
+        self.apply_layout_btn.clicked.connect(self.apply_layout_template)
+        assign_layout.addWidget(self.apply_layout_btn)
+        
         assign_group.setLayout(assign_layout)
         layout.addWidget(assign_group)
         
         # Add legend for drug colors and background
         legend_group = QGroupBox("Legend")
         legend_layout = QVBoxLayout()
-        legend_label = QLabel()
-        legend_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
-        legend_layout.addWidget(legend_label)
+        self.legend = LegendWidget(self.color_palette)
+        legend_layout.addWidget(self.legend)
         legend_group.setLayout(legend_layout)
         layout.addWidget(legend_group)
         
@@ -626,6 +942,7 @@ Selection Tips:
 - Ctrl+click for individual cells
 - Shift+click for ranges
 - Right-click to assign drugs
+- Ctrl+Z / Ctrl+Shift+Z to undo / redo assignments
         """)
         
         layout.addWidget(QLabel("Instructions:"))
@@ -633,47 +950,84 @@ Selection Tips:
         layout.addStretch()
         
         widget.setLayout(layout)
-        self.legend_label = legend_label  # Store for later updates
         return widget
     
-    def update_legend(self):
-        # Collect all drugs and their colors from all tables
-        drug_colors = {}
-        cuboid_colors = {}
-        for sheet_tables in self.table_widgets.values():
-            for table_widget in sheet_tables.values():
-                if hasattr(table_widget, '_drug_colors'):
-                    for drug, color in table_widget._drug_colors.items():
-                        drug_colors[drug] = color
-                if hasattr(table_widget, '_cuboid_colors'):
-                    for cuboid, color in table_widget._cuboid_colors.items():
-                        cuboid_colors[cuboid] = color
-        
-        legend_html = "<b>Background:</b> <span style='background-color: #c8c8ff; padding: 0 8px;'>&nbsp;</span>"
-        
-        if drug_colors:
-            legend_html += "<br><b>Drugs:</b>"
-            for drug, color in sorted(drug_colors.items()):
-                rgb = color.getRgb()[:3]
-                legend_html += f"<br>&nbsp;&nbsp;<b>{drug}:</b> <span style='background-color: rgb{rgb}; padding: 0 8px;'>&nbsp;</span>"
-        
-        if cuboid_colors:
-            legend_html += "<br><b>Cuboid Counts:</b>"  
-            for cuboid, color in sorted(cuboid_colors.items()):
-                rgb = color.getRgb()[:3]
-                legend_html += f"<br>&nbsp;&nbsp;<b>{cuboid}:</b> <span style='border: 3px solid rgb{rgb}; display: inline-block; width: 16px; height: 12px; margin-left: 4px;'></span>"
-        
-        self.legend_label.setText(legend_html)
+    def create_overview_panel(self):
+        widget = QWidget()
+        layout = QVBoxLayout()
+        scale_layout = QHBoxLayout()
+        colorbar = QLabel()
+        colorbar.setPixmap(QPixmap.fromImage(self.colormap_image()).scaled(160, 12))
+        self.overview_scale_label = QLabel()
+        self.overview_per_plate_checkbox = QCheckBox("Scale each plate separately")
+        self.overview_per_plate_checkbox.toggled.connect(self.refresh_overview)
+        scale_layout.addWidget(colorbar)
+        scale_layout.addWidget(self.overview_scale_label)
+        scale_layout.addStretch()
+        scale_layout.addWidget(self.overview_per_plate_checkbox)
+        layout.addLayout(scale_layout)
+        self.overview = PlateOverview()
+        self.overview.plate_clicked.connect(self.open_plate)
+        scroll = QScrollArea()
+        scroll.setWidget(self.overview)
+        scroll.setWidgetResizable(True)
+        layout.addWidget(scroll)
+        widget.setLayout(layout)
+        self.overview_panel = widget
+        return widget
+    
+    @staticmethod
+    def colormap_image():
+        pixels = heatmap.COLORMAP.reshape(1, -1)
+        return QImage(pixels.data, pixels.shape[1], 1, pixels.strides[0], QImage.Format.Format_ARGB32).copy()
     
     def create_analysis_section(self):
         group = QGroupBox("Analysis Tools")
         layout = QHBoxLayout()
+        self.background_mode_combo = QComboBox()
+        self.background_mode_combo.addItem("Per plate", "plate")
+        self.background_mode_combo.addItem("Per row", "row")
+        self.background_mode_combo.addItem("Per column", "column")
+        self.background_stat_combo = QComboBox()
+        self.background_stat_combo.addItem("Mean", "mean")
+        self.background_stat_combo.addItem("Median", "median")
         self.calculate_backgrounds_btn = QPushButton("Calculate Background Subtraction")
         self.calculate_backgrounds_btn.clicked.connect(self.calculate_background_subtraction)
+        self.clear_background_btn = QPushButton("Undo Background Subtraction")
+        self.clear_background_btn.clicked.connect(self.clear_background_subtraction)
+        self.show_corrected_checkbox = QCheckBox("Show corrected values")
+        self.show_corrected_checkbox.setChecked(True)
+        self.show_corrected_checkbox.toggled.connect(self.toggle_corrected_values)
         self.export_results_btn = QPushButton("Export Results")
         self.export_results_btn.clicked.connect(self.export_results)
+        self.export_columnar_btn = QPushButton("Export Parquet/Arrow...")
+        self.export_columnar_btn.clicked.connect(self.export_columnar)
+        self.kinetics_checkbox = QCheckBox("Kinetic metrics")
+        self.kinetics_checkbox.setToolTip("Also export slope, AUC, max and time to half-maximum of every well of kinetic (multi-cycle) sheets")
+        self.qc_checkbox = QCheckBox("QC")
+        self.qc_checkbox.setToolTip("Mark replicate outliers in red as you assign, and export robust z-scores, Z' and edge effects")
+        self.qc_checkbox.toggled.connect(self.update_qc_display)
+        self.qc_threshold_spin = QDoubleSpinBox()
+        self.qc_threshold_spin.setPrefix("|z| > ")
+        self.qc_threshold_spin.setRange(1.0, 20.0)
+        self.qc_threshold_spin.setSingleStep(0.5)
+        self.qc_threshold_spin.setValue(qc.OUTLIER_THRESHOLD)
+        self.qc_threshold_spin.setToolTip("Robust z-score (from the median and MAD of each replicate group) above which a well is an outlier")
+        self.qc_threshold_spin.valueChanged.connect(self.update_qc_display)
+        self.remove_outliers_btn = QPushButton("Remove QC Outliers...")
+        self.remove_outliers_btn.clicked.connect(self.remove_qc_outliers)
+        layout.addWidget(QLabel("Background:"))
+        layout.addWidget(self.background_mode_combo)
+        layout.addWidget(self.background_stat_combo)
         layout.addWidget(self.calculate_backgrounds_btn)
+        layout.addWidget(self.clear_background_btn)
+        layout.addWidget(self.show_corrected_checkbox)
         layout.addWidget(self.export_results_btn)
+        layout.addWidget(self.export_columnar_btn)
+        layout.addWidget(self.kinetics_checkbox)
+        layout.addWidget(self.qc_checkbox)
+        layout.addWidget(self.qc_threshold_spin)
+        layout.addWidget(self.remove_outliers_btn)
         layout.addStretch()
         group.setLayout(layout)
         return group
@@ -689,32 +1043,72 @@ Selection Tips:
         if not ok or not sheet_name:
             return
         # Gather all assignments for this sheet across all files
-        all_data = []
-        for file_name, table_widget in self.table_widgets[sheet_name].items():
-            for (row, col), assignment in table_widget.cell_assignments.items():
-                all_data.append({
-                    'File': file_name,
-                    'Row': row + 1,
-                    'Column': col + 1,
-                    'Drug': assignment.get('drug'),
-                    'Cuboids': assignment.get('cuboids'),
-                    'Background': assignment.get('is_background')
-                })
+        all_data = [table_widget.plate.assignment_table().assign(File=file_name)
+                    for file_name, table_widget in self.table_widgets[sheet_name].items()]
+        all_data = [table for table in all_data if not table.empty]
         if not all_data:
             QMessageBox.information(self, "No Data", "No assignments found for this sheet.")
             return
-        df = pd.DataFrame(all_data)
+        df = pd.concat(all_data, ignore_index=True)[['File', 'Row', 'Column', 'Drug', 'Cuboids', 'Background']]
         # Let user save the extracted conditions
         file_path, _ = QFileDialog.getSaveFileName(self, "Save Extracted Conditions", f"{sheet_name}_conditions.xlsx", "Excel Files (*.xlsx)")
         if not file_path:
             return
         try:
-            with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name=sheet_name, index=False)
+            with xlsx.StreamingWorkbook(file_path) as workbook:
+                workbook.write_frame(sheet_name, df)
             QMessageBox.information(self, "Success", f"Extracted conditions saved to {file_path}")
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to save extracted conditions: {str(e)}")
     
+    def save_layout_template(self):
+        # Save the assignments of the currently selected sheet as a reusable well template
+        if not self.current_sheet or self.get_plate(*self.current_sheet) is None:
+            QMessageBox.warning(self, "Warning", "Select a sheet with assignments first")
+            return
+        template = plate_layout.layout_from_plate(self.get_plate(*self.current_sheet))
+        if template.empty:
+            QMessageBox.information(self, "No Data", "No assignments found for this sheet.")
+            return
+        file_path, _ = QFileDialog.getSaveFileName(self, "Save Layout Template", f"{self.current_sheet[0]}_layout.csv", "Layout Templates (*.csv *.json)")
+        if not file_path:
+            return
+        try:
+            plate_layout.write_layout(template, file_path)
+            QMessageBox.information(self, "Success", f"Layout template with {len(template)} wells saved to {file_path}")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to save layout template: {str(e)}")
+    
+    def apply_layout_template(self):
+        # Apply a saved template to every loaded sheet of every file in one bulk operation
+        if not self.sheet_data and not self.unparsed_sheets:
+            QMessageBox.warning(self, "Warning", "Please load data first")
+            return
+        file_path, _ = QFileDialog.getOpenFileName(self, "Apply Layout Template", "", "Layout Templates (*.csv *.json *.xlsx)")
+        if not file_path:
+            return
+        try:
+            template = plate_layout.read_layout(file_path)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to read layout template: {str(e)}")
+            return
+        self.parse_pending()
+        plates = [(sheet_name, self.get_plate(sheet_name, file_name)) for sheet_name, file_name in self.sheet_data]
+        plates = [(sheet_name, plate) for sheet_name, plate in plates if plate is not None]
+        applied = []
+        def edit():
+            for sheet_name, plate in plates:
+                if plate_layout.apply_layout(plate, template, sheet_name):
+                    applied.append(plate)
+        self.history.record("Apply Layout Template", [(plate, None, None) for _, plate in plates], edit)
+        n_plates = len(applied)
+        # Restyle each open table once instead of once per cell
+        for file_widgets in self.table_widgets.values():
+            for table_widget in file_widgets.values():
+                table_widget.register_colors()
+                table_widget.plate_model.sync_all()
+        QMessageBox.information(self, "Success", f"Applied {len(template)} wells to {n_plates} sheets")
+    
     def select_files(self):
         files, _ = QFileDialog.getOpenFileNames(
             self, 
@@ -735,114 +1129,510 @@ Selection Tips:
         if not self.excel_files:
             QMessageBox.warning(self, "Warning", "Please select Excel files first")
             return
+        if self._load_executor is not None:
+            return  # A load is already running
         try:
             self.sheet_data = {}  # {(sheet_name, file_name): DataFrame}
-            sheet_display_names = []
-            for file_path in self.excel_files:
-                file_name = Path(file_path).name
-                excel_file = pd.ExcelFile(file_path)
-                for sheet_name in excel_file.sheet_names:
-                    if sheet_name == "Sheet1":
-                        continue
-                    display_name = f"{sheet_name} ({file_name})"
-                    sheet_display_names.append(display_name)
-                    if (sheet_name, file_name) not in self.sheet_data:
-                        self.sheet_data[(sheet_name, file_name)] = None
-                    try:
-                        df = pd.read_excel(file_path, sheet_name=sheet_name, header=None)
-                        table_start_row = self.find_table_start(df)
-                        if table_start_row is not None:
-                            table_df = df.iloc[table_start_row:].reset_index(drop=True)
-                            # Stop at first completely empty row
-                            empty_row_idx = None
-                            for idx, row in table_df.iterrows():
-                                if all(pd.isna(val) or (isinstance(val, str) and val.strip() == "") for val in row):
-                                    empty_row_idx = idx
-                                    break
-                            if empty_row_idx is not None:
-                                table_df = table_df.iloc[:empty_row_idx]
-                            # Use first row as header if it contains text
-                            if len(table_df) > 0 and (table_df.iloc[0].dtype == 'object' or any(isinstance(val, str) for val in table_df.iloc[0])):
-                                table_df.columns = table_df.iloc[0]
-                                table_df = table_df.iloc[1:].reset_index(drop=True)
-                            self.sheet_data[(sheet_name, file_name)] = table_df
-                        else:
-                            self.sheet_data[(sheet_name, file_name)] = df
-                    except Exception as e:
-                        print(f"Error loading {sheet_name} from {file_path}: {e}")
-            # Populate sheet list with display names
+            self.plates = {}
+            self.history.clear()
+            self.color_palette.clear()
+            self._results_cache = {}
+            self._fit_cache = {}
+            self._kinetics = {}
             self.sheet_list.clear()
-            for display_name in sheet_display_names:
-                self.sheet_list.addItem(display_name)
-            QMessageBox.information(self, "Success", f"Loaded {len(sheet_display_names)} sheets from {len(self.excel_files)} files")
+            self.overview.set_tiles([])
+            self.clear_table_views()
+            self.stop_prefetch()
+            self.unparsed_sheets = {}
+            self._lazy_workbooks = {}
+            self._lazy_load = self.lazy_load_checkbox.isChecked()
+            self._loaded_sheet_count = 0
+            self._loaded_file_count = 0
+            self._load_started_ns = time.perf_counter_ns()
+            # One worker process per workbook; parsing and table trimming happen in the worker
+            max_workers = min(len(self.excel_files), os.cpu_count() or 1)
+            self._load_executor = ProcessPoolExecutor(max_workers=max_workers)
+            # Unchanged workbooks come straight from the parse cache, read here so their tables stay
+            # memory-mapped; in lazy mode the others only have their sheet index read in a worker
+            # and are parsed sheet by sheet
+            task = cache.index_workbook if self._lazy_load else cache.load_workbook
+            self._load_futures = {}
+            for file_path in self.excel_files:
+                hit = cache.cached_result(file_path, self.parse_cache_dir)
+                if hit is None:
+                    future = self._load_executor.submit(task, file_path, self.parse_cache_dir)
+                else:
+                    key, result = hit
+                    future = Future()  # Already done; poll_load_results picks it up with the others
+                    future.set_result((result[0], [], key, result) if self._lazy_load else result)
+                self._load_futures[future] = file_path
         except Exception as e:
+            self.finish_load()
             QMessageBox.critical(self, "Error", f"Failed to load data: {str(e)}")
+            return
+        self.load_progress.setRange(0, len(self.excel_files))
+        self.load_progress.setValue(0)
+        self.load_progress.setVisible(True)
+        self.cancel_load_btn.setVisible(True)
+        self.load_data_btn.setEnabled(False)
+        self.select_files_btn.setEnabled(False)
+        self._load_timer.start()
+    
+    def poll_load_results(self):
+        # Add every workbook that finished since the last poll to sheet_data and sheet_list
+        done = [future for future in self._load_futures if future.done()]
+        for future in done:
+            file_path = self._load_futures.pop(future)
+            if future.cancelled():
+                continue
+            try:
+                result = future.result()
+            except Exception as e:
+                profiling.PROFILER.error(f"Error loading {file_path}: {e}")
+                continue
+            if self._lazy_load:
+                file_name, sheet_names, key, result = result
+                if result is None:
+                    self._lazy_workbooks[file_name] = (file_path, key, sheet_names, {})
+                    for sheet_name in sheet_names:
+                        self.unparsed_sheets[(sheet_name, file_name)] = file_path
+                        self.sheet_list.addItem(f"{sheet_name} ({file_name})")
+                    self._loaded_sheet_count += len(sheet_names)
+                    n_sheets = len(sheet_names)
+            if result is not None:
+                file_name, sheets, errors, reads = result
+                for message in errors:
+                    profiling.PROFILER.error(message)
+                for sheet_name, table_df in sheets:
+                    self.sheet_data[(sheet_name, file_name)] = table_df
+                    self.sheet_list.addItem(f"{sheet_name} ({file_name})")
+                self._kinetics.update(((sheet_name, file_name), read) for sheet_name, read in reads)
+                self._loaded_sheet_count += len(sheets)
+                n_sheets = len(sheets)
+            # Worker time is measured here, from submission until the result was picked up
+            profiling.PROFILER.record('load_workbook', self._load_started_ns, time.perf_counter_ns() - self._load_started_ns,
+                                      file=Path(file_path).name, sheets=n_sheets, lazy=self._lazy_load)
+            self._loaded_file_count += 1
+            self.load_progress.setValue(self.load_progress.value() + 1)
+        if not self._load_futures:
+            self.finish_load()
+            if profiling.PROFILER.enabled:
+                profiling.PROFILER.record('load_data', self._load_started_ns, time.perf_counter_ns() - self._load_started_ns,
+                                          files=self._loaded_file_count, sheets=self._loaded_sheet_count,
+                                          bytes=sum(os.path.getsize(path) for path in self.excel_files if os.path.exists(path)))
+            cache.evict(self.parse_cache_dir)
+            self.refresh_overview_if_visible()
+            QMessageBox.information(self, "Success", f"Loaded {self._loaded_sheet_count} sheets from {self._loaded_file_count} files")
+    
+    def show_diagnostics(self):
+        if self._diagnostics_dialog is None:
+            self._diagnostics_dialog = DiagnosticsDialog(self)
+        self._diagnostics_dialog.refresh()
+        self._diagnostics_dialog.show()
+        self._diagnostics_dialog.raise_()
+    
+    def cancel_load(self):
+        if self._load_executor is None:
+            return
+        # Drop queued workbooks; already running workers finish in the background and are ignored
+        self.finish_load()
+        QMessageBox.information(self, "Cancelled", f"Loading cancelled after {self._loaded_sheet_count} sheets from {self._loaded_file_count} files")
+    
+    def finish_load(self):
+        self._load_timer.stop()
+        if self._load_executor is not None:
+            self._load_executor.shutdown(wait=False, cancel_futures=True)
+        self._load_executor = None
+        self._load_futures = {}
+        self.load_progress.setVisible(False)
+        self.cancel_load_btn.setVisible(False)
+        self.load_data_btn.setEnabled(bool(self.excel_files))
+        self.select_files_btn.setEnabled(True)
+    
+    def clear_parse_cache(self):
+        size = cache.cache_size(self.parse_cache_dir)
+        cache.clear(self.parse_cache_dir)
+        QMessageBox.information(self, "Cache Cleared", f"Removed {size / 1e6:.1f} MB of cached workbooks from {self.parse_cache_dir}")
+    
+    def save_session(self):
+        if not self.sheet_data and not self.unparsed_sheets:
+            QMessageBox.warning(self, "Warning", "No data to save")
+            return
+        file_path, _ = QFileDialog.getSaveFileName(self, "Save Session", "", "TECAN Sessions (*.npz)")
+        if not file_path:
+            return
+        try:
+            self.parse_pending()
+            # Plates in sheet list order, so the reopened list looks the same
+            keys = [self.sheet_item_key(self.sheet_list.item(i).text()) for i in range(self.sheet_list.count())]
+            keys = list(dict.fromkeys([key for key in keys if key in self.sheet_data] + list(self.sheet_data)))
+            settings = {'background_mode': self.background_mode_combo.currentData(),
+                        'background_stat': self.background_stat_combo.currentData(),
+                        'show_corrected': self.show_corrected_checkbox.isChecked(),
+                        'qc': self.qc_checkbox.isChecked(), 'qc_threshold': self.qc_threshold_spin.value(),
+                        'current_sheet': list(self.current_sheet) if self.current_sheet else None}
+            with profiling.span('save_session', plates=len(keys)):
+                session.save_session(file_path, self.excel_files, {key: self.get_plate(*key) for key in keys},
+                                     self.selections, settings)
+            QMessageBox.information(self, "Success", f"Session saved to {file_path}")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to save session: {str(e)}")
+    
+    def open_session(self):
+        if self._load_executor is not None:
+            return  # A load is running
+        file_path, _ = QFileDialog.getOpenFileName(self, "Open Session", "", "TECAN Sessions (*.npz)")
+        if not file_path:
+            return
+        try:
+            with profiling.span('open_session', file=Path(file_path).name):
+                saved = session.load_session(file_path)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to open session: {str(e)}")
+            return
+        with profiling.span('restore_session', plates=len(saved['plates'])):
+            self.restore_session(saved)
+        changed = session.changed_files(saved['files'])
+        if changed:
+            QMessageBox.warning(self, "Source Files Changed",
+                                "These workbooks changed since the session was saved; the session keeps the saved values:\n"
+                                + "\n".join(f"{Path(path).name}: {status}" for path, status in changed))
+    
+    def restore_session(self, saved):
+        """Replace the loaded data with the plates, selections and settings of a session from tecan.session"""
+        self.stop_prefetch()
+        self.clear_table_views()
+        self.history.clear()
+        self.color_palette.clear()
+        self._results_cache = {}
+        self._fit_cache = {}
+        self._kinetics = None
+        self.unparsed_sheets = {}
+        self._lazy_workbooks = {}
+        self.excel_files = [record['path'] for record in saved['files']]
+        self.file_list.clear()
+        for file in self.excel_files:
+            self.file_list.addItem(Path(file).name)
+        self.load_data_btn.setEnabled(bool(self.excel_files))
+        self.plates = {key: plate for key, plate in saved['plates'].items() if plate is not None}
+        # get_plate only looks sheet_data up for plates it has not built yet, so a view of the raw values is enough here
+        self.sheet_data = {key: None if plate is None else pd.DataFrame(plate.raw_values, columns=plate.col_labels, copy=False)
+                           for key, plate in saved['plates'].items()}
+        self.selections = saved['selections']
+        settings = saved['settings']
+        for combo, name in ((self.background_mode_combo, 'background_mode'), (self.background_stat_combo, 'background_stat')):
+            index = combo.findData(settings.get(name))
+            if index >= 0:
+                combo.setCurrentIndex(index)
+        self.show_corrected_checkbox.setChecked(settings.get('show_corrected', True))
+        self.qc_threshold_spin.setValue(settings.get('qc_threshold', qc.OUTLIER_THRESHOLD))
+        self.qc_checkbox.setChecked(settings.get('qc', False))
+        self.sheet_list.clear()
+        for sheet_name, file_name in self.sheet_data:
+            self.sheet_list.addItem(f"{sheet_name} ({file_name})")
+        self.current_sheet = tuple(settings['current_sheet']) if settings.get('current_sheet') else None
+        if self.current_sheet in self.sheet_data:
+            self.display_sheet_data(self.current_sheet[0])
+        else:
+            self.current_sheet = None
+        self.refresh_overview_if_visible()
+    
+    def parse_pending(self, sheet_name=None):
+        """Parse the listed but unparsed tables named sheet_name (all of them if None) and wait for them.
+
+        The sheets go to the prefetch workers, one task per workbook, while a
+        progress dialog shows how many are left; the window keeps repainting
+        but takes no input until they are in.
+        """
+        keys = [key for key in self.unparsed_sheets if sheet_name is None or key[0] == sheet_name]
+        if not keys:
+            return
+        self.prefetch_sheets(keys)
+        wanted = set(keys)
+        futures = [future for future, batch in self._prefetch_futures.items() if wanted.intersection(batch)]
+        progress = QProgressDialog("Parsing sheets...", None, 0, len(keys), self)
+        progress.setWindowTitle("Parsing")
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(300)
+        while futures:
+            done, not_done = wait(futures, timeout=0.05)
+            futures = list(not_done)
+            self.poll_prefetch_results()
+            progress.setValue(len(keys) - len(wanted.intersection(self.unparsed_sheets)))
+            QApplication.processEvents(QEventLoop.ProcessEventsFlag.ExcludeUserInputEvents)
+        progress.close()
+    
+    def add_parsed_sheet(self, file_name, sheet_name, sheets, errors, reads):
+        if self.unparsed_sheets.pop((sheet_name, file_name), None) is None:
+            return  # Parsed already, e.g. opened while its prefetch was still running
+        for message in errors:
+            profiling.PROFILER.error(message)
+        item_text = f"{sheet_name} ({file_name})"
+        row = next((i for i in range(self.sheet_list.count()) if self.sheet_list.item(i).text() == item_text), self.sheet_list.count())
+        for k, (table_name, table_df) in enumerate(sheets):
+            self.sheet_data[(table_name, file_name)] = table_df
+            if k > 0:  # Extra tables stacked in the sheet only show up once it is parsed
+                self.sheet_list.insertItem(row + k, f"{table_name} ({file_name})")
+        if self._kinetics is not None:
+            self._kinetics.update(((name, file_name), read) for name, read in reads)
+        # Once every sheet of a workbook is parsed, store it in the parse cache like an eager load would
+        workbook = self._lazy_workbooks.get(file_name)
+        if workbook is not None:
+            file_path, key, sheet_names, parsed = workbook
+            parsed[sheet_name] = (sheets, errors, reads)
+            if len(parsed) == len(sheet_names):
+                del self._lazy_workbooks[file_name]
+                if key is not None:
+                    cache.store(self.parse_cache_dir, key, (file_name, *([item for name in sheet_names for item in parsed[name][k]]
+                                                                         for k in range(3))))
+    
+    def prefetch_next_sheet(self, sheet_name):
+        # Parse the next sheet in the list in the background, as it is the likeliest one to be opened next
+        names = []
+        for i in range(self.sheet_list.count()):
+            key = self.sheet_item_key(self.sheet_list.item(i).text())
+            if key is not None and key[0] not in names:
+                names.append(key[0])
+        following = names[names.index(sheet_name) + 1:] if sheet_name in names else names
+        pending = self.prefetch_pending()
+        next_name = next((name for name in following if any(key[0] == name and key not in pending for key in self.unparsed_sheets)), None)
+        if next_name is not None:
+            self.prefetch_sheets([key for key in self.unparsed_sheets if key[0] == next_name])
+    
+    def prefetch_all_sheets(self):
+        # Parse every sheet not parsed yet in the background, e.g. for the plate overview
+        self.prefetch_sheets(list(self.unparsed_sheets))
+    
+    def prefetch_sheets(self, keys):
+        # Submit the unparsed (sheet_name, file_name) keys that are not on their way yet, one task per workbook
+        pending = self.prefetch_pending()
+        by_file = {}
+        for key in keys:
+            if key in self.unparsed_sheets and key not in pending:
+                by_file.setdefault(self.unparsed_sheets[key], []).append(key)
+        if not by_file:
+            return
+        if self._prefetch_executor is None:
+            self._prefetch_executor = ProcessPoolExecutor(max_workers=min(len(self.excel_files), os.cpu_count() or 1))
+        for file_path, batch in by_file.items():
+            future = self._prefetch_executor.submit(loader.load_sheets, file_path, [sheet_name for sheet_name, _ in batch])
+            self._prefetch_futures[future] = batch
+        self._prefetch_timer.start()
+    
+    def prefetch_pending(self):
+        """Keys of the sheets submitted to the prefetch workers and not back yet"""
+        return {key for batch in self._prefetch_futures.values() for key in batch}
+    
+    def poll_prefetch_results(self):
+        done = [future for future in self._prefetch_futures if future.done()]
+        for future in done:
+            batch = self._prefetch_futures.pop(future)
+            if future.cancelled():
+                continue
+            try:
+                for result in future.result():
+                    self.add_parsed_sheet(*result)
+            except Exception as e:
+                for sheet_name, file_name in batch:
+                    profiling.PROFILER.error(f"Error loading {sheet_name} from {file_name}: {e}")
+        if not self._prefetch_futures:
+            self._prefetch_timer.stop()
+        if done and self.view_tabs.currentWidget() is self.overview_panel:
+            self.refresh_overview()
+    
+    def stop_prefetch(self):
+        self._prefetch_timer.stop()
+        if self._prefetch_executor is not None:
+            self._prefetch_executor.shutdown(wait=False, cancel_futures=True)
+        self._prefetch_executor = None
+        self._prefetch_futures = {}
+    
+    def closeEvent(self, event):
+        self.finish_load()
+        self.stop_prefetch()
+        super().closeEvent(event)
     
     def find_table_start(self, df):
-        """Find where the actual data table starts: after the row containing 'temperature' (excluding it)"""
-        for i in range(len(df)):
-            row = df.iloc[i]
-            # Check if any cell in the row contains 'temperature' (case-insensitive)
-            if any(isinstance(val, str) and 'temperature' in val.lower() for val in row if pd.notna(val)):
-                return i + 1  # Start after the 'temperature' row
-        return 0  # Default to start if not found
+        return tables.find_table_start(df)
     
-    def on_sheet_selected(self, item):
-        display_name = item.text()
-        # Extract sheet_name and file_name from display_name
+    @staticmethod
+    def sheet_item_key(display_name):
+        # Extract (sheet_name, file_name) from a sheet_list entry "sheet_name (file_name)"
         if display_name.endswith(")") and " (" in display_name:
             sheet_name, file_name = display_name.rsplit(" (", 1)
-            file_name = file_name[:-1]  # remove trailing )
-            self.current_sheet = (sheet_name, file_name)
-            self.display_sheet_data(sheet_name)  # Pass only the sheet_name for multi-file operations
+            return sheet_name, file_name[:-1]  # remove trailing )
+        return None
+    
+    def on_sheet_selected(self, item):
+        key = self.sheet_item_key(item.text())
+        if key is not None:
+            self.current_sheet = key
+            self.display_sheet_data(key[0])  # Pass only the sheet_name for multi-file operations
+    
+    def open_plate(self, sheet_name, file_name):
+        # Show the tables of a sheet with the tab of one file in front, e.g. from the plate overview
+        self.current_sheet = (sheet_name, file_name)
+        items = self.sheet_list.findItems(f"{sheet_name} ({file_name})", Qt.MatchFlag.MatchExactly)
+        if items:
+            self.sheet_list.setCurrentItem(items[0])
+        self.display_sheet_data(sheet_name)
+        for index in range(self.tab_widget.count()):
+            if self.tab_widget.tabText(index) == file_name:
+                self.tab_widget.setCurrentIndex(index)
+                break
+        self.view_tabs.setCurrentWidget(self.tab_widget)
+    
+    def refresh_overview_if_visible(self):
+        if self.view_tabs.currentWidget() is self.overview_panel:
+            self.prefetch_all_sheets()  # Their heatmaps fill in as they arrive
+            self.refresh_overview()
+    
+    def refresh_overview(self):
+        """Redraw the heatmap of every sheet_list entry from its plate's values; sheets not parsed yet are placeholders"""
+        keys = [self.sheet_item_key(self.sheet_list.item(i).text()) for i in range(self.sheet_list.count())]
+        plates = [(key, self.get_plate(*key) if key in self.sheet_data else None) for key in keys if key is not None]
+        show_corrected = self.show_corrected_checkbox.isChecked()
+        shown = {key: plate.values if show_corrected else plate.raw_values
+                 for key, plate in plates if plate is not None}
+        shared = heatmap.color_range([values[~self.plates[key].state.removed] for key, values in shown.items()])
+        per_plate = self.overview_per_plate_checkbox.isChecked()
+        tiles = []
+        with profiling.span('overview', plates=len(shown)):
+            for key, plate in plates:
+                if plate is None:
+                    tiles.append((key, None if key in self.unparsed_sheets else QImage()))
+                    continue
+                values, removed = shown[key], plate.state.removed
+                if not values.size:
+                    tiles.append((key, QImage()))
+                    continue
+                vmin, vmax = heatmap.color_range([values[~removed]]) if per_plate else shared
+                pixels = heatmap.heatmap_argb(values, vmin, vmax, removed)
+                # copy() detaches the image from the NumPy buffer
+                tiles.append((key, QImage(pixels.data, pixels.shape[1], pixels.shape[0], pixels.strides[0],
+                                          QImage.Format.Format_ARGB32).copy()))
+        self.overview.set_tiles(tiles)
+        if per_plate:
+            self.overview_scale_label.setText("2nd to 98th percentile of each plate; gray: empty or removed")
+        else:
+            self.overview_scale_label.setText(f"{shared[0]:.4g} to {shared[1]:.4g} (2nd to 98th percentile of all plates); "
+                                              "gray: empty or removed")
     
     def display_sheet_data(self, sheet_name):
+        with profiling.span('display', sheet=sheet_name) as s:
+            self.parse_pending(sheet_name)
+            s.set(files=self.show_sheet_tables(sheet_name))
+
+    def show_sheet_tables(self, sheet_name):
+        # Number of tables shown
         # Find all (sheet_name, file_name) pairs for this sheet_name
         relevant_keys = [(s, f) for (s, f) in self.sheet_data if s == sheet_name]
         if not relevant_keys:
-            return
+            return 0
+        # Detach the shown pages without deleting them; views built before are re-added as they are
         self.tab_widget.clear()
-        for (s, file_name) in relevant_keys:
-            df = self.sheet_data[(s, file_name)]
-            tab_label = f"{file_name}"
-            table_widget = SelectableTableWidget()
-            self.populate_table(table_widget, df)
-            # Restore previous selection if available
-            sel_key = (sheet_name, file_name)
-            if sel_key in self.selections:
-                table_widget._saved_selection = self.selections[sel_key]
-                table_widget.restore_selection()
-            # Connect selection change to save_selection
-            def save_sel_tw(widget=table_widget, key=sel_key):
-                self.selections[key] = set((item.row(), item.column()) for item in widget.selectedItems())
-            table_widget.itemSelectionChanged.connect(save_sel_tw)
-            scroll = QScrollArea()
-            scroll.setWidget(table_widget)
-            scroll.setWidgetResizable(True)
-            self.tab_widget.addTab(scroll, tab_label)
-            if sheet_name not in self.table_widgets:
-                self.table_widgets[sheet_name] = {}
-            self.table_widgets[sheet_name][file_name] = table_widget
-        if hasattr(self, 'legend_label'):
-            self.update_legend()
-    
-    def populate_table(self, table_widget, df):
-        # If first column is all letters, use as row labels
-        if df.shape[1] > 1 and df.iloc[:, 0].apply(lambda x: isinstance(x, str) and x.isalpha()).all():
-            row_labels = df.iloc[:, 0].astype(str).tolist()
-            df = df.iloc[:, 1:].reset_index(drop=True)
-        else:
-            row_labels = [str(i+1) for i in range(len(df))]
-        table_widget.setRowCount(len(df))
-        table_widget.setColumnCount(len(df.columns))
-        table_widget.setHorizontalHeaderLabels([str(col) for col in df.columns])
-        table_widget.setVerticalHeaderLabels(row_labels)
-        for i in range(len(df)):
-            for j in range(len(df.columns)):
-                value = df.iloc[i, j]
-                if pd.notna(value):
-                    item = QTableWidgetItem(str(value))
-                    table_widget.setItem(i, j, item)
+        for key in relevant_keys:
+            scroll = self._table_views.get(key)
+            if scroll is None:
+                scroll = self.build_table_view(*key)
+                self._table_views[key] = scroll
+            else:
+                self._table_views.move_to_end(key)
+            self.tab_widget.addTab(scroll, f"{key[1]}")
+        self.evict_table_views(relevant_keys)
+        self.prefetch_next_sheet(sheet_name)
+        return len(relevant_keys)
+    
+    def build_table_view(self, sheet_name, file_name):
+        """Scroll area holding a new SelectableTableWidget for (sheet, file), registered and with its selection restored"""
+        table_widget = SelectableTableWidget(self.color_palette)
+        self.populate_table(table_widget, self.get_plate(sheet_name, file_name))
+        # Restore previous selection if available
+        sel_key = (sheet_name, file_name)
+        if sel_key in self.selections:
+            table_widget._saved_selection = self.selections[sel_key]
+            table_widget.restore_selection()
+        # Connect selection change to save_selection
+        def save_sel_tw(selected=None, deselected=None, widget=table_widget, key=sel_key):
+            self.selections[key] = set(widget.selected_cells())
+        table_widget.selectionModel().selectionChanged.connect(save_sel_tw)
+        scroll = QScrollArea()
+        scroll.setWidget(table_widget)
+        scroll.setWidgetResizable(True)
+        self.widget_registry.register(table_widget, sheet_name, file_name)
+        return scroll
+    
+    def evict_table_views(self, shown_keys=()):
+        # Drop the least recently shown views beyond MAX_CACHED_VIEWS, never the ones on screen
+        shown_keys = set(shown_keys)
+        for key in list(self._table_views):
+            if len(self._table_views) <= MAX_CACHED_VIEWS:
+                break
+            if key not in shown_keys:
+                self.discard_table_view(key)
+    
+    def discard_table_view(self, key):
+        scroll = self._table_views.pop(key)
+        self.widget_registry.unregister(scroll.widget())
+        scroll.deleteLater()
+    
+    def clear_table_views(self):
+        self.tab_widget.clear()
+        for key in list(self._table_views):
+            self.discard_table_view(key)
+    
+    def get_plate(self, sheet_name, file_name):
+        """Plate for a loaded (sheet, file), created on first use; None if the sheet failed to load"""
+        key = (sheet_name, file_name)
+        if key not in self.plates:
+            df = self.sheet_data.get(key)
+            if df is None:
+                return None
+            self.plates[key] = Plate.from_dataframe(df)
+        return self.plates[key]
+    
+    def plates_by_sheet(self):
+        plates = {}
+        for (sheet_name, file_name), plate in self.plates.items():
+            plates.setdefault(sheet_name, {})[file_name] = plate
+        return plates
+    
+    def undo_assignment(self):
+        self.apply_history_command(self.history.undo())
+    
+    def redo_assignment(self):
+        self.apply_history_command(self.history.redo())
+    
+    def apply_history_command(self, command):
+        # Repaint only the cells the undone / redone command changed, on the open tables showing those plates
+        if command is None:
+            return
+        changes = {id(change.plate): change for change in command.changes}
+        for file_widgets in self.table_widgets.values():
+            for table_widget in file_widgets.values():
+                change = changes.get(id(table_widget.plate))
+                if change is None:
+                    continue
+                table_widget.register_colors()
+                if change.corrected is not None:
+                    table_widget.plate_model.sync_all()  # Every value changed with the background correction
+                else:
+                    table_widget.plate_model.sync_region(change.rows, change.cols)
+        self.refresh_overview_if_visible()
+    
+    def update_history_actions(self):
+        undo_stack, redo_stack = self.history.undo_stack, self.history.redo_stack
+        self.undo_btn.setEnabled(bool(undo_stack))
+        self.undo_btn.setText(f"Undo {undo_stack[-1].name}" if undo_stack else "Undo")
+        self.redo_btn.setEnabled(bool(redo_stack))
+        self.redo_btn.setText(f"Redo {redo_stack[-1].name}" if redo_stack else "Redo")
+    
+    def populate_table(self, table_widget, plate):
+        model = PlateTableModel(plate if plate is not None else Plate(np.empty((0, 0))))
+        model.show_corrected = self.show_corrected_checkbox.isChecked()
+        model.qc_threshold = self.qc_threshold()
+        with profiling.span('populate_table', cells=model.rowCount() * model.columnCount()):
+            table_widget.set_plate_model(model)
     
     def clear_assignments(self):
         reply = QMessageBox.question(self, "Confirm Clear", 
@@ -851,340 +1641,159 @@ Selection Tips:
                                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         
         if reply == QMessageBox.StandardButton.Yes:
-            # Clear assignments across ALL sheets and ALL files
-            for sheet_name, file_widgets in self.table_widgets.items():
-                for file_path, table_widget in file_widgets.items():
-                    table_widget.cell_assignments.clear()
-                    table_widget.removed_cells.clear()
-                    
-                    # Reset cell colors and reload original data
-                    if sheet_name in self.sheet_data and file_path in self.sheet_data[sheet_name]:
-                        df = self.sheet_data[sheet_name][file_path]
-                        self.populate_table(table_widget, df)
-            
-            # Reset background subtraction flag if it exists
-            if hasattr(self, '_background_subtracted'):
-                self._background_subtracted = False
+            # Clear assignments and background correction across ALL sheets and ALL files as one undoable command
+            targets = [(plate, *np.nonzero(plate.state.assigned | plate.state.removed)) for plate in self.plates.values()]
+            def edit():
+                for plate, rows, cols in targets:
+                    plate.state.reset(rows, cols)
+                    background.clear_background(plate)
+            self.history.record("Clear All Assignments", targets, edit)
+            for file_widgets in self.table_widgets.values():
+                for table_widget in file_widgets.values():
+                    table_widget.plate_model.sync_all()
+            self.refresh_overview_if_visible()
             
             QMessageBox.information(self, "Success", "All assignments and modifications cleared for all sheets and files")
     
     def export_results(self):
         # Export all sheets, each as a separate sheet in the output file, combining all files for each sheet name
-        if not self.table_widgets:
+        if not self.plates:
             QMessageBox.warning(self, "Warning", "No data to export")
             return
         file_path, _ = QFileDialog.getSaveFileName(self, "Export Results", "", "Excel Files (*.xlsx)")
         if not file_path:
             return
         try:
-            with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-                # 1. Main sheets: one per original sheet name (excluding background and NaN)
-                all_file_cuboid = {}
-                all_file_drug = {}
-                all_file_drug_by_digit = {}
-                file_cuboid_data = {}  # Fix: ensure this is defined for ratio calculations
-                
-                for sheet_name, file_widgets in self.table_widgets.items():
-                    all_data = []
-                    for file_name, table_widget in file_widgets.items():
-                        for (row, col), assignment in table_widget.cell_assignments.items():
-                            if assignment.get('is_background'):
-                                continue
-                            item = table_widget.item(row, col)
-                            value = item.text() if item else None
-                            if isinstance(value, str) and (value.startswith('\u25CF ') or value.startswith('● ')):
-                                value = value[2:]
-                            if value is None or str(value).strip().lower() == 'nan' or str(value).strip() == '':
-                                continue
-                            cuboids = assignment.get('cuboids')
-                            if cuboids is None:
-                                cuboids = 0
-                            drug = assignment.get('drug')
-                            gui_row = table_widget.verticalHeaderItem(row).text() if table_widget.verticalHeaderItem(row) else str(row + 1)
-                            gui_col = table_widget.horizontalHeaderItem(col).text() if table_widget.horizontalHeaderItem(col) else str(col + 1)
-                            all_data.append({
-                                'File': file_name,
-                                'Sheet': sheet_name,
-                                'Row': gui_row,
-                                'Column': gui_col,
-                                'Drug': drug,
-                                'Cuboids': cuboids,
-                                'Value': value
-                            })
-                            # --- Drug sheet grouping by file last digit and cuboid ---
-                            file_stem = Path(file_name).stem
-                            last_digit = None
-                            for char in reversed(file_stem):
-                                if char.isdigit():
-                                    last_digit = int(char)
-                                    break
-                            # Group by (last_digit, cuboids)
-                            if last_digit is not None and drug:
-                                key = (last_digit, cuboids)
-                                if key not in all_file_drug_by_digit:
-                                    all_file_drug_by_digit[key] = []
-                                all_file_drug_by_digit[key].append({
-                                    'Drug': drug,
-                                    'Value': value,
-                                    'Row': gui_row,
-                                    'Column': gui_col
-                                })
-                            # For file-cuboid sheets (legacy, for ratio)
-                            if file_name and drug:
-                                key = (file_name, cuboids)
-                                if key not in all_file_cuboid:
-                                    all_file_cuboid[key] = []
-                                all_file_cuboid[key].append({
-                                    'Drug': drug,
-                                    'Value': value,
-                                    'Row': gui_row,
-                                    'Column': gui_col
-                                })
-                # --- Build file_cuboid_data for ratios as before ---
-                for (file_name, cuboids), records in all_file_cuboid.items():
-                    file_stem = Path(file_name).stem
-                    last_digit = None
-                    for char in reversed(file_stem):
-                        if char.isdigit():
-                            last_digit = int(char)
-                            break
-                    if last_digit is not None:
-                        key = (last_digit, cuboids)
-                        # Build drug_values for this (last_digit, cuboids)
-                        df_fc = pd.DataFrame(records)
-                        drugs = sorted(df_fc['Drug'].dropna().unique())
-                        drug_values = {}
-                        for drug in drugs:
-                            vals = [v[2:] if isinstance(v, str) and (v.startswith('\u25CF ') or v.startswith('● ')) else v for v in df_fc[df_fc['Drug'] == drug]['Value'].tolist()]
-                            float_vals = []
-                            for val in vals:
-                                try:
-                                    float_vals.append(float(val))
-                                except (ValueError, TypeError):
-                                    float_vals.append(0.0)
-                            drug_values[drug] = float_vals
-                        file_cuboid_data[key] = drug_values
-                # Write main sheet after all_data is collected
-                if all_data:
-                    df = pd.DataFrame(all_data)
-                    df.to_excel(writer, sheet_name=sheet_name[:31], index=False)
-
-                # --- Drug sheets by last digit and cuboid (unique for each day/cuboid combo) ---
-                for (last_digit, cuboids), records in all_file_drug_by_digit.items():
-                    sheet_label = f"Drugs_{last_digit}_Cuboid_{cuboids}"
-                    df_drug = pd.DataFrame(records)
-                    drugs = sorted(df_drug['Drug'].dropna().unique())
-                    drug_values = {}
-                    for drug in drugs:
-                        vals = [v[2:] if isinstance(v, str) and (v.startswith('\u25CF ') or v.startswith('● ')) else v for v in df_drug[df_drug['Drug'] == drug]['Value'].tolist()]
-                        float_vals = []
-                        for val in vals:
-                            try:
-                                float_vals.append(float(val))
-                            except (ValueError, TypeError):
-                                float_vals.append(0.0)
-                        drug_values[drug] = float_vals
-                    max_len = max((len(vals) for vals in drug_values.values()), default=0)
-                    for drug in drug_values:
-                        drug_values[drug] += [0.0] * (max_len - len(drug_values[drug]))
-                    export_df = pd.DataFrame(drug_values)
-                    export_df.to_excel(writer, sheet_name=sheet_label[:31], index=False)
-                
-                # 3. Drug-only files (for files without cuboids or as additional sheets)
-                file_drug_data = {}  # Store data for ratio calculations without cuboids
-                
-                for file_name, records in all_file_drug.items():
-                    # Check if this file already has cuboid sheets
-                    has_cuboid_sheets = any(fn == file_name for (fn, _) in all_file_cuboid.keys())
-                    
-                    if not has_cuboid_sheets:  # Only create drug-only sheet if no cuboid sheets exist
-                        sheet_label = f"File_{Path(file_name).stem}_Drugs"
-                        df_fd = pd.DataFrame(records)
-                        
-                        drugs = sorted(df_fd['Drug'].dropna().unique())
-                        drug_values = {}
-                        
-                        for drug in drugs:
-                            vals = [v[2:] if isinstance(v, str) and (v.startswith('\u25CF ') or v.startswith('● ')) else v for v in df_fd[df_fd['Drug'] == drug]['Value'].tolist()]
-                            # Convert to float for calculations
-                            float_vals = []
-                            for val in vals:
-                                try:
-                                    float_vals.append(float(val))
-                                except (ValueError, TypeError):
-                                    float_vals.append(0.0)
-                            drug_values[drug] = float_vals
-                        
-                        max_len = max((len(vals) for vals in drug_values.values()), default=0)
-                        for drug in drug_values:
-                            drug_values[drug] += [0.0] * (max_len - len(drug_values[drug]))
-                        
-                        export_df = pd.DataFrame(drug_values)
-                        export_df.to_excel(writer, sheet_name=sheet_label[:31], index=False)
-                        
-                        # Store for ratio calculations (cuboid = None or 0)
-                        file_stem = Path(file_name).stem
-                        last_digit = None
-                        for char in reversed(file_stem):
-                            if char.isdigit():
-                                last_digit = int(char)
-                                break
-                        
-                        if last_digit is not None:
-                            key = (last_digit, 0)  # Use 0 for no cuboids
-                            if key not in file_drug_data:
-                                file_drug_data[key] = {}
-                            file_drug_data[key].update(drug_values)
-                
-                # 4. Create ratio sheets for cuboid data
-                cuboid_groups = {}
-                for (digit, cuboids), drug_data in file_cuboid_data.items():
-                    if cuboids not in cuboid_groups:
-                        cuboid_groups[cuboids] = {}
-                    cuboid_groups[cuboids][digit] = drug_data
-                
-                for cuboids, digit_data in cuboid_groups.items():
-                    if len(digit_data) < 2:
-                        continue  # Need at least 2 files to create ratios
-                    
-                    min_digit = min(digit_data.keys())
-                    baseline_data = digit_data[min_digit]
-                    
-                    for other_digit in sorted(digit_data.keys()):
-                        if other_digit == min_digit:
-                            continue
-                        
-                        comparison_data = digit_data[other_digit]
-                        ratio_sheet_name = f"Ratio_{other_digit}_to_{min_digit}_Cuboid_{cuboids}"
-                        
-                        # Calculate ratios for each drug
-                        ratio_data = {}
-                        common_drugs = set(baseline_data.keys()) & set(comparison_data.keys())
-                        
-                        for drug in sorted(common_drugs):
-                            baseline_vals = baseline_data[drug]
-                            comparison_vals = comparison_data[drug]
-                            
-                            # Calculate ratios (comparison/baseline), handling division by zero
-                            ratios = []
-                            max_len = max(len(baseline_vals), len(comparison_vals))
-                            
-                            for i in range(max_len):
-                                baseline_val = baseline_vals[i] if i < len(baseline_vals) else 0.0
-                                comparison_val = comparison_vals[i] if i < len(comparison_vals) else 0.0
-                                
-                                if baseline_val != 0:
-                                    ratio = comparison_val / baseline_val
-                                else:
-                                    ratio = float('inf') if comparison_val != 0 else 1.0
-                                
-                                ratios.append(ratio)
-                            
-                            ratio_data[drug] = ratios
-                        
-                        if ratio_data:
-                            ratio_df = pd.DataFrame(ratio_data)
-                            ratio_df.to_excel(writer, sheet_name=ratio_sheet_name[:31], index=False)
-                
-                # 5. Create ratio sheets for drug-only data (if any)
-                if file_drug_data:
-                    digit_data_drugs = {}
-                    for (digit, _), drug_data in file_drug_data.items():
-                        digit_data_drugs[digit] = drug_data
-                    
-                    if len(digit_data_drugs) >= 2:
-                        min_digit = min(digit_data_drugs.keys())
-                        baseline_data = digit_data_drugs[min_digit]
-                        
-                        for other_digit in sorted(digit_data_drugs.keys()):
-                            if other_digit == min_digit:
-                                continue
-                            
-                            comparison_data = digit_data_drugs[other_digit]
-                            ratio_sheet_name = f"Ratio_{other_digit}_to_{min_digit}_Drugs"
-                            
-                            # Calculate ratios for each drug
-                            ratio_data = {}
-                            common_drugs = set(baseline_data.keys()) & set(comparison_data.keys())
-                            
-                            for drug in sorted(common_drugs):
-                                baseline_vals = baseline_data[drug]
-                                comparison_vals = comparison_data[drug]
-                                
-                                # Calculate ratios (comparison/baseline), handling division by zero
-                                ratios = []
-                                max_len = max(len(baseline_vals), len(comparison_vals))
-                                
-                                for i in range(max_len):
-                                    baseline_val = baseline_vals[i] if i < len(baseline_vals) else 0.0
-                                    comparison_val = comparison_vals[i] if i < len(comparison_vals) else 0.0
-                                    
-                                    if baseline_val != 0:
-                                        ratio = comparison_val / baseline_val
-                                    else:
-                                        ratio = float('inf') if comparison_val != 0 else 1.0
-                                    
-                                    ratios.append(ratio)
-                                
-                                ratio_data[drug] = ratios
-                            
-                            if ratio_data:
-                                ratio_df = pd.DataFrame(ratio_data)
-                                ratio_df.to_excel(writer, sheet_name=ratio_sheet_name[:31], index=False)
-            
+            with profiling.span('export', file=Path(file_path).name, plates=len(self.plates)):
+                engine.export_results(self.plates_by_sheet(), file_path, cache=self._results_cache, kinetics=self.kinetic_reads(),
+                                      fit_cache=self._fit_cache, qc_threshold=self.qc_threshold())
             QMessageBox.information(self, "Success", f"Results exported to {file_path} (including ratio sheets)")
         except Exception as e:
             import traceback
             QMessageBox.critical(self, "Error", f"Failed to export results: {str(e)}\n{traceback.format_exc()}")
     
-    def calculate_background_subtraction(self):
-        # Only allow background subtraction once per session
-        if hasattr(self, '_background_subtracted') and self._background_subtracted:
-            QMessageBox.warning(self, "Warning", "Background subtraction has already been applied.")
+    def export_columnar(self):
+        # Tidy results and ratio tables as datasets partitioned by day and cuboid count, for downstream pipelines
+        if not self.plates:
+            QMessageBox.warning(self, "Warning", "No data to export")
+            return
+        from PyQt6.QtWidgets import QInputDialog
+        file_format, ok = QInputDialog.getItem(self, "Export Format", "Format:", list(columnar.COLUMNAR_FORMATS), 0, False)
+        if not ok:
+            return
+        directory = QFileDialog.getExistingDirectory(self, "Export Directory")
+        if not directory:
             return
-        for sheet_name, file_widgets in self.table_widgets.items():
-            for file_name, table_widget in file_widgets.items():
-                background_values = [assignment['original_value']
-                                    for assignment in table_widget.cell_assignments.values()
-                                    if assignment['is_background'] and assignment['original_value'] is not None]
-                bg_avg = np.mean(background_values) if background_values else 0.0
-                for i in range(table_widget.rowCount()):
-                    for j in range(table_widget.columnCount()):
-                        item = table_widget.item(i, j)
-                        if item:
-                            try:
-                                orig_val = float(item.text())
-                                new_val = orig_val - bg_avg
-                                item.setText(f"{new_val:.4f}")
-                            except ValueError:
-                                pass
-        self._background_subtracted = True
+        try:
+            with profiling.span('export_columnar', format=file_format, plates=len(self.plates)):
+                engine.export_results(self.plates_by_sheet(), columnar_dir=directory, columnar_format=file_format,
+                                      cache=self._results_cache, kinetics=self.kinetic_reads(), fit_cache=self._fit_cache,
+                                      qc_threshold=self.qc_threshold())
+            QMessageBox.information(self, "Success", f"Results exported as {file_format} datasets to {directory}")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to export results: {str(e)}")
+    
+    def kinetic_reads(self):
+        """Kinetic reads of the loaded files if the kinetic metrics are to be exported, else None"""
+        if not self.kinetics_checkbox.isChecked():
+            return None
+        if self._kinetics is None:
+            # Opened from a session: the cycles come from the parse cache, or the workbooks are parsed once more
+            self._kinetics = engine.load_kinetics(self.excel_files, cache_dir=self.parse_cache_dir)
+        return self._kinetics
+    
+    def qc_threshold(self):
+        """Robust z threshold of the QC outliers if QC is on, else None"""
+        return self.qc_threshold_spin.value() if self.qc_checkbox.isChecked() else None
+    
+    def update_qc_display(self):
+        threshold = self.qc_threshold()
+        for file_widgets in self.table_widgets.values():
+            for table_widget in file_widgets.values():
+                table_widget.plate_model.qc_threshold = threshold
+                table_widget.plate_model.sync_all()
+    
+    def remove_qc_outliers(self):
+        # Propose every QC outlier of every loaded plate for removal, as one undoable command
+        threshold = self.qc_threshold_spin.value()
+        targets, lines = [], []
+        for (sheet_name, file_name), plate in self.plates.items():
+            rows, cols = qc.plate_qc(plate, threshold).outlier_cells()
+            if len(rows):
+                targets.append((plate, rows, cols))
+                lines.append(f"{sheet_name} ({file_name}): " + ", ".join(
+                    plate_layout.well_name(row, col) for row, col in zip(rows.tolist(), cols.tolist())))
+        if not targets:
+            QMessageBox.information(self, "QC", f"No wells with |robust z| > {threshold:g}")
+            return
+        n_wells = sum(len(rows) for _, rows, _ in targets)
+        shown = "\n".join(lines[:20]) + (f"\n... and {len(lines) - 20} more plates" if len(lines) > 20 else "")
+        reply = QMessageBox.question(self, "Remove QC Outliers",
+                                     f"Remove {n_wells} wells with |robust z| > {threshold:g} (set to NaN)?\n\n{shown}",
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        def edit():
+            for plate, rows, cols in targets:
+                plate.remove_cells(rows, cols)
+        self.history.record("Remove QC Outliers", targets, edit)
+        changes = {id(plate): (rows, cols) for plate, rows, cols in targets}
+        for file_widgets in self.table_widgets.values():
+            for table_widget in file_widgets.values():
+                if id(table_widget.plate) in changes:
+                    table_widget.plate_model.sync_region(*changes[id(table_widget.plate)])
+        self.refresh_overview_if_visible()
+    
+    def calculate_background_subtraction(self):
+        # Recompute corrected values from the raw values, so this can be re-run with other settings at any time
+        mode = self.background_mode_combo.currentData()
+        statistic = self.background_stat_combo.currentData()
+        with profiling.span('background', mode=mode, statistic=statistic, plates=len(self.plates),
+                            cells=sum(plate.values.size for plate in self.plates.values())):
+            # Undoable like the assignment edits, so undoing an earlier command never brings back an older correction
+            plates = list(self.plates.values())
+            def edit():
+                for plate in plates:
+                    background.subtract_background(plate, mode, statistic)
+            self.history.record("Subtract Background", [(plate, [], []) for plate in plates], edit)
+            self.refresh_table_values()
         QMessageBox.information(self, "Success", "Background subtraction applied to all sheets")
     
+    def clear_background_subtraction(self):
+        plates = list(self.plates.values())
+        def edit():
+            for plate in plates:
+                background.clear_background(plate)
+        self.history.record("Remove Background Subtraction", [(plate, [], []) for plate in plates], edit)
+        self.refresh_table_values()
+    
+    def toggle_corrected_values(self, checked):
+        for file_widgets in self.table_widgets.values():
+            for table_widget in file_widgets.values():
+                table_widget.plate_model.show_corrected = bool(checked)
+        self.refresh_table_values()
+    
+    def refresh_table_values(self):
+        for file_widgets in self.table_widgets.values():
+            for table_widget in file_widgets.values():
+                table_widget.plate_model.sync_all()
+        self.refresh_overview_if_visible()
+    
     def show_assignment_summary(self):
         # Collect assignments from all tables for the current sheet
         if not self.current_sheet or self.current_sheet not in self.table_widgets:
             QMessageBox.warning(self, "Warning", "No sheet selected or no assignments found")
             return
         
-        summary = []
-        for table_widget in self.table_widgets[self.current_sheet].values():
-            for (row, col), assignment in table_widget.cell_assignments.items():
-                if assignment:
-                    summary.append({
-                        'Row': row + 1,
-                        'Column': col + 1,
-                        'Drug': assignment['drug'],
-                        'Cuboids': assignment['cuboids'],
-                        'Background': assignment['is_background']
-                    })
+        summary = [table_widget.plate.assignment_table()
+                   for table_widget in self.table_widgets[self.current_sheet].values()]
+        summary = [table for table in summary if not table.empty]
         
         if not summary:
             QMessageBox.information(self, "Summary", "No assignments found for the selected sheet")
             return
         
-        # Convert to DataFrame for better display
-        summary_df = pd.DataFrame(summary)
+        summary_df = pd.concat(summary, ignore_index=True)
         self.show_summary_dialog(summary_df)
     
     def show_summary_dialog(self, summary_df):
@@ -1234,4 +1843,5 @@ def main():
     sys.exit(app.exec())
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Needed for the loader worker processes in a frozen .app
     main()
@@ -0,0 +1,60 @@
+"""Time 4PL dose-response fits: in-process against the process pool, and a refit with a warm cache after one edit.
+
+Usage:
+    python benchmarks/bench_doseresponse.py [groups] [concentrations] [replicates] [workers]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import numpy as np
+import pandas as pd
+
+from tecan import doseresponse
+
+
+def dosed_results(n_groups, n_concentrations, n_replicates, seed=0):
+    # Noisy 4PL responses of n_groups drugs over a half-log dilution series, like engine.dosed_results
+    rng = np.random.default_rng(seed)
+    concentrations = np.repeat(10.0 ** (np.arange(n_concentrations) / 2 - 3), n_replicates)
+    frames = []
+    for k in range(n_groups):
+        params = (0.1, rng.uniform(1, 3), rng.uniform(-2, 2), rng.choice([-1, 1]) * rng.uniform(0.6, 2.5))
+        responses = doseresponse.logistic(np.log10(concentrations), params) + rng.normal(0, 0.02, concentrations.size)
+        frames.append(pd.DataFrame({'Cuboids': 3, 'Day': 1 + k % 3, 'Drug': f"Drug{k // 3}",
+                                    'Concentration': concentrations, 'Value': responses}))
+    dosed = pd.concat(frames, ignore_index=True)
+    dosed['Day'] = dosed['Day'].astype('Int64')
+    return dosed
+
+
+def main():
+    n_groups, n_concentrations, n_replicates, workers = ([int(a) for a in sys.argv[1:5]]
+                                                         + [600, 12, 3, os.cpu_count() or 1][len(sys.argv[1:5]):])
+    dosed = dosed_results(n_groups, n_concentrations, n_replicates)
+
+    start = time.perf_counter()
+    serial = doseresponse.fit_curves(dosed, workers=1)
+    t_serial = time.perf_counter() - start
+    start = time.perf_counter()
+    cache = {}
+    pooled = doseresponse.fit_curves(dosed, workers=workers, cache=cache)
+    t_pool = time.perf_counter() - start
+    assert np.allclose(serial['EC50'], pooled['EC50'], equal_nan=True)
+
+    dosed.loc[0, 'Value'] += 0.01  # One edited well: only its group is refitted
+    start = time.perf_counter()
+    doseresponse.fit_curves(dosed, workers=workers, cache=cache)
+    t_cached = time.perf_counter() - start
+
+    print(f"{n_groups} groups of {n_concentrations} concentrations x {n_replicates} replicates, "
+          f"{serial['Converged'].mean():.0%} converged")
+    print(f"  fit, in-process      : {t_serial * 1000:8.1f} ms")
+    print(f"  fit, pool of {workers:<2}      : {t_pool * 1000:8.1f} ms ({t_serial / t_pool:.1f}x)")
+    print(f"  refit after one edit : {t_cached * 1000:8.1f} ms ({t_serial / t_cached:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
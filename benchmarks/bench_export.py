@@ -0,0 +1,69 @@
+"""Time the groupby export pipeline against the previous loop-based export, with and without the .xlsx writing.
+
+tests/test_export.py checks that both write the same sheets. Usage: python benchmarks/bench_export.py [n_files] [n_sheets] [rows] [cols]
+"""
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import pandas as pd
+
+from legacy_export import export_results_loop
+from synthetic import synthetic_plates
+from tecan import engine, xlsx
+
+
+class NullWriter:
+    # Stands in for pd.ExcelWriter and xlsx.StreamingWorkbook so only the aggregation is timed
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def write_frame(self, sheet_name, df):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+@contextlib.contextmanager
+def without_excel_io():
+    excel_writer, to_excel, streaming = pd.ExcelWriter, pd.DataFrame.to_excel, xlsx.StreamingWorkbook
+    pd.ExcelWriter, pd.DataFrame.to_excel, xlsx.StreamingWorkbook = NullWriter, lambda *args, **kwargs: None, NullWriter
+    try:
+        yield
+    finally:
+        pd.ExcelWriter, pd.DataFrame.to_excel, xlsx.StreamingWorkbook = excel_writer, to_excel, streaming
+
+
+def timed(func, plates, path):
+    start = time.perf_counter()
+    func(plates, path)
+    return time.perf_counter() - start
+
+
+def main():
+    n_files, n_sheets, n_rows, n_cols = [int(a) for a in sys.argv[1:5]] + [6, 20, 16, 24][len(sys.argv[1:5]):]
+    plates = synthetic_plates(n_files, n_sheets, n_rows, n_cols)
+    with tempfile.TemporaryDirectory() as tmp:
+        old_path, new_path = os.path.join(tmp, "loop.xlsx"), os.path.join(tmp, "groupby.xlsx")
+        t_old = timed(export_results_loop, plates, old_path)
+        t_new = timed(engine.export_results, plates, new_path)
+        with without_excel_io():
+            a_old = timed(export_results_loop, plates, old_path)
+            a_new = timed(engine.export_results, plates, new_path)
+    print(f"{n_files} files x {n_sheets} sheets of {n_rows}x{n_cols}")
+    print(f"                 aggregation   with .xlsx writing")
+    print(f"  loop export   : {a_old * 1000:8.1f} ms   {t_old * 1000:8.1f} ms")
+    print(f"  groupby export: {a_new * 1000:8.1f} ms   {t_new * 1000:8.1f} ms")
+    print(f"  speedup       : {a_old / a_new:8.1f}x    {t_old / t_new:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Memory and undo / redo time of the assignment history.
+
+Applies a layout covering every well to many plates as one command, then a
+run of small edits, and reports the bytes kept by the history and the time to
+undo and redo. Usage:
+    python benchmarks/bench_history.py [plates] [rows] [cols] [edits]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import numpy as np
+
+from tecan.history import History
+from tecan.plate import Plate
+
+
+def main():
+    n_plates, n_rows, n_cols, n_edits = [int(a) for a in sys.argv[1:5]] + [100, 32, 48, 1000][len(sys.argv[1:5]):]
+    rng = np.random.default_rng(0)
+    plates = [Plate(rng.uniform(0.05, 3.5, size=(n_rows, n_cols))) for _ in range(n_plates)]
+    rows, cols = np.indices((n_rows, n_cols)).reshape(2, -1)
+    drugs = np.array([f"Drug{k}" for k in range(12)], dtype=object)[rng.integers(12, size=rows.size)]
+    history = History()
+
+    def apply_layout():
+        for plate in plates:
+            plate.assign(rows, cols, drug=drugs, cuboids=1 + rows % 3, is_background=rows == 0)
+    start = time.perf_counter()
+    history.record("Apply Layout Template", [(plate, None, None) for plate in plates], apply_layout)
+    t_layout = time.perf_counter() - start
+    layout_bytes = history.nbytes
+
+    start = time.perf_counter()
+    for k in range(n_edits):
+        plate = plates[k % n_plates]
+        cells = rng.integers(n_rows * n_cols, size=8)
+        edit_rows, edit_cols = rows[cells], cols[cells]
+        history.record("Assign Drug", [(plate, edit_rows, edit_cols)],
+                       lambda: plate.assign(edit_rows, edit_cols, drug=f"Edit{k}"))
+    t_edits = (time.perf_counter() - start) / n_edits
+
+    start = time.perf_counter()
+    while history.undo():
+        pass
+    t_undo = time.perf_counter() - start
+    assert all(not plate.state.assigned.any() for plate in plates)
+    start = time.perf_counter()
+    while history.redo():
+        pass
+    t_redo = time.perf_counter() - start
+
+    n_cells = n_plates * n_rows * n_cols
+    print(f"{n_plates} plates of {n_rows}x{n_cols}: layout over {n_cells} wells, then {n_edits} edits of 8 cells")
+    print(f"  layout command : {layout_bytes / 1e6:7.2f} MB, recorded in {t_layout * 1000:.1f} ms")
+    print(f"  small edit     : {(history.nbytes - layout_bytes) / n_edits:7.0f} bytes, recorded in {t_edits * 1e6:.0f} us")
+    print(f"  undo everything: {t_undo * 1000:7.1f} ms")
+    print(f"  redo everything: {t_redo * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
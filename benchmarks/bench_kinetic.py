@@ -0,0 +1,62 @@
+"""Time the vectorized kinetic curve metrics against a per-well Python loop, and parsing a kinetic workbook.
+
+Usage:
+    python benchmarks/bench_kinetic.py [plates] [cycles] [rows] [cols]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import numpy as np
+
+from synthetic import kinetic_curves, write_kinetic_workbook
+from tecan import kinetic, loader
+
+
+def loop_metrics(values, times):
+    # One well at a time: polyfit slope, trapezoid AUC, max and interpolated time to half-maximum
+    n_rows, n_cols = values.shape[1:]
+    metrics = {name: np.full((n_rows, n_cols), np.nan) for name in kinetic.METRIC_COLUMNS}
+    for i in range(n_rows):
+        for j in range(n_cols):
+            y = values[:, i, j]
+            metrics['Slope'][i, j] = np.polyfit(times, y, 1)[0]
+            metrics['AUC'][i, j] = sum((y[k] + y[k + 1]) / 2 * (times[k + 1] - times[k]) for k in range(len(y) - 1))
+            metrics['Max'][i, j] = y.max()
+            threshold = (y.min() + y.max()) / 2
+            k = int(np.argmax(y >= threshold))
+            metrics['Time to Threshold'][i, j] = times[0] if k == 0 else np.interp(threshold, y[k - 1:k + 1], times[k - 1:k + 1])
+    return metrics
+
+
+def main():
+    n_plates, n_cycles, n_rows, n_cols = [int(a) for a in sys.argv[1:5]] + [20, 100, 16, 24][len(sys.argv[1:5]):]
+    curves = [kinetic_curves(n_cycles, n_rows, n_cols, seed) for seed in range(n_plates)]
+
+    start = time.perf_counter()
+    old = [loop_metrics(values, times) for times, values in curves]
+    t_loop = time.perf_counter() - start
+    start = time.perf_counter()
+    new = [kinetic.curve_metrics(values, times) for times, values in curves]
+    t_vector = time.perf_counter() - start
+    for a, b in zip(old, new):
+        for name in kinetic.METRIC_COLUMNS:
+            assert np.allclose(a[name], b[name], equal_nan=True), name
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_kinetic_workbook(os.path.join(tmp, "kinetic.xlsx"), 2, n_cycles, n_rows, n_cols)
+        start = time.perf_counter()
+        _, _, _, reads = loader.load_workbook(path)
+        t_parse = (time.perf_counter() - start) / len(reads)
+
+    print(f"{n_plates} plates of {n_rows}x{n_cols}, {n_cycles} cycles")
+    print(f"  metrics, per-well loop: {t_loop * 1000:8.1f} ms")
+    print(f"  metrics, vectorized   : {t_vector * 1000:8.1f} ms ({t_loop / t_vector:.0f}x)")
+    print(f"  parse one kinetic sheet: {t_parse * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Time to the first viewable sheet: eager load_workbook against listing sheets and parsing only the first one.
+
+Usage: python benchmarks/bench_lazy_load.py [n_sheets ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from synthetic import write_tecan_workbook
+from tecan import loader
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [10, 50, 200]
+    print("  sheets   eager load   list sheets   first sheet   lazy total")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_sheets in sizes:
+            path = write_tecan_workbook(os.path.join(tmp, f"synthetic_{n_sheets}.xlsx"), n_sheets=n_sheets)
+            t_eager, (_, sheets, _, _) = timed(loader.load_workbook, path)
+            t_list, names = timed(loader.list_sheets, path)
+            t_first, (_, _, first, _, _) = timed(loader.load_sheet, path, names[0])
+            assert first[0][1].equals(sheets[0][1])
+            print(f"  {n_sheets:6d}  {t_eager * 1000:9.1f} ms  {t_list * 1000:9.1f} ms  {t_first * 1000:9.1f} ms  {(t_list + t_first) * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Time one legend update after an assignment: rebuilding it from every table's colors against the shared palette.
+
+The previous legend merged the color dicts of all open tables into one HTML
+string on every assignment; the palette only adds a label for a new drug.
+Runs on the offscreen Qt platform. Usage:
+    python benchmarks/bench_legend.py [tables] [drugs] [updates]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from PyQt6.QtWidgets import QApplication, QLabel
+
+from TECAN_analysis_gui import DRUG_COLORS, ColorPalette, LegendWidget
+
+
+def legacy_legend(label, widget_colors):
+    # Previous update_legend: merge every table's colors and rebuild the whole HTML
+    drug_colors = {}
+    for colors in widget_colors:
+        for drug, color in colors.items():
+            drug_colors[drug] = color
+    legend_html = "<b>Background:</b> <span style='background-color: #c8c8ff; padding: 0 8px;'>&nbsp;</span>"
+    if drug_colors:
+        legend_html += "<br><b>Drugs:</b>"
+        for drug, color in sorted(drug_colors.items()):
+            rgb = color.getRgb()[:3]
+            legend_html += f"<br>&nbsp;&nbsp;<b>{drug}:</b> <span style='background-color: rgb{rgb}; padding: 0 8px;'>&nbsp;</span>"
+    label.setText(legend_html)
+
+
+def main():
+    n_tables, n_drugs, n_updates = [int(a) for a in sys.argv[1:4]] + [64, 200, 200][len(sys.argv[1:4]):]
+    app = QApplication(sys.argv)
+    names = [f"Drug{k:04d}" for k in range(n_drugs + n_updates)]
+    widget_colors = [{name: DRUG_COLORS[k % len(DRUG_COLORS)] for k, name in enumerate(names[:n_drugs])}
+                     for _ in range(n_tables)]
+    label = QLabel()
+    start = time.perf_counter()
+    for k, name in enumerate(names[n_drugs:]):
+        widget_colors[k % n_tables][name] = DRUG_COLORS[k % len(DRUG_COLORS)]
+        legacy_legend(label, widget_colors)
+        app.processEvents()
+    t_old = (time.perf_counter() - start) / n_updates
+
+    palette = ColorPalette()
+    legend = LegendWidget(palette)
+    for name in names[:n_drugs]:
+        palette.drug_color(name)
+    start = time.perf_counter()
+    for name in names[n_drugs:]:
+        palette.drug_color(name)
+        app.processEvents()
+    t_new = (time.perf_counter() - start) / n_updates
+    assert len(legend.sections['drug'][2]) == n_drugs + n_updates
+
+    print(f"{n_tables} tables, {n_drugs} drugs, then {n_updates} assignments of a new drug")
+    print(f"  rebuild from all tables: {t_old * 1000:7.3f} ms per update")
+    print(f"  shared palette         : {t_new * 1000:7.3f} ms per update")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Time building the plate overview heatmaps from arrays against setting QImage pixels well by well, and one full repaint.
+
+Runs on the offscreen Qt platform. Usage:
+    python benchmarks/bench_overview.py [plates] [rows] [cols]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import numpy as np
+from PyQt6.QtCore import QRect
+from PyQt6.QtGui import QColor, QImage
+from PyQt6.QtWidgets import QApplication
+
+from TECAN_analysis_gui import PlateOverview
+from tecan import heatmap
+
+
+def pixel_loop_image(values, vmin, vmax):
+    # One setPixelColor per well with the color looked up in Python
+    n_rows, n_cols = values.shape
+    image = QImage(n_cols, n_rows, QImage.Format.Format_ARGB32)
+    for i in range(n_rows):
+        for j in range(n_cols):
+            value = values[i, j]
+            if np.isnan(value):
+                image.setPixel(j, i, heatmap.MISSING_COLOR)
+                continue
+            k = min(max(int(round((value - vmin) / (vmax - vmin) * 255)), 0), 255)
+            image.setPixelColor(j, i, QColor.fromRgba(int(heatmap.COLORMAP[k])))
+    return image
+
+
+def array_image(values, vmin, vmax):
+    pixels = heatmap.heatmap_argb(values, vmin, vmax)
+    return QImage(pixels.data, pixels.shape[1], pixels.shape[0], pixels.strides[0], QImage.Format.Format_ARGB32).copy()
+
+
+def main():
+    n_plates, n_rows, n_cols = [int(a) for a in sys.argv[1:4]] + [300, 16, 24][len(sys.argv[1:4]):]
+    app = QApplication.instance() or QApplication(sys.argv)
+    rng = np.random.default_rng(0)
+    plates = [rng.uniform(0.05, 3.5, size=(n_rows, n_cols)) for _ in range(n_plates)]
+    vmin, vmax = heatmap.color_range(plates)
+
+    start = time.perf_counter()
+    old = [pixel_loop_image(values, vmin, vmax) for values in plates]
+    t_loop = time.perf_counter() - start
+    start = time.perf_counter()
+    new = [array_image(values, vmin, vmax) for values in plates]
+    t_array = time.perf_counter() - start
+    assert all(a == b for a, b in zip(old, new))
+
+    overview = PlateOverview()
+    overview.resize(1100, 800)
+    overview.set_tiles([((f"Plate_{k}", "bench.xlsx"), image) for k, image in enumerate(new)])
+    start = time.perf_counter()
+    overview.grab(QRect(0, 0, 1100, 800))  # What a scroll area shows at a time
+    t_screen = time.perf_counter() - start
+    start = time.perf_counter()
+    overview.grab()
+    t_all = time.perf_counter() - start
+
+    print(f"{n_plates} plates of {n_rows}x{n_cols}")
+    print(f"  images, per-well setPixelColor: {t_loop * 1000:8.1f} ms")
+    print(f"  images, vectorized colormap   : {t_array * 1000:8.1f} ms ({t_loop / t_array:.0f}x)")
+    print(f"  paint one 1100x800 screen     : {t_screen * 1000:8.1f} ms")
+    print(f"  paint every tile              : {t_all * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Time parsing a workbook against loading it from the parse cache (cold store and warm hit).
+
+Usage: python benchmarks/bench_parse_cache.py [n_sheets] [repeats]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import numpy as np
+
+from synthetic import write_tecan_workbook
+from tecan import cache, loader
+from tecan.plate import Plate
+
+
+def best_of(func, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    n_sheets = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_tecan_workbook(os.path.join(tmp, "synthetic.xlsx"), n_sheets=n_sheets)
+        cache_dir = os.path.join(tmp, "cache")
+        parsed = loader.load_workbook(path)
+        start = time.perf_counter()
+        cache.load_workbook(path, cache_dir)
+        t_store = time.perf_counter() - start
+        cached = cache.load_workbook(path, cache_dir)
+        for (name, df), (cached_name, cached_df) in zip(parsed[1], cached[1]):
+            a, b = Plate.from_dataframe(df), Plate.from_dataframe(cached_df)
+            assert name == cached_name and df.equals(cached_df)
+            assert np.array_equal(a.raw_values, b.raw_values, equal_nan=True) and a.col_labels == b.col_labels
+        t_parse = best_of(lambda: loader.load_workbook(path), repeats)
+        t_hit = best_of(lambda: cache.load_workbook(path, cache_dir), repeats)
+        size = cache.cache_size(cache_dir)
+    print(f"{n_sheets} sheets, best of {repeats}, {size / 1e3:.0f} kB cached")
+    print(f"  parse workbook     : {t_parse * 1000:8.1f} ms")
+    print(f"  parse + cache store: {t_store * 1000:8.1f} ms")
+    print(f"  cache hit          : {t_hit * 1000:8.1f} ms")
+    print(f"  speedup            : {t_parse / t_hit:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
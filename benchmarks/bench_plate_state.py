@@ -0,0 +1,89 @@
+"""Memory and bulk-query time of the array-backed PlateState against the previous dict-of-dicts assignments.
+
+Every well of the plate is assigned. Usage:
+    python benchmarks/bench_plate_state.py [rows] [cols]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import numpy as np
+
+from tecan import background
+from tecan.plate import Plate
+
+
+def legacy_assignments(plate, drugs, cuboids, is_background, removed):
+    # Previous structures: one dict per assigned cell plus a set of removed cells
+    cell_assignments, removed_cells = {}, set()
+    n_rows, n_cols = plate.shape
+    for row in range(n_rows):
+        for col in range(n_cols):
+            cell_assignments[(row, col)] = {'drug': drugs[row, col], 'cuboids': int(cuboids[row, col]) or None,
+                                            'is_background': bool(is_background[row, col]),
+                                            'original_value': float(plate.raw_values[row, col])}
+            if removed[row, col]:
+                removed_cells.add((row, col))
+    return cell_assignments, removed_cells
+
+
+def legacy_background_mask(plate, cell_assignments, removed_cells):
+    mask = np.zeros(plate.shape, dtype=bool)
+    cells = [cell for cell, assignment in cell_assignments.items()
+             if assignment.get('is_background') and plate.in_bounds(*cell) and cell not in removed_cells]
+    if cells:
+        rows, cols = zip(*cells)
+        mask[list(rows), list(cols)] = True
+    return mask
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size, elapsed
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    n_cols = int(sys.argv[2]) if len(sys.argv) > 2 else 48
+    rng = np.random.default_rng(0)
+    drugs = np.array([f"Drug{k}" for k in range(12)] + [None], dtype=object)[rng.integers(13, size=(n_rows, n_cols))]
+    cuboids = rng.integers(4, size=(n_rows, n_cols))
+    is_background = rng.random((n_rows, n_cols)) < 0.1
+    removed = rng.random((n_rows, n_cols)) < 0.05
+    plate = Plate(rng.uniform(0.05, 3.5, size=(n_rows, n_cols)))
+
+    (legacy, legacy_removed), legacy_bytes, legacy_build = measure(
+        lambda: legacy_assignments(plate, drugs, cuboids, is_background, removed))
+    rows, cols = np.indices(plate.shape).reshape(2, -1)
+
+    def build():
+        plate.assign(rows, cols, drug=drugs.ravel(), cuboids=cuboids.ravel(), is_background=is_background.ravel())
+        plate.remove_cells(rows[removed.ravel()], cols[removed.ravel()])
+        return plate.state
+    state, _, state_build = measure(build)
+
+    start = time.perf_counter()
+    old_mask = legacy_background_mask(plate, legacy, legacy_removed)
+    t_old = time.perf_counter() - start
+    start = time.perf_counter()
+    new_mask = background.background_mask(plate)
+    t_new = time.perf_counter() - start
+    assert (old_mask == new_mask).all()
+    assert plate.assignments() == legacy
+
+    print(f"{n_rows}x{n_cols} plate, every well assigned")
+    print(f"                 {'memory':>10}  {'build':>9}  {'background mask':>15}")
+    print(f"  dict of dicts: {legacy_bytes / 1024:7.1f} kB  {legacy_build * 1000:6.2f} ms  {t_old * 1000:12.3f} ms")
+    print(f"  PlateState   : {state.nbytes / 1024:7.1f} kB  {state_build * 1000:6.2f} ms  {t_new * 1000:12.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Time the cost of a profiling span with recording off and on, and of an instrumented assignment.
+
+Runs on the offscreen Qt platform. Usage:
+    python benchmarks/bench_profiling.py [spans] [assignments]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import numpy as np
+from PyQt6.QtWidgets import QApplication
+
+from TECAN_analysis_gui import PlateTableModel, SelectableTableWidget
+from tecan import profiling
+from tecan.plate import Plate
+
+
+def time_spans(n):
+    # Nanoseconds per empty instrumented block
+    start = time.perf_counter_ns()
+    for _ in range(n):
+        with profiling.span('bench', cells=1):
+            pass
+    return (time.perf_counter_ns() - start) / n
+
+
+def time_assignments(widget, n):
+    # Microseconds per assignment of 8 wells through the shared edit path
+    cells = [(row, 3) for row in range(8)]
+    start = time.perf_counter_ns()
+    for k in range(n):
+        widget.assign_cells(cells, f"Drug{k % 10}", 1 + k % 3, False)
+    return (time.perf_counter_ns() - start) / n / 1e3
+
+
+def main():
+    n_spans, n_assign = [int(a) for a in sys.argv[1:3]] + [1_000_000, 2_000][len(sys.argv[1:3]):]
+    app = QApplication.instance() or QApplication(sys.argv)
+    widget = SelectableTableWidget()
+    widget.set_plate_model(PlateTableModel(Plate(np.random.default_rng(0).uniform(size=(16, 24)))))
+
+    start = time.perf_counter_ns()
+    for _ in range(n_spans):
+        pass
+    t_loop = (time.perf_counter_ns() - start) / n_spans
+    profiling.PROFILER.enabled = False
+    t_off = time_spans(n_spans)
+    a_off = time_assignments(widget, n_assign)
+    profiling.PROFILER.enabled = True
+    t_on = time_spans(n_spans)
+    a_on = time_assignments(widget, n_assign)
+
+    print(f"{n_spans} spans, {n_assign} assignments of 8 wells on a 16x24 plate")
+    print(f"  empty loop            : {t_loop:7.0f} ns per iteration")
+    print(f"  span, recording off   : {t_off - t_loop:7.0f} ns per span")
+    print(f"  span, recording on    : {t_on - t_loop:7.0f} ns per span")
+    print(f"  assignment, off / on  : {a_off:7.1f} / {a_on:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
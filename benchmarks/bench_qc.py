@@ -0,0 +1,60 @@
+"""Time the vectorized per-plate QC against a pandas groupby per replicate group.
+
+Usage:
+    python benchmarks/bench_qc.py [plates] [rows] [cols] [drugs]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import numpy as np
+import pandas as pd
+
+from tecan import qc
+from tecan.plate import Plate
+
+
+def groupby_robust_z(plate):
+    # Robust z of every drug well with one groupby over a DataFrame of the assigned wells
+    state = plate.state
+    rows, cols = np.nonzero(state.assigned & ~state.removed & ~state.background)
+    df = pd.DataFrame({'drug': state.drug_ids[rows, cols], 'cuboids': state.cuboids[rows, cols],
+                       'value': plate.values[rows, cols]})
+    grouped = df.groupby(['drug', 'cuboids'])['value']
+    median = grouped.transform('median')
+    mad = (df['value'] - median).abs().groupby([df['drug'], df['cuboids']]).transform('median')
+    robust_z = np.full(plate.shape, np.nan)
+    robust_z[rows, cols] = (df['value'] - median) / (qc.MAD_SCALE * mad)
+    return robust_z
+
+
+def main():
+    n_plates, n_rows, n_cols, n_drugs = [int(a) for a in sys.argv[1:5]] + [50, 32, 48, 40][len(sys.argv[1:5]):]
+    rng = np.random.default_rng(0)
+    rows, cols = np.indices((n_rows, n_cols)).reshape(2, -1)
+    plates = []
+    for _ in range(n_plates):
+        plate = Plate(rng.normal(1.0, 0.05, size=(n_rows, n_cols)))
+        plate.assign(rows, cols, drug=np.array([f"Drug{k}" for k in range(n_drugs)], dtype=object)[(rows * n_cols + cols) % n_drugs],
+                     cuboids=1 + cols % 2, is_background=rows == 0)
+        plates.append(plate)
+
+    start = time.perf_counter()
+    old = [groupby_robust_z(plate) for plate in plates]
+    t_groupby = (time.perf_counter() - start) / n_plates
+    start = time.perf_counter()
+    new = [qc.plate_qc(plate) for plate in plates]
+    t_qc = (time.perf_counter() - start) / n_plates
+    for plate, a, b in zip(plates, old, new):
+        drug_wells = ~plate.state.background
+        assert np.allclose(a[drug_wells], b.robust_z[drug_wells], equal_nan=True)
+
+    print(f"{n_plates} plates of {n_rows}x{n_cols}, {n_drugs} drugs x 2 cuboid counts per plate")
+    print(f"  robust z, pandas groupby        : {t_groupby * 1000:6.2f} ms per plate")
+    print(f"  plate_qc (z, Z', edge effects)  : {t_qc * 1000:6.2f} ms per plate ({t_groupby / t_qc:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
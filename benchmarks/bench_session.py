@@ -0,0 +1,60 @@
+"""Time reopening a saved session against parsing its workbooks again.
+
+Writes synthetic workbooks, parses them without the parse cache, assigns
+every well, saves the session and reloads it. Usage:
+    python benchmarks/bench_session.py [files] [sheets] [rows] [cols]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import numpy as np
+
+from synthetic import write_tecan_workbook
+from tecan import engine, session
+from tecan.plate import Plate
+
+
+def main():
+    n_files, n_sheets, n_rows, n_cols = [int(a) for a in sys.argv[1:5]] + [6, 20, 16, 24][len(sys.argv[1:5]):]
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [write_tecan_workbook(os.path.join(tmp, f"exp_day{k + 1}.xlsx"), n_sheets, n_rows, n_cols, seed=k)
+                 for k in range(n_files)]
+        start = time.perf_counter()
+        sheet_data = engine.load_workbooks(paths, use_cache=False)
+        plates = {key: Plate.from_dataframe(df) for key, df in sheet_data.items()}
+        t_parse = time.perf_counter() - start
+
+        rng = np.random.default_rng(0)
+        for plate in plates.values():
+            rows, cols = np.indices(plate.shape).reshape(2, -1)
+            drugs = np.array([f"Drug{k}" for k in range(12)], dtype=object)[rng.integers(12, size=rows.size)]
+            plate.assign(rows, cols, drug=drugs, cuboids=1 + rows % 3, is_background=rows == 0)
+            engine.subtract_background(plate)
+
+        session_path = os.path.join(tmp, "session.npz")
+        start = time.perf_counter()
+        session.save_session(session_path, paths, plates)
+        t_save = time.perf_counter() - start
+        start = time.perf_counter()
+        restored = session.load_session(session_path)
+        t_load = time.perf_counter() - start
+        start = time.perf_counter()
+        changed = session.changed_files(restored['files'])
+        t_check = time.perf_counter() - start
+        assert not changed
+        assert all(restored['plates'][key].assignments() == plate.assignments() for key, plate in plates.items())
+
+        size = os.path.getsize(session_path)
+        print(f"{n_files} files x {n_sheets} sheets of {n_rows}x{n_cols}, every well assigned")
+        print(f"  parse workbooks: {t_parse * 1000:8.1f} ms")
+        print(f"  save session   : {t_save * 1000:8.1f} ms, {size / 1e3:.0f} kB")
+        print(f"  open session   : {t_load * 1000:8.1f} ms ({t_parse / t_load:.0f}x faster than parsing)")
+        print(f"  changed files  : {t_check * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Time switching between sheets in the GUI with cached table views against rebuilding them on every click.
+
+Runs on the offscreen Qt platform with synthetic plates. Usage:
+    python benchmarks/bench_sheet_switch.py [files] [sheets] [switches]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from PyQt6.QtWidgets import QApplication
+
+import TECAN_analysis_gui
+from synthetic import synthetic_plates
+
+
+def time_switches(window, sheet_names, switches):
+    app = QApplication.instance()
+    for sheet_name in sheet_names:  # Visit every sheet once so the cache is warm
+        window.display_sheet_data(sheet_name)
+        app.processEvents()
+    setup = total = 0.0
+    for k in range(switches):
+        start = time.perf_counter()
+        window.display_sheet_data(sheet_names[k % len(sheet_names)])
+        shown = time.perf_counter()
+        app.processEvents()  # Paint the new tabs
+        setup += shown - start
+        total += time.perf_counter() - start
+    return setup / switches, total / switches
+
+
+def main():
+    n_files = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    n_sheets = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    switches = int(sys.argv[3]) if len(sys.argv) > 3 else 40
+    app = QApplication(sys.argv)
+    window = TECAN_analysis_gui.ExcelAnalyzerGUI()
+    window.show()
+    plates = synthetic_plates(n_files, n_sheets, 16, 24)
+    window.plates = {(sheet_name, file_name): plate for sheet_name, file_plates in plates.items()
+                     for file_name, plate in file_plates.items()}
+    window.sheet_data = dict.fromkeys(window.plates)  # Only the keys matter once the plates exist
+    sheet_names = list(plates)
+
+    TECAN_analysis_gui.MAX_CACHED_VIEWS = 0  # Every view not on screen is dropped: the previous rebuild-per-click
+    rebuild = time_switches(window, sheet_names, switches)
+    window.clear_table_views()
+    TECAN_analysis_gui.MAX_CACHED_VIEWS = n_files * n_sheets
+    reuse = time_switches(window, sheet_names, switches)
+    print(f"{n_sheets} sheets x {n_files} files of 16x24, {switches} sheet switches")
+    print(f"                 {'setup':>8}  {'+ paint':>8} (ms/switch)")
+    print(f"  rebuild views: {rebuild[0] * 1000:8.2f}  {rebuild[1] * 1000:8.2f}")
+    print(f"  cached views : {reuse[0] * 1000:8.2f}  {reuse[1] * 1000:8.2f}")
+    print(f"  speedup      : {rebuild[0] / reuse[0]:7.1f}x  {rebuild[1] / reuse[1]:7.1f}x")
+    window.close()
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Time full repaints of a plate table with the border delegate against the old paintEvent loop.
+
+Runs on the offscreen Qt platform. Usage:
+    python benchmarks/bench_table_paint.py [rows] [cols] [repaints]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import numpy as np
+from PyQt6.QtGui import QColor, QPainter, QPen
+from PyQt6.QtWidgets import QApplication, QStyledItemDelegate
+
+from TECAN_analysis_gui import CUBOID_BORDER_ROLE, PlateTableModel, SelectableTableWidget
+from tecan.plate import Plate
+
+
+class FullGridPaintTable(SelectableTableWidget):
+    # Previous behaviour: plain delegate plus a paintEvent that visits every cell of the plate
+    def __init__(self):
+        super().__init__()
+        self.setItemDelegate(QStyledItemDelegate(self))
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        painter = QPainter(self.viewport())
+        selection_model = self.selectionModel()
+        for i in range(self.rowCount()):
+            for j in range(self.columnCount()):
+                index = self.plate_model.index(i, j)
+                if not self.plate.has_value(i, j):
+                    continue
+                rect = self.visualRect(index)
+                selected = selection_model.isSelected(index)
+                cuboid_color_name = self.plate_model.data(index, CUBOID_BORDER_ROLE)
+                if cuboid_color_name and not selected:
+                    painter.setPen(QPen(QColor(cuboid_color_name), 3))
+                    painter.drawRect(rect.adjusted(1, 1, -2, -2))
+                if selected:
+                    painter.setPen(QPen(QColor(0, 120, 215), 3))
+                    painter.drawRect(rect.adjusted(0, 0, -1, -1))
+        painter.end()
+
+
+def build_table(cls, n_rows, n_cols):
+    table = cls()
+    values = np.random.default_rng(0).uniform(0.05, 3.5, size=(n_rows, n_cols))
+    table.set_plate_model(PlateTableModel(Plate(values)))
+    rows, cols = np.indices((n_rows, n_cols)).reshape(2, -1)
+    table.plate.assign(rows, cols, cuboids=1 + (rows + cols) % 4)
+    table.register_colors()
+    table.plate_model.sync_all()
+    table.resize(1000, 700)
+    table.show()
+    return table
+
+
+def time_repaints(table, repaints):
+    app = QApplication.instance()
+    app.processEvents()
+    start = time.perf_counter()
+    for k in range(repaints):
+        table.verticalScrollBar().setValue(k % (table.verticalScrollBar().maximum() + 1))
+        table.viewport().repaint()
+    return (time.perf_counter() - start) / repaints
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    n_cols = int(sys.argv[2]) if len(sys.argv) > 2 else 48
+    repaints = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    app = QApplication(sys.argv)
+    old = time_repaints(build_table(FullGridPaintTable, n_rows, n_cols), repaints)
+    new = time_repaints(build_table(SelectableTableWidget, n_rows, n_cols), repaints)
+    print(f"{n_rows}x{n_cols} plate, {repaints} repaints")
+    print(f"  full-grid paintEvent: {old * 1000:8.2f} ms/repaint")
+    print(f"  border delegate     : {new * 1000:8.2f} ms/repaint")
+    print(f"  speedup             : {old / new:8.1f}x")
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
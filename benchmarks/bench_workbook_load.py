@@ -0,0 +1,64 @@
+"""Compare per-sheet pd.read_excel calls against a single pd.ExcelFile pass.
+
+Usage: python benchmarks/bench_workbook_load.py [n_sheets] [repeats]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from synthetic import write_tecan_workbook
+
+
+def load_per_sheet(path):
+    # Previous load_data behaviour: list sheets, then re-open the file for every sheet
+    excel_file = pd.ExcelFile(path)
+    sheets = {}
+    for sheet_name in excel_file.sheet_names:
+        if sheet_name == "Sheet1":
+            continue
+        sheets[sheet_name] = pd.read_excel(path, sheet_name=sheet_name, header=None)
+    return sheets
+
+
+def load_single_pass(path):
+    # Current load_data behaviour: parse every sheet from one open handle
+    sheets = {}
+    with pd.ExcelFile(path) as excel_file:
+        for sheet_name in excel_file.sheet_names:
+            if sheet_name == "Sheet1":
+                continue
+            sheets[sheet_name] = excel_file.parse(sheet_name, header=None)
+    return sheets
+
+
+def best_of(func, path, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(path)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    n_sheets = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_tecan_workbook(os.path.join(tmp, "synthetic.xlsx"), n_sheets=n_sheets)
+        old = load_per_sheet(path)
+        new = load_single_pass(path)
+        assert old.keys() == new.keys()
+        assert all(old[name].equals(new[name]) for name in old)
+        t_old = best_of(load_per_sheet, path, repeats)
+        t_new = best_of(load_single_pass, path, repeats)
+    print(f"{n_sheets} sheets, best of {repeats}")
+    print(f"  per-sheet read_excel : {t_old * 1000:8.1f} ms")
+    print(f"  single ExcelFile pass: {t_new * 1000:8.1f} ms")
+    print(f"  speedup              : {t_old / t_new:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Compare peak memory and wall time of pd.ExcelWriter(openpyxl) against the streaming write-only workbook.
+
+Each writer runs in a fresh process on the sheets export_results produces for
+a synthetic study; peak RSS is reported on top of the memory the study itself
+needs. Usage:
+    python benchmarks/bench_xlsx_write.py [n_files] [n_sheets] [rows] [cols]
+"""
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from queue import Empty
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import pandas as pd
+
+from synthetic import synthetic_plates
+from tecan import engine, xlsx
+
+
+class FrameRecorder:
+    # Collects the (sheet_name, df) pairs export_results would write
+    frames = []
+
+    def __init__(self, file_path):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def write_frame(self, sheet_name, df):
+        FrameRecorder.frames.append((sheet_name, df))
+
+
+def result_frames(size):
+    streaming, xlsx.StreamingWorkbook = xlsx.StreamingWorkbook, FrameRecorder
+    try:
+        engine.export_results(synthetic_plates(*size), "recorded.xlsx")
+    finally:
+        xlsx.StreamingWorkbook = streaming
+    return FrameRecorder.frames
+
+
+def write_excelwriter(frames, path):
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        for sheet_name, df in frames:
+            df.to_excel(writer, sheet_name=str(sheet_name)[:31], index=False)
+
+
+def write_streaming(frames, path):
+    with xlsx.StreamingWorkbook(path) as workbook:
+        for sheet_name, df in frames:
+            workbook.write_frame(sheet_name, df)
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # ru_maxrss is in KiB on Linux
+
+
+def run(writer_name, size, path, queue):
+    frames = result_frames(size)
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    globals()[writer_name](frames, path)
+    elapsed = time.perf_counter() - start
+    queue.put((sum(len(df) for _, df in frames), len(frames), elapsed, peak_rss_mb() - baseline, os.path.getsize(path)))
+
+
+def measure(writer_name, size, path):
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=run, args=(writer_name, size, path, queue))
+    process.start()
+    while True:
+        try:
+            result = queue.get(timeout=1)
+            break
+        except Empty:
+            # The child prints its traceback; stop waiting once it is gone without a result
+            if not process.is_alive() and queue.empty():
+                raise RuntimeError(f"{writer_name} failed in its process (exit code {process.exitcode})")
+    process.join()
+    return result
+
+
+def main():
+    size = [int(a) for a in sys.argv[1:5]] + [8, 25, 16, 24][len(sys.argv[1:5]):]
+    with tempfile.TemporaryDirectory() as tmp:
+        old = measure("write_excelwriter", size, os.path.join(tmp, "excelwriter.xlsx"))
+        new = measure("write_streaming", size, os.path.join(tmp, "streaming.xlsx"))
+        a = pd.read_excel(os.path.join(tmp, "excelwriter.xlsx"), sheet_name=None)
+        b = pd.read_excel(os.path.join(tmp, "streaming.xlsx"), sheet_name=None)
+    assert list(a) == list(b) and all(a[name].equals(b[name]) for name in a)
+    print(f"{size[0]} files x {size[1]} sheets of {size[2]}x{size[3]}: {old[1]} sheets, {old[0]} rows")
+    print(f"                        wall time   extra peak RSS   file size")
+    for label, (_, _, elapsed, rss, file_size) in (("pd.ExcelWriter", old), ("StreamingWorkbook", new)):
+        print(f"  {label:<18}: {elapsed:8.2f} s   {rss:10.1f} MB   {file_size / 1e6:7.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
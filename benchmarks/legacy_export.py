@@ -0,0 +1,264 @@
+"""The loop-based export_results that the groupby pipeline replaced, kept as a reference for tests and benchmarks.
+
+Its ratio sheets pad missing wells with 0.0 and give inf or 1.0 for zero
+baselines, where the current export leaves NaN.
+"""
+from pathlib import Path
+
+import pandas as pd
+
+
+def export_results_loop(plates, file_path):
+    # export_results before the groupby pipeline, kept verbatim as the reference output
+    with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
+        # 1. Main sheets: one per original sheet name (excluding background and NaN)
+        all_file_cuboid = {}
+        all_file_drug = {}
+        all_file_drug_by_digit = {}
+        file_cuboid_data = {}  # Fix: ensure this is defined for ratio calculations
+
+        for sheet_name, file_plates in plates.items():
+            all_data = []
+            for file_name, plate in file_plates.items():
+                for (row, col), assignment in plate.assignments().items():
+                    if assignment.get('is_background'):
+                        continue
+                    value = plate.cell_text(row, col) if plate.in_bounds(row, col) else None
+                    if isinstance(value, str) and (value.startswith('\u25CF ') or value.startswith('● ')):
+                        value = value[2:]
+                    if value is None or str(value).strip().lower() == 'nan' or str(value).strip() == '':
+                        continue
+                    cuboids = assignment.get('cuboids')
+                    if cuboids is None:
+                        cuboids = 0
+                    drug = assignment.get('drug')
+                    gui_row = plate.row_label(row)
+                    gui_col = plate.col_label(col)
+                    all_data.append({
+                        'File': file_name,
+                        'Sheet': sheet_name,
+                        'Row': gui_row,
+                        'Column': gui_col,
+                        'Drug': drug,
+                        'Cuboids': cuboids,
+                        'Value': value
+                    })
+                    # --- Drug sheet grouping by file last digit and cuboid ---
+                    file_stem = Path(file_name).stem
+                    last_digit = None
+                    for char in reversed(file_stem):
+                        if char.isdigit():
+                            last_digit = int(char)
+                            break
+                    # Group by (last_digit, cuboids)
+                    if last_digit is not None and drug:
+                        key = (last_digit, cuboids)
+                        if key not in all_file_drug_by_digit:
+                            all_file_drug_by_digit[key] = []
+                        all_file_drug_by_digit[key].append({
+                            'Drug': drug,
+                            'Value': value,
+                            'Row': gui_row,
+                            'Column': gui_col
+                        })
+                    # For file-cuboid sheets (legacy, for ratio)
+                    if file_name and drug:
+                        key = (file_name, cuboids)
+                        if key not in all_file_cuboid:
+                            all_file_cuboid[key] = []
+                        all_file_cuboid[key].append({
+                            'Drug': drug,
+                            'Value': value,
+                            'Row': gui_row,
+                            'Column': gui_col
+                        })
+            # Write main sheet after all_data is collected
+            if all_data:
+                df = pd.DataFrame(all_data)
+                df.to_excel(writer, sheet_name=sheet_name[:31], index=False)
+        # --- Build file_cuboid_data for ratios as before ---
+        for (file_name, cuboids), records in all_file_cuboid.items():
+            file_stem = Path(file_name).stem
+            last_digit = None
+            for char in reversed(file_stem):
+                if char.isdigit():
+                    last_digit = int(char)
+                    break
+            if last_digit is not None:
+                key = (last_digit, cuboids)
+                # Build drug_values for this (last_digit, cuboids)
+                df_fc = pd.DataFrame(records)
+                drugs = sorted(df_fc['Drug'].dropna().unique())
+                drug_values = {}
+                for drug in drugs:
+                    vals = [v[2:] if isinstance(v, str) and (v.startswith('\u25CF ') or v.startswith('● ')) else v for v in df_fc[df_fc['Drug'] == drug]['Value'].tolist()]
+                    float_vals = []
+                    for val in vals:
+                        try:
+                            float_vals.append(float(val))
+                        except (ValueError, TypeError):
+                            float_vals.append(0.0)
+                    drug_values[drug] = float_vals
+                file_cuboid_data[key] = drug_values
+        # --- Drug sheets by last digit and cuboid (unique for each day/cuboid combo) ---
+        for (last_digit, cuboids), records in all_file_drug_by_digit.items():
+            sheet_label = f"Drugs_{last_digit}_Cuboid_{cuboids}"
+            df_drug = pd.DataFrame(records)
+            drugs = sorted(df_drug['Drug'].dropna().unique())
+            drug_values = {}
+            for drug in drugs:
+                vals = [v[2:] if isinstance(v, str) and (v.startswith('\u25CF ') or v.startswith('● ')) else v for v in df_drug[df_drug['Drug'] == drug]['Value'].tolist()]
+                float_vals = []
+                for val in vals:
+                    try:
+                        float_vals.append(float(val))
+                    except (ValueError, TypeError):
+                        float_vals.append(0.0)
+                drug_values[drug] = float_vals
+            max_len = max((len(vals) for vals in drug_values.values()), default=0)
+            for drug in drug_values:
+                drug_values[drug] += [0.0] * (max_len - len(drug_values[drug]))
+            export_df = pd.DataFrame(drug_values)
+            export_df.to_excel(writer, sheet_name=sheet_label[:31], index=False)
+
+        # 3. Drug-only files (for files without cuboids or as additional sheets)
+        file_drug_data = {}  # Store data for ratio calculations without cuboids
+
+        for file_name, records in all_file_drug.items():
+            # Check if this file already has cuboid sheets
+            has_cuboid_sheets = any(fn == file_name for (fn, _) in all_file_cuboid.keys())
+
+            if not has_cuboid_sheets:  # Only create drug-only sheet if no cuboid sheets exist
+                sheet_label = f"File_{Path(file_name).stem}_Drugs"
+                df_fd = pd.DataFrame(records)
+
+                drugs = sorted(df_fd['Drug'].dropna().unique())
+                drug_values = {}
+
+                for drug in drugs:
+                    vals = [v[2:] if isinstance(v, str) and (v.startswith('\u25CF ') or v.startswith('● ')) else v for v in df_fd[df_fd['Drug'] == drug]['Value'].tolist()]
+                    # Convert to float for calculations
+                    float_vals = []
+                    for val in vals:
+                        try:
+                            float_vals.append(float(val))
+                        except (ValueError, TypeError):
+                            float_vals.append(0.0)
+                    drug_values[drug] = float_vals
+
+                max_len = max((len(vals) for vals in drug_values.values()), default=0)
+                for drug in drug_values:
+                    drug_values[drug] += [0.0] * (max_len - len(drug_values[drug]))
+
+                export_df = pd.DataFrame(drug_values)
+                export_df.to_excel(writer, sheet_name=sheet_label[:31], index=False)
+
+                # Store for ratio calculations (cuboid = None or 0)
+                file_stem = Path(file_name).stem
+                last_digit = None
+                for char in reversed(file_stem):
+                    if char.isdigit():
+                        last_digit = int(char)
+                        break
+
+                if last_digit is not None:
+                    key = (last_digit, 0)  # Use 0 for no cuboids
+                    if key not in file_drug_data:
+                        file_drug_data[key] = {}
+                    file_drug_data[key].update(drug_values)
+
+        # 4. Create ratio sheets for cuboid data
+        cuboid_groups = {}
+        for (digit, cuboids), drug_data in file_cuboid_data.items():
+            if cuboids not in cuboid_groups:
+                cuboid_groups[cuboids] = {}
+            cuboid_groups[cuboids][digit] = drug_data
+
+        for cuboids, digit_data in cuboid_groups.items():
+            if len(digit_data) < 2:
+                continue  # Need at least 2 files to create ratios
+
+            min_digit = min(digit_data.keys())
+            baseline_data = digit_data[min_digit]
+
+            for other_digit in sorted(digit_data.keys()):
+                if other_digit == min_digit:
+                    continue
+
+                comparison_data = digit_data[other_digit]
+                ratio_sheet_name = f"Ratio_{other_digit}_to_{min_digit}_Cuboid_{cuboids}"
+
+                # Calculate ratios for each drug
+                ratio_data = {}
+                common_drugs = set(baseline_data.keys()) & set(comparison_data.keys())
+
+                for drug in sorted(common_drugs):
+                    baseline_vals = baseline_data[drug]
+                    comparison_vals = comparison_data[drug]
+
+                    # Calculate ratios (comparison/baseline), handling division by zero
+                    ratios = []
+                    max_len = max(len(baseline_vals), len(comparison_vals))
+
+                    for i in range(max_len):
+                        baseline_val = baseline_vals[i] if i < len(baseline_vals) else 0.0
+                        comparison_val = comparison_vals[i] if i < len(comparison_vals) else 0.0
+
+                        if baseline_val != 0:
+                            ratio = comparison_val / baseline_val
+                        else:
+                            ratio = float('inf') if comparison_val != 0 else 1.0
+
+                        ratios.append(ratio)
+
+                    ratio_data[drug] = ratios
+
+                if ratio_data:
+                    ratio_df = pd.DataFrame({drug: pd.Series(ratios) for drug, ratios in ratio_data.items()})  # Drugs can have different well counts
+                    ratio_df.to_excel(writer, sheet_name=ratio_sheet_name[:31], index=False)
+
+        # 5. Create ratio sheets for drug-only data (if any)
+        if file_drug_data:
+            digit_data_drugs = {}
+            for (digit, _), drug_data in file_drug_data.items():
+                digit_data_drugs[digit] = drug_data
+
+            if len(digit_data_drugs) >= 2:
+                min_digit = min(digit_data_drugs.keys())
+                baseline_data = digit_data_drugs[min_digit]
+
+                for other_digit in sorted(digit_data_drugs.keys()):
+                    if other_digit == min_digit:
+                        continue
+
+                    comparison_data = digit_data_drugs[other_digit]
+                    ratio_sheet_name = f"Ratio_{other_digit}_to_{min_digit}_Drugs"
+
+                    # Calculate ratios for each drug
+                    ratio_data = {}
+                    common_drugs = set(baseline_data.keys()) & set(comparison_data.keys())
+
+                    for drug in sorted(common_drugs):
+                        baseline_vals = baseline_data[drug]
+                        comparison_vals = comparison_data[drug]
+
+                        # Calculate ratios (comparison/baseline), handling division by zero
+                        ratios = []
+                        max_len = max(len(baseline_vals), len(comparison_vals))
+
+                        for i in range(max_len):
+                            baseline_val = baseline_vals[i] if i < len(baseline_vals) else 0.0
+                            comparison_val = comparison_vals[i] if i < len(comparison_vals) else 0.0
+
+                            if baseline_val != 0:
+                                ratio = comparison_val / baseline_val
+                            else:
+                                ratio = float('inf') if comparison_val != 0 else 1.0
+
+                            ratios.append(ratio)
+
+                        ratio_data[drug] = ratios
+
+                    if ratio_data:
+                        ratio_df = pd.DataFrame({drug: pd.Series(ratios) for drug, ratios in ratio_data.items()})  # Drugs can have different well counts
+                        ratio_df.to_excel(writer, sheet_name=ratio_sheet_name[:31], index=False)
@@ -0,0 +1,110 @@
+"""Synthetic Tecan-style workbooks and plates for the benchmark scripts."""
+import string
+
+import numpy as np
+from openpyxl import Workbook
+
+
+def write_tecan_workbook(path, n_sheets=50, n_rows=8, n_cols=12, seed=0):
+    """Write a workbook with n_sheets plate-reader sheets shaped like a Tecan export.
+
+    Each sheet has a few metadata rows, a 'Temperature' row, the plate block
+    (header row of column numbers, letter row labels) and a trailing footer
+    separated by a blank row, which is what load_data expects to trim.
+    """
+    rng = np.random.default_rng(seed)
+    wb = Workbook()
+    wb.active.title = "Sheet1"
+    row_labels = [string.ascii_uppercase[i % 26] * (1 + i // 26) for i in range(n_rows)]
+    for k in range(n_sheets):
+        ws = wb.create_sheet(f"Plate_{k + 1}")
+        ws.append(["Application: Tecan i-control"])
+        ws.append(["Device: infinite 200Pro", None, "Serial number: 1234"])
+        ws.append(["Mode", "Absorbance"])
+        ws.append(["Wavelength", 450, "nm"])
+        ws.append(["Temperature: 25 °C"])
+        ws.append(["<>"] + list(range(1, n_cols + 1)))
+        values = rng.uniform(0.05, 3.5, size=(n_rows, n_cols)).round(4)
+        for label, row in zip(row_labels, values):
+            ws.append([label] + row.tolist())
+        ws.append([])
+        ws.append(["End Time:", "2024-01-01 12:00:00"])
+    wb.save(path)
+    return path
+
+
+def kinetic_curves(n_cycles, n_rows, n_cols, seed=0):
+    """times (s) and logistic growth curves values[cycle, row, col] with random rates, lags and plateaus"""
+    rng = np.random.default_rng(seed)
+    times = np.arange(n_cycles) * 60.0
+    rate = rng.uniform(0.0005, 0.003, size=(n_rows, n_cols))
+    lag = rng.uniform(0.2, 0.6, size=(n_rows, n_cols)) * times[-1]
+    plateau = rng.uniform(0.5, 3.0, size=(n_rows, n_cols))
+    values = 0.05 + plateau / (1 + np.exp(-rate * (times[:, None, None] - lag)))
+    return times, (values + rng.normal(0, 0.005, size=values.shape)).round(4)
+
+
+def write_kinetic_workbook(path, n_sheets=4, n_cycles=30, n_rows=8, n_cols=12, seed=0):
+    """Write a workbook of kinetic sheets: one Cycle Nr. / Time / Temp. header and plate block per cycle"""
+    wb = Workbook()
+    wb.active.title = "Sheet1"
+    row_labels = [string.ascii_uppercase[i % 26] * (1 + i // 26) for i in range(n_rows)]
+    for k in range(n_sheets):
+        times, values = kinetic_curves(n_cycles, n_rows, n_cols, seed + k)
+        ws = wb.create_sheet(f"Plate_{k + 1}")
+        ws.append(["Application: Tecan i-control"])
+        ws.append(["Mode", "Absorbance"])
+        ws.append(["Kinetic Measurement", f"{n_cycles} cycles"])
+        ws.append([])
+        for c in range(n_cycles):
+            ws.append(["Cycle Nr.", c + 1])
+            ws.append(["Time [s]", float(times[c])])
+            ws.append(["Temp. [°C]", 25.0 + 0.1 * (c % 3)])
+            ws.append(["<>"] + list(range(1, n_cols + 1)))
+            for label, row in zip(row_labels, values[c]):
+                ws.append([label] + row.tolist())
+            ws.append([])
+        ws.append(["End Time:", "2024-01-01 12:00:00"])
+    wb.save(path)
+    return path
+
+
+def synthetic_plates(n_files, n_sheets, n_rows, n_cols, seed=0):
+    """{sheet_name: {file_name: Plate}} with random drug, cuboid, background and removed cells.
+
+    Two files share each day digit, some cells hold text, and every other
+    sheet is background-corrected, so all export paths are exercised.
+    """
+    from tecan import background
+    from tecan.plate import Plate
+
+    rng = np.random.default_rng(seed)
+    drugs = [None, "DMSO"] + [f"Drug{k + 1}" for k in range(12)]
+    file_names = [f"exp_{'ab'[k % 2]}_day{k // 2 + 1}.xlsx" for k in range(n_files)]
+    plates = {}
+    for s in range(n_sheets):
+        sheet_name = f"Plate_{s + 1}"
+        for file_name in file_names:
+            values = rng.uniform(0.05, 3.5, size=(n_rows, n_cols)).round(4)
+            text = {}
+            for _ in range(2):
+                i, j = rng.integers(n_rows), rng.integers(n_cols)
+                values[i, j] = np.nan
+                text[(i, j)] = "OVER"
+            plate = Plate(values, text)
+            cells = [(i, j) for i in range(n_rows) for j in range(n_cols)]
+            for k in rng.permutation(len(cells)):
+                row, col = cells[k]
+                if rng.random() < 0.2:
+                    continue
+                is_background = bool(rng.random() < 0.1)
+                if is_background:
+                    plate.assign([row], [col], is_background=True)
+                else:
+                    plate.assign([row], [col], drug=drugs[rng.integers(len(drugs))], cuboids=[None, 1, 2, 3][rng.integers(4)])
+                if rng.random() < 0.05:
+                    plate.remove_cells([row], [col])
+            if s % 2:
+                background.subtract_background(plate)
+            plates.setdefault(sheet_name, {})[file_name] = plate
+    return plates
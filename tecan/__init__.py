@@ -0,0 +1,5 @@
+"""Qt-free helpers for the TECAN data analysis GUI.
+
+Modules in this package must not import PyQt6 so they can be used from
+worker processes and scripts without starting a Qt application.
+"""
@@ -0,0 +1,53 @@
+"""Background subtraction over plate arrays.
+
+Background wells are selected with a boolean mask and summarised with masked
+array reductions, either over the whole plate or per row / per column. The
+raw values are never modified: the corrected values are stored separately on
+the Plate, so subtraction can be undone or recomputed with other settings.
+"""
+import numpy as np
+
+BACKGROUND_MODES = ('plate', 'row', 'column')
+BACKGROUND_STATISTICS = ('mean', 'median')
+
+
+def background_mask(plate):
+    """Boolean array of the plate's background cells, excluding removed cells"""
+    return plate.state.background & ~plate.state.removed
+
+
+def compute_background(values, mask, mode='plate', statistic='mean'):
+    """Background level to subtract from values, broadcastable to values.shape.
+
+    mode 'plate' gives a scalar, 'row' an (n_rows, 1) array and 'column' a
+    (1, n_cols) array. Rows/columns (or plates) without any usable background
+    cell get 0.0, so they are left unchanged.
+    """
+    if mode not in BACKGROUND_MODES:
+        raise ValueError(f"Unknown background mode: {mode!r}")
+    if statistic not in BACKGROUND_STATISTICS:
+        raise ValueError(f"Unknown background statistic: {statistic!r}")
+    masked = np.ma.masked_array(values, mask=~mask | np.isnan(values))
+    axis = {'plate': None, 'row': 1, 'column': 0}[mode]
+    if statistic == 'mean':
+        level = masked.mean(axis=axis)
+    else:
+        level = np.ma.median(masked, axis=axis)
+    level = np.ma.filled(np.ma.asarray(level, dtype=np.float64), 0.0)
+    if mode == 'row':
+        return level.reshape(-1, 1)
+    if mode == 'column':
+        return level.reshape(1, -1)
+    return float(level)
+
+
+def subtract_background(plate, mode='plate', statistic='mean'):
+    """Recompute plate.corrected_values from the raw values; returns the subtracted background level"""
+    level = compute_background(plate.raw_values, background_mask(plate), mode, statistic)
+    plate.corrected_values = plate.raw_values - level
+    return level
+
+
+def clear_background(plate):
+    """Drop the corrected values so the plate shows and exports its raw values again"""
+    plate.corrected_values = None
@@ -0,0 +1,274 @@
+"""On-disk cache of parsed workbooks, keyed by file content.
+
+A workbook's load_workbook result is stored under the SHA-256 of its bytes
+and loader.PARSER_VERSION, so an unchanged file is never parsed twice and a
+parser change invalidates every entry. Each table is saved as a float64 .npy
+of its numeric cells, which is memory-mapped on load, plus a small JSON with
+the column labels, dtypes and the cells that are not numbers; the cycles of
+a kinetic sheet are saved the same way as one (cycles, rows, cols) .npy. A per-path
+index of (size, mtime) skips re-hashing files that have not been touched.
+
+Entries are written to a temporary directory and renamed into place, so
+concurrent loader processes never see half-written entries; any unreadable
+entry is treated as a miss. Results with parse errors are not stored, so a
+workbook that was locked or half-copied is parsed again on the next load.
+
+Callers look entries up in their own process with cached_result before
+sending misses to worker processes: tables read from the cache are
+memory-mapped, and pickling them back from a worker would copy them. evict keeps the cache under a byte budget by
+dropping the least recently used entries.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from tecan import kinetic, loader
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def default_cache_dir():
+    """TECAN_CACHE_DIR if set, otherwise tecan-analysis under the user's cache directory"""
+    if os.environ.get('TECAN_CACHE_DIR'):
+        return Path(os.environ['TECAN_CACHE_DIR'])
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return Path(base) / 'tecan-analysis'
+
+
+def file_hash(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_json(path, data):
+    # Write next to the target and rename, so readers never see a partial file
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _index_path(cache_dir, path):
+    return Path(cache_dir) / 'index' / f"{hashlib.sha1(path.encode()).hexdigest()}.json"
+
+
+def indexed_key(file_path, cache_dir):
+    """Cache key of a workbook from the path index if its size and mtime are unchanged, else None; never hashes the file"""
+    stat = os.stat(file_path)
+    path = str(Path(file_path).resolve())
+    try:
+        with open(_index_path(cache_dir, path)) as f:
+            entry = json.load(f)
+        if entry['path'] == path and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return f"{entry['hash']}-v{loader.PARSER_VERSION}"
+    except (OSError, ValueError, KeyError):
+        pass
+    return None
+
+
+def content_key(file_path, cache_dir):
+    """Cache key of a workbook: content hash plus parser version, re-hashing only when size or mtime changed"""
+    key = indexed_key(file_path, cache_dir)
+    if key is not None:
+        return key
+    stat = os.stat(file_path)
+    path = str(Path(file_path).resolve())
+    index_path = _index_path(cache_dir, path)
+    digest = file_hash(file_path)
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    _write_json(index_path, {'path': path, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': digest})
+    return f"{digest}-v{loader.PARSER_VERSION}"
+
+
+def _encode_label(label):
+    # JSON-safe column label that keeps int / float / str apart ("1" vs "1.0" matters for Plate.col_labels)
+    if isinstance(label, (bool, np.bool_)):
+        return ['b', bool(label)]
+    if isinstance(label, (int, np.integer)):
+        return ['i', int(label)]
+    if isinstance(label, (float, np.floating)):
+        return ['n', None] if np.isnan(label) else ['f', float(label)]
+    return ['s', str(label)]
+
+
+def _decode_label(tagged):
+    kind, value = tagged
+    return {'b': bool, 'i': int, 'f': float, 's': str}[kind](value) if kind != 'n' else np.nan
+
+
+def write_table(entry_dir, k, df):
+    numeric = df.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    present = df.notna().to_numpy()
+    # Integers in object columns come back as int, everything else numeric as float
+    ints = [[i, j] for j in range(df.shape[1]) if df.dtypes.iloc[j] == object
+            for i in np.flatnonzero(present[:, j])
+            if isinstance(df.iat[i, j], (int, np.integer)) and not isinstance(df.iat[i, j], (bool, np.bool_))]
+    text = [[int(i), int(j), str(df.iat[i, j])] for i, j in zip(*np.nonzero(present & np.isnan(numeric)))]
+    np.save(entry_dir / f"table_{k}.npy", np.asfortranarray(numeric))  # Column-major, so columns map without copies
+    with open(entry_dir / f"table_{k}.json", 'w') as f:
+        json.dump({'columns': [_encode_label(c) for c in df.columns], 'dtypes': [str(d) for d in df.dtypes],
+                   'ints': [[int(i), int(j)] for i, j in ints], 'text': text}, f)
+
+
+def read_table(entry_dir, k):
+    numeric = np.load(entry_dir / f"table_{k}.npy", mmap_mode='r')
+    with open(entry_dir / f"table_{k}.json") as f:
+        meta = json.load(f)
+    # Float columns stay views of the memory-mapped array; others are rebuilt as object arrays
+    columns = [numeric[:, j] if dtype == 'float64' else numeric[:, j].astype(object) for j, dtype in enumerate(meta['dtypes'])]
+    for i, j in meta['ints']:
+        columns[j][i] = int(numeric[i, j])
+    for i, j, value in meta['text']:
+        columns[j][i] = value
+    for j, dtype in enumerate(meta['dtypes']):
+        if dtype not in ('float64', 'object'):
+            columns[j] = pd.array(columns[j], dtype=dtype)
+    df = pd.DataFrame(dict(enumerate(columns)), index=pd.RangeIndex(numeric.shape[0]), copy=False)
+    df.columns = pd.Index([_decode_label(c) for c in meta['columns']], dtype=object)
+    return df
+
+
+def write_kinetic(entry_dir, k, read):
+    np.save(entry_dir / f"kinetic_{k}.npy", read.values)
+    return {'times': read.times.tolist(), 'temperatures': read.temperatures.tolist(), 'row_labels': read.row_labels,
+            'col_labels': read.col_labels, 'blocks': [list(block) for block in read.blocks]}
+
+
+def read_kinetic(entry_dir, k, meta):
+    return kinetic.KineticRead(np.load(entry_dir / f"kinetic_{k}.npy", mmap_mode='r'),
+                               np.array(meta['times'], dtype=np.float64), np.array(meta['temperatures'], dtype=np.float64),
+                               meta['row_labels'], meta['col_labels'], [tuple(block) for block in meta['blocks']])
+
+
+def store(cache_dir, key, result):
+    """Save a load_workbook result under key; an entry that already exists is kept, a result with errors is not stored"""
+    file_name, sheets, errors, kinetics = result
+    if errors:
+        return  # Possibly transient (file locked by Excel, partial copy): parse again next time
+    entries = Path(cache_dir) / 'entries'
+    entries.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(dir=entries, prefix='.tmp-'))
+    try:
+        manifest = {'file_name': file_name, 'errors': errors, 'sheets': [],
+                    'kinetics': [[sheet_name, write_kinetic(tmp, k, read)] for k, (sheet_name, read) in enumerate(kinetics)]}
+        for sheet_name, table_df in sheets:
+            if table_df is None:
+                manifest['sheets'].append([sheet_name, None])
+                continue
+            k = len(manifest['sheets'])
+            write_table(tmp, k, table_df)
+            manifest['sheets'].append([sheet_name, k])
+        with open(tmp / 'manifest.json', 'w') as f:
+            json.dump(manifest, f)
+        os.rename(tmp, entries / key)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)  # Another process stored the same workbook first
+
+
+def lookup(cache_dir, key):
+    """The cached load_workbook result for key, or None on a miss"""
+    entry_dir = Path(cache_dir) / 'entries' / key
+    try:
+        with open(entry_dir / 'manifest.json') as f:
+            manifest = json.load(f)
+        sheets = [(sheet_name, None if k is None else read_table(entry_dir, k)) for sheet_name, k in manifest['sheets']]
+        kinetics = [(sheet_name, read_kinetic(entry_dir, k, meta)) for k, (sheet_name, meta) in enumerate(manifest['kinetics'])]
+        os.utime(entry_dir / 'manifest.json')  # Mark as recently used for evict
+    except Exception:
+        return None  # Missing, half-evicted or unreadable entry: parse the workbook again
+    return manifest['file_name'], sheets, manifest['errors'], kinetics
+
+
+def cached_result(file_path, cache_dir=None):
+    """(key, load_workbook result) of a workbook whose entry is found without hashing it, else None.
+
+    Meant for the calling process, so the tables stay memory-mapped; misses
+    go to load_workbook or index_workbook in a worker.
+    """
+    cache_dir = Path(cache_dir) if cache_dir is not None else default_cache_dir()
+    try:
+        key = indexed_key(file_path, cache_dir)
+    except OSError:
+        return None
+    result = lookup(cache_dir, key) if key is not None else None
+    if result is None:
+        return None
+    return key, (Path(file_path).name, *result[1:])
+
+
+def load_workbook(file_path, cache_dir=None):
+    """loader.load_workbook through the cache in cache_dir (default_cache_dir() if None)"""
+    cache_dir = Path(cache_dir) if cache_dir is not None else default_cache_dir()
+    try:
+        key = content_key(file_path, cache_dir)
+    except OSError:
+        return loader.load_workbook(file_path)  # Unreadable file or cache directory: report through the parser
+    result = lookup(cache_dir, key)
+    if result is not None:
+        return (Path(file_path).name, *result[1:])
+    result = loader.load_workbook(file_path)
+    store(cache_dir, key, result)
+    return result
+
+
+def index_workbook(file_path, cache_dir=None):
+    """What lazy loading needs up front: (file_name, sheet_names, key, cached_result).
+
+    cached_result is the full load_workbook result when the workbook is in
+    the cache, otherwise None and the sheets are to be parsed one by one with
+    loader.load_sheet; key (None if the file could not be hashed) lets the
+    caller store the assembled result once every sheet has been parsed.
+    """
+    cache_dir = Path(cache_dir) if cache_dir is not None else default_cache_dir()
+    try:
+        key = content_key(file_path, cache_dir)
+    except OSError:
+        key = None
+    result = lookup(cache_dir, key) if key is not None else None
+    if result is not None:
+        return Path(file_path).name, [], key, (Path(file_path).name, *result[1:])
+    return Path(file_path).name, loader.list_sheets(file_path), key, None
+
+
+def cache_size(cache_dir=None):
+    entries = Path(cache_dir if cache_dir is not None else default_cache_dir()) / 'entries'
+    if not entries.is_dir():
+        return 0
+    return sum(f.stat().st_size for f in entries.rglob('*') if f.is_file())
+
+
+def evict(cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+    """Delete least recently used entries until the cache holds at most max_bytes; returns the bytes freed"""
+    entries = Path(cache_dir if cache_dir is not None else default_cache_dir()) / 'entries'
+    if not entries.is_dir():
+        return 0
+    usage = []
+    for entry_dir in entries.iterdir():
+        if entry_dir.name.startswith('.tmp-') or not (entry_dir / 'manifest.json').exists():
+            continue
+        size = sum(f.stat().st_size for f in entry_dir.iterdir() if f.is_file())
+        usage.append(((entry_dir / 'manifest.json').stat().st_mtime, size, entry_dir))
+    total = sum(size for _, size, _ in usage)
+    freed = 0
+    for _, size, entry_dir in sorted(usage):
+        if total - freed <= max_bytes:
+            break
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        freed += size
+    return freed
+
+
+def clear(cache_dir=None):
+    """Remove every cached workbook and the path index"""
+    cache_dir = Path(cache_dir if cache_dir is not None else default_cache_dir())
+    for name in ('entries', 'index'):
+        shutil.rmtree(cache_dir / name, ignore_errors=True)
@@ -0,0 +1,57 @@
+"""Columnar export of the results for downstream pipelines: Parquet or Arrow IPC datasets.
+
+Each table is written as a hive-partitioned dataset directory,
+<dir>/<table>/Day=<digit>/Cuboids=<n>/part-0.parquet (or .arrow), so readers
+can filter on day and cuboid count from the paths and memory-map Arrow IPC
+files without parsing Excel, e.g. pyarrow.dataset.dataset(path,
+partitioning='hive'). Needs pyarrow, which the Excel export does not.
+"""
+from pathlib import Path
+
+from tecan import ratios
+
+COLUMNAR_FORMATS = ('parquet', 'ipc')
+PARTITION_COLUMNS = ['Day', 'Cuboids']
+RESULT_TABLE_COLUMNS = ['File', 'Sheet', 'Well', 'Row', 'Column', 'Day', 'Drug', 'Cuboids', 'Concentration', 'Value',
+                        'Raw', 'Corrected']
+KINETIC_TABLE_COLUMNS = ['File', 'Sheet', 'Well', 'Row', 'Column', 'Day', 'Drug', 'Cuboids',
+                         'Slope', 'AUC', 'Max', 'Time to Threshold']
+QC_TABLE_COLUMNS = ['File', 'Sheet', 'Well', 'Row', 'Column', 'Day', 'Drug', 'Cuboids', 'Concentration', 'Value',
+                    'Group Median', 'Robust Z', 'Outlier']
+
+
+def write_dataset(df, directory, file_format='parquet'):
+    """Write df as a dataset partitioned by Day and Cuboids, replacing partitions already in directory"""
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+    except ImportError as e:
+        raise ImportError("Parquet/Arrow export needs pyarrow (pip install pyarrow)") from e
+    if file_format not in COLUMNAR_FORMATS:
+        raise ValueError(f"Unknown columnar format {file_format!r}, expected one of {COLUMNAR_FORMATS}")
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    ds.write_dataset(table, str(directory), format=file_format, partitioning=PARTITION_COLUMNS,
+                     partitioning_flavor='hive', existing_data_behavior='delete_matching',
+                     basename_template="part-{i}." + ('arrow' if file_format == 'ipc' else 'parquet'))
+
+
+def write_results(results, day_arrays, directory, file_format='parquet', kinetics=None, fits=None, qc_tables=None):
+    """Write the results table and, if there are any, the ratio, ratio summary, kinetics, dose-response and QC tables under directory.
+
+    results is engine.results_frame; day_arrays is {cuboids: ratios.DayArrays}
+    for the cuboid counts with at least two days; kinetics is
+    engine.kinetic_results, fits doseresponse.fit_curves and qc_tables
+    engine.qc_results, or None.
+    """
+    directory = Path(directory)
+    write_dataset(results[RESULT_TABLE_COLUMNS], directory / 'results', file_format)
+    if day_arrays:
+        write_dataset(ratios.ratio_table(day_arrays), directory / 'ratios', file_format)
+        write_dataset(ratios.summary_table(day_arrays), directory / 'ratio_summary', file_format)
+    if kinetics is not None and len(kinetics):
+        write_dataset(kinetics[KINETIC_TABLE_COLUMNS], directory / 'kinetics', file_format)
+    if fits is not None and len(fits):
+        write_dataset(fits, directory / 'dose_response', file_format)
+    if qc_tables is not None and len(qc_tables['QC_Wells']):
+        write_dataset(qc_tables['QC_Wells'][QC_TABLE_COLUMNS], directory / 'qc_wells', file_format)
+        write_dataset(qc_tables['QC_Z_Prime'], directory / 'qc_z_prime', file_format)
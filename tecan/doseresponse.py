@@ -0,0 +1,200 @@
+"""Four-parameter logistic (4PL) dose-response fits per drug, day and cuboid count.
+
+Every dosed well with a concentration annotation (see PlateState.concentrations)
+joins the group of its (cuboid count, day, drug). Each group with at least
+MIN_CONCENTRATIONS distinct positive concentrations is fitted to
+
+    y = Bottom + (Top - Bottom) / (1 + 10 ** ((log10(EC50) - log10(x)) * Hill))
+
+by Levenberg-Marquardt in plain NumPy, so no optimizer library is needed. A
+negative Hill slope is a falling curve, for which EC50 is the IC50.
+
+log10(EC50) is kept within EC50_MARGIN decades of the tested concentrations
+and |Hill| at most MAX_HILL. A fit that ends on one of those bounds, or whose
+R² is below MIN_R2 (flat or inactive responses), has no midpoint to report:
+it is listed as not converged with NaN EC50 and Hill slope.
+
+Initial guesses for all groups come from one pass over a NaN-padded
+(groups, wells) array. The fits themselves run in a process pool once there
+are enough groups, and fit_curves' cache keeps each group's result with a
+digest of its inputs, so an export only refits the groups whose wells changed.
+"""
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+FIT_COLUMNS = ['Cuboids', 'Day', 'Drug', 'Wells', 'Concentrations', 'Bottom', 'Top', 'EC50', 'Hill Slope', 'R2', 'Converged']
+MIN_CONCENTRATIONS = 4  # Distinct concentrations needed to fit four parameters
+POOL_MIN_GROUPS = 32  # Fewer groups than this are fitted in-process; a pool costs more than it saves
+MAX_ITERATIONS = 200
+EC50_MARGIN = 1.0  # Decades beyond the tested concentrations that log10(EC50) may reach
+MAX_HILL = 10.0
+MIN_R2 = 0.2
+_LN10 = np.log(10.0)
+
+
+def logistic(log_x, params):
+    """4PL response at log10 concentrations for params (bottom, top, log10 EC50, hill)"""
+    bottom, top, log_ec50, hill = params
+    return bottom + (top - bottom) / (1 + 10.0 ** np.clip((log_ec50 - log_x) * hill, -300, 300))
+
+
+def _jacobian(log_x, params):
+    bottom, top, log_ec50, hill = params
+    u = 10.0 ** np.clip((log_ec50 - log_x) * hill, -300, 300)
+    d = 1 + u
+    scale = -(top - bottom) * (u / d) * _LN10 / d
+    return np.column_stack([1 - 1 / d, 1 / d, scale * hill, scale * (log_ec50 - log_x)])
+
+
+def initial_guesses(log_x, y):
+    """Starting (bottom, top, log10 EC50, hill) for every group of NaN-padded (groups, wells) arrays.
+
+    Bottom and top are the lowest and highest response, EC50 the concentration
+    whose response is nearest the midpoint and the Hill slope +1 or -1 after
+    the sign of the concentration-response covariance.
+    """
+    with np.errstate(invalid='ignore'):
+        bottom = np.nanmin(y, axis=1)
+        top = np.nanmax(y, axis=1)
+        distance = np.abs(y - ((bottom + top) / 2)[:, None])
+        nearest = np.nanargmin(np.where(np.isnan(distance), np.inf, distance), axis=1)
+        log_ec50 = log_x[np.arange(len(log_x)), nearest]
+        covariance = np.nanmean((log_x - np.nanmean(log_x, axis=1)[:, None]) * (y - np.nanmean(y, axis=1)[:, None]), axis=1)
+    hill = np.where(covariance < 0, -1.0, 1.0)
+    return np.column_stack([bottom, top, log_ec50, hill])
+
+
+def fit_bounds(log_x):
+    """(lower, upper) parameter bounds of a fit to log10 concentrations log_x"""
+    lower = np.array([-np.inf, -np.inf, log_x.min() - EC50_MARGIN, -MAX_HILL])
+    upper = np.array([np.inf, np.inf, log_x.max() + EC50_MARGIN, MAX_HILL])
+    return lower, upper
+
+
+def fit_4pl(log_x, y, params):
+    """Levenberg-Marquardt fit from starting params; returns (params, R², converged).
+
+    A fit that ends on a bound (see fit_bounds) or with R² below MIN_R2 is
+    not converged and has NaN log10 EC50 and Hill slope.
+    """
+    lower, upper = fit_bounds(log_x)
+    with np.errstate(over='ignore', invalid='ignore'):
+        params, r2, converged = _levenberg_marquardt(log_x, y, np.clip(np.asarray(params, dtype=np.float64), lower, upper),
+                                                     lower, upper)
+    on_bound = np.isclose(params, lower, rtol=0, atol=1e-6) | np.isclose(params, upper, rtol=0, atol=1e-6)
+    if converged and not on_bound.any() and r2 >= MIN_R2:
+        return params, r2, True
+    return np.array([params[0], params[1], np.nan, np.nan]), r2, False
+
+
+def _levenberg_marquardt(log_x, y, params, lower, upper):
+    residuals = y - logistic(log_x, params)
+    sse = residuals @ residuals
+    damping = 1e-3
+    converged = sse == 0
+    for _ in range(MAX_ITERATIONS):
+        if converged:
+            break
+        jacobian = _jacobian(log_x, params)
+        normal = jacobian.T @ jacobian
+        gradient = jacobian.T @ residuals
+        try:
+            step = np.linalg.solve(normal + damping * np.diag(np.diag(normal) + 1e-12), gradient)
+        except np.linalg.LinAlgError:
+            break
+        candidate = np.clip(params + step, lower, upper)
+        step = candidate - params
+        candidate_residuals = y - logistic(log_x, candidate)
+        candidate_sse = candidate_residuals @ candidate_residuals
+        if np.isfinite(candidate_sse) and candidate_sse <= sse:
+            converged = sse - candidate_sse <= 1e-10 * sse or np.abs(step).max() <= 1e-10
+            params, residuals, sse = candidate, candidate_residuals, candidate_sse
+            damping = max(damping / 10, 1e-12)
+        else:
+            damping *= 10
+            if damping > 1e12:
+                break
+    total = ((y - y.mean()) ** 2).sum()
+    r2 = 1 - sse / total if total > 1e-12 * (y @ y) else np.nan  # No R² of responses that are constant up to rounding
+    return params, r2, bool(converged) and bool(np.isfinite(params).all())
+
+
+def dose_groups(dosed):
+    """[((cuboids, day, drug), concentrations, responses)] of the wells with a positive concentration and a numeric value.
+
+    dosed is engine.dosed_results, which carries Concentration and Value.
+    """
+    responses = pd.to_numeric(dosed['Value'], errors='coerce')
+    usable = dosed[(dosed['Concentration'] > 0) & responses.notna()].assign(_response=responses)
+    return [(key, group['Concentration'].to_numpy(dtype=np.float64), group['_response'].to_numpy(dtype=np.float64))
+            for key, group in usable.groupby(['Cuboids', 'Day', 'Drug'], sort=True)]
+
+
+def _digest(concentrations, responses):
+    return hashlib.sha1(concentrations.tobytes() + responses.tobytes()).hexdigest()
+
+
+def _fit_group(args):
+    # One group in a worker: (log_x, y, initial params) -> (params, R², converged)
+    return fit_4pl(*args)
+
+
+def fit_curves(dosed, workers=None, cache=None):
+    """4PL fit of every (cuboids, day, drug) group of the dosed results as a table with the columns of FIT_COLUMNS.
+
+    Groups with fewer than MIN_CONCENTRATIONS distinct concentrations are
+    listed with NaN parameters. cache, a dict kept between calls, maps each
+    group to the digest of its inputs and its fit; only groups whose
+    concentrations or responses changed are fitted again. workers limits the
+    process pool (default: one per CPU; 1 fits in-process).
+    """
+    groups = dose_groups(dosed)
+    records, todo = {}, []
+    for key, concentrations, responses in groups:
+        digest = _digest(concentrations, responses)
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None and cached[0] == digest:
+            records[key] = cached[1]
+        elif len(np.unique(concentrations)) < MIN_CONCENTRATIONS:
+            records[key] = (len(responses), len(np.unique(concentrations)), np.full(4, np.nan), np.nan, False)
+        else:
+            todo.append((key, digest, concentrations, responses))
+    if todo:
+        width = max(len(responses) for *_, responses in todo)
+        log_x = np.full((len(todo), width), np.nan)
+        y = np.full((len(todo), width), np.nan)
+        for k, (_, _, concentrations, responses) in enumerate(todo):
+            log_x[k, :len(responses)] = np.log10(concentrations)
+            y[k, :len(responses)] = responses
+        guesses = initial_guesses(log_x, y)
+        tasks = [(log_x[k, :len(responses)], y[k, :len(responses)], guesses[k])
+                 for k, (*_, responses) in enumerate(todo)]
+        max_workers = workers or os.cpu_count() or 1
+        if max_workers > 1 and len(tasks) >= POOL_MIN_GROUPS:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                fits = list(executor.map(_fit_group, tasks, chunksize=max(1, len(tasks) // (4 * max_workers))))
+        else:
+            fits = [_fit_group(task) for task in tasks]
+        for (key, digest, concentrations, responses), (params, r2, converged) in zip(todo, fits):
+            records[key] = (len(responses), len(np.unique(concentrations)), params, r2, converged)
+            if cache is not None:
+                cache[key] = (digest, records[key])
+    rows = []
+    for key, _, _ in groups:
+        wells, n_concentrations, (bottom, top, log_ec50, hill), r2, converged = records[key]
+        with np.errstate(over='ignore'):
+            ec50 = 10.0 ** log_ec50 if np.isfinite(log_ec50) else np.nan
+        rows.append((*key, wells, n_concentrations, bottom, top, ec50 if np.isfinite(ec50) else np.nan, hill, r2, converged))
+    fits = pd.DataFrame(rows, columns=FIT_COLUMNS)
+    fits['Day'] = fits['Day'].astype('Int64')
+    return fits
+
+
+def ec50_table(fits):
+    """EC50 per drug (rows, Drug column) and day (one column each) for each cuboid count, as {cuboids: DataFrame}"""
+    return {cuboids: group.pivot(index='Drug', columns='Day', values='EC50').rename_axis(columns=None).reset_index()
+            for cuboids, group in fits.groupby('Cuboids', sort=True)}
@@ -0,0 +1,418 @@
+"""Qt-free analysis pipeline: load workbooks, apply a plate layout, subtract background, export.
+
+The GUI and the command line share these functions. Run headless with
+
+    python -m tecan <input_dir> <layout.csv> -o results.xlsx [--workers N] [--columnar DIR]
+"""
+import argparse
+import functools
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from tecan import background, cache, columnar, doseresponse, kinetic, layout, loader, profiling, qc, ratios, xlsx
+from tecan.plate import Plate
+
+
+def find_workbooks(input_dir):
+    """Sorted .xlsx/.xls files in a directory, skipping Excel lock files"""
+    paths = [p for p in Path(input_dir).iterdir()
+             if p.suffix.lower() in ('.xlsx', '.xls') and not p.name.startswith('~$')]
+    return sorted(str(p) for p in paths)
+
+
+def load_workbooks(file_paths, workers=None, cache_dir=None, use_cache=True, kinetics=None):
+    """Parse workbooks in parallel, one worker process per workbook.
+
+    Returns {(sheet_name, file_name): table_df} in file order, like
+    ExcelAnalyzerGUI.sheet_data, and reports loader errors through
+    profiling.PROFILER.error (printed to stderr). Unless
+    use_cache is False, workbooks go through the parse cache in cache_dir
+    (tecan.cache.default_cache_dir() if None), which is then evicted down to
+    its size budget. Cached workbooks are read here rather than in a worker,
+    so their tables stay memory-mapped. If kinetics is a dict, the KineticRead
+    of every kinetic sheet, found in the same pass, is added to it under
+    (sheet_name, file_name).
+    """
+    sheet_data = {}
+    if not file_paths:
+        return sheet_data
+    results = dict.fromkeys(file_paths)
+    if use_cache:
+        cache_dir = cache_dir if cache_dir is not None else cache.default_cache_dir()
+        load = functools.partial(cache.load_workbook, cache_dir=cache_dir)
+        for file_path in file_paths:
+            hit = cache.cached_result(file_path, cache_dir)
+            if hit is not None:
+                results[file_path] = hit[1]
+    else:
+        load = loader.load_workbook
+    misses = [file_path for file_path, result in results.items() if result is None]
+    max_workers = workers or min(len(misses), os.cpu_count() or 1) or 1
+    with profiling.span('load_workbooks', files=len(file_paths), cached=len(file_paths) - len(misses)) as span, \
+            ProcessPoolExecutor(max_workers=max_workers) as executor:
+        if profiling.PROFILER.enabled:
+            span.set(bytes=sum(os.path.getsize(p) for p in file_paths if os.path.exists(p)))
+        results.update(zip(misses, executor.map(load, misses)))
+        for file_name, sheets, errors, reads in results.values():
+            for message in errors:
+                profiling.PROFILER.error(message)
+            for sheet_name, table_df in sheets:
+                sheet_data[(sheet_name, file_name)] = table_df
+            if kinetics is not None:
+                kinetics.update(((sheet_name, file_name), read) for sheet_name, read in reads)
+        span.set(sheets=len(sheet_data))
+    if use_cache:
+        cache.evict(cache_dir)
+    return sheet_data
+
+
+def load_kinetics(file_paths, workers=None, cache_dir=None, use_cache=True):
+    """Kinetic reads of every sheet with cycle blocks as {(sheet_name, file_name): KineticRead}, through load_workbooks"""
+    kinetics = {}
+    load_workbooks(file_paths, workers, cache_dir, use_cache, kinetics)
+    return kinetics
+
+
+def build_plates(sheet_data):
+    """Group loaded tables as {sheet_name: {file_name: Plate}}, skipping sheets that failed to load"""
+    plates = {}
+    for (sheet_name, file_name), table_df in sheet_data.items():
+        if table_df is None:
+            continue
+        plates.setdefault(sheet_name, {})[file_name] = Plate.from_dataframe(table_df)
+    return plates
+
+
+def subtract_background(plate, mode='plate', statistic='mean'):
+    """Background-correct a plate from its background cells; see tecan.background"""
+    return background.subtract_background(plate, mode, statistic)
+
+
+RESULT_COLUMNS = ['File', 'Sheet', 'Row', 'Column', 'Drug', 'Cuboids', 'Value']
+KINETIC_COLUMNS = ['File', 'Sheet', 'Row', 'Column', 'Drug', 'Cuboids'] + kinetic.METRIC_COLUMNS
+QC_WELL_COLUMNS = ['File', 'Sheet', 'Row', 'Column', 'Drug', 'Cuboids', 'Concentration', 'Value', 'Group Median',
+                   'Robust Z', 'Outlier']
+QC_PLATE_COLUMNS = ['File', 'Sheet', 'Scored Wells', 'Outliers', 'Edge Deviation', 'Interior Deviation', "Min Z'"]
+QC_EDGE_COLUMNS = ['File', 'Sheet', 'Axis', 'Label', 'Wells', 'Deviation']
+
+
+def file_day(file_name):
+    """Last digit in a file name's stem (the experiment day, e.g. 3 for exp_day3.xlsx), or None"""
+    digits = [char for char in Path(file_name).stem if char.isdigit()]
+    return int(digits[-1]) if digits else None
+
+
+def plate_results(sheet_name, file_name, plate):
+    """results_frame columns of one plate as {name: array}, or None when it has no assigned, non-background cell with a value"""
+    state = plate.state
+    rows, cols = state.assigned_cells()
+    keep = ~state.background[rows, cols]
+    rows, cols = rows[keep], cols[keep]
+    values = plate.cell_texts(rows, cols)
+    keep = np.array([v is not None and v.strip().lower() not in ('', 'nan') for v in values], dtype=bool)
+    rows, cols, values = rows[keep], cols[keep], values[keep]
+    if not len(rows):
+        return None
+    n_rows, n_cols = plate.shape
+    row_labels = np.array([plate.row_label(i) for i in range(n_rows)], dtype=object)
+    col_labels = np.array([plate.col_label(j) for j in range(n_cols)], dtype=object)
+    corrected = plate.corrected_values
+    return {
+        'File': np.full(len(rows), file_name, dtype=object),
+        'Sheet': np.full(len(rows), sheet_name, dtype=object),
+        'Row': row_labels[rows],
+        'Column': col_labels[cols],
+        'Drug': state.drug_table()[state.drug_ids[rows, cols]],
+        'Cuboids': state.cuboids[rows, cols].astype(np.int64),
+        'Value': values,
+        'Concentration': state.concentrations[rows, cols],
+        'Well': np.array([layout.well_name(row, col) for row, col in zip(rows.tolist(), cols.tolist())], dtype=object),
+        'Raw': plate.raw_values[rows, cols],
+        'Corrected': corrected[rows, cols] if corrected is not None else np.full(len(rows), np.nan),
+        'Day': np.full(len(rows), file_day(file_name), dtype=object),
+    }
+
+
+def results_frame(plates, cache=None):
+    """Tidy long table of every assigned, non-background cell with a value.
+
+    One row per (file, sheet, well) with the columns of RESULT_COLUMNS plus
+    Day (file_day, nullable), Well (A1-style name of the cell position),
+    Raw and Corrected (the plate's raw and background-corrected readings, NaN
+    when missing or not computed), Concentration (NaN if not annotated) and
+    Number (Value as float, 0.0 where the value is text), in sheet, file and
+    assignment order.
+
+    cache, a dict kept between calls, holds each plate's rows with its
+    Plate.revision, so only plates edited since the last call are recomputed.
+    """
+    parts = []
+    for sheet_name, file_plates in plates.items():
+        for file_name, plate in file_plates.items():
+            cached = cache.get((sheet_name, file_name)) if cache is not None else None
+            if cached is not None and cached[0] is plate and cached[1] == plate.revision:
+                part = cached[2]
+            else:
+                part = plate_results(sheet_name, file_name, plate)
+                if cache is not None:
+                    cache[(sheet_name, file_name)] = (plate, plate.revision, part)
+            if part is not None:
+                parts.append(part)
+    # Plain lists, so pandas infers the column dtypes exactly as for a single table
+    columns = {name: np.concatenate([part[name] for part in parts]).tolist() if parts else []
+               for name in RESULT_COLUMNS + ['Well', 'Raw', 'Corrected', 'Concentration', 'Day']}
+    df = pd.DataFrame({name: values for name, values in columns.items() if name != 'Day'})
+    df['Day'] = pd.array(columns['Day'], dtype='Int64')
+    df['Raw'] = df['Raw'].astype(np.float64)
+    df['Corrected'] = df['Corrected'].astype(np.float64)
+    df['Concentration'] = df['Concentration'].astype(np.float64)
+    df['Number'] = pd.to_numeric(df['Value'], errors='coerce').fillna(0.0)
+    return df
+
+
+def kinetic_results(plates, kinetics, threshold=None):
+    """Curve metrics (see kinetic.curve_metrics) of every assigned, non-background, non-removed well with a kinetic read.
+
+    One row per (file, sheet, well) with the columns of KINETIC_COLUMNS plus
+    Well and Day, in sheet, file and assignment order. kinetics is
+    {(sheet_name, file_name): KineticRead} as from load_kinetics.
+    """
+    parts = []
+    for sheet_name, file_plates in plates.items():
+        for file_name, plate in file_plates.items():
+            read = kinetics.get((sheet_name, file_name))
+            if read is None:
+                continue
+            state = plate.state
+            rows, cols = state.assigned_cells()
+            n_rows, n_cols = read.shape
+            keep = ~state.background[rows, cols] & ~state.removed[rows, cols] & (rows < n_rows) & (cols < n_cols)
+            rows, cols = rows[keep], cols[keep]
+            if not len(rows):
+                continue
+            metrics = kinetic.curve_metrics(read.values, read.times, threshold)
+            part = pd.DataFrame({
+                'File': file_name,
+                'Sheet': sheet_name,
+                'Row': [plate.row_label(row) for row in rows.tolist()],
+                'Column': [plate.col_label(col) for col in cols.tolist()],
+                'Drug': state.drug_table()[state.drug_ids[rows, cols]],
+                'Cuboids': state.cuboids[rows, cols].astype(np.int64),
+                **{name: metrics[name][rows, cols] for name in kinetic.METRIC_COLUMNS},
+                'Well': [layout.well_name(row, col) for row, col in zip(rows.tolist(), cols.tolist())],
+            })
+            part['Day'] = pd.array([file_day(file_name)] * len(part), dtype='Int64')
+            parts.append(part)
+    if not parts:
+        return pd.DataFrame(columns=KINETIC_COLUMNS + ['Well', 'Day'])
+    return pd.concat(parts, ignore_index=True)
+
+
+def qc_results(plates, threshold=qc.OUTLIER_THRESHOLD):
+    """QC of every plate (see tecan.qc) as {'QC_Wells', 'QC_Z_Prime', 'QC_Plates', 'QC_Edges': DataFrame}.
+
+    QC_Wells has one row per scored well (QC_WELL_COLUMNS plus Well and Day)
+    with its analysis value, group median, robust z and whether it exceeds
+    threshold; QC_Z_Prime the Z' of every drug group against the plate's
+    background (Day added); QC_Plates one row per plate with its outlier
+    count, the mean deviation from group medians of the outer ring and of the
+    interior and its lowest Z'; QC_Edges the mean deviation of every row and
+    column.
+    """
+    wells, z_primes, summaries, edges = [], [], [], []
+    for sheet_name, file_plates in plates.items():
+        for file_name, plate in file_plates.items():
+            plate_qc = qc.plate_qc(plate, threshold)
+            day = file_day(file_name)
+            rows, cols = np.nonzero(~np.isnan(plate_qc.medians))
+            state = plate.state
+            part = pd.DataFrame({
+                'File': file_name,
+                'Sheet': sheet_name,
+                'Row': [plate.row_label(row) for row in rows.tolist()],
+                'Column': [plate.col_label(col) for col in cols.tolist()],
+                'Drug': np.where(state.background[rows, cols], 'Background',
+                                 state.drug_table()[state.drug_ids[rows, cols]]),
+                'Cuboids': state.cuboids[rows, cols].astype(np.int64),
+                'Concentration': state.concentrations[rows, cols],
+                'Value': plate.values[rows, cols],
+                'Group Median': plate_qc.medians[rows, cols],
+                'Robust Z': plate_qc.robust_z[rows, cols],
+                'Outlier': plate_qc.outliers[rows, cols],
+                'Well': [layout.well_name(row, col) for row, col in zip(rows.tolist(), cols.tolist())],
+            })
+            part['Day'] = pd.array([day] * len(part), dtype='Int64')
+            wells.append(part)
+            z_prime = plate_qc.z_prime
+            z_prime.insert(0, 'Sheet', sheet_name)
+            z_prime.insert(0, 'File', file_name)
+            z_prime['Day'] = pd.array([day] * len(z_prime), dtype='Int64')
+            z_primes.append(z_prime)
+            edge, interior = plate_qc.edge_deviation
+            summaries.append((file_name, sheet_name, len(rows), int(plate_qc.outliers.sum()), edge, interior,
+                              z_prime["Z'"].min()))
+            present = ~np.isnan(plate_qc.deviations)
+            for axis, labels, effect, counts in (('Row', plate.row_labels, plate_qc.row_effect, present.sum(axis=1)),
+                                                  ('Column', plate.col_labels, plate_qc.col_effect, present.sum(axis=0))):
+                edges.append(pd.DataFrame({'File': file_name, 'Sheet': sheet_name, 'Axis': axis,
+                                           'Label': [str(label) for label in labels[:len(effect)]],
+                                           'Wells': counts, 'Deviation': effect}))
+    return {
+        'QC_Wells': pd.concat(wells, ignore_index=True) if wells else pd.DataFrame(columns=QC_WELL_COLUMNS + ['Well', 'Day']),
+        'QC_Z_Prime': (pd.concat(z_primes, ignore_index=True) if z_primes
+                       else pd.DataFrame(columns=['File', 'Sheet'] + qc.Z_PRIME_COLUMNS + ['Day'])),
+        'QC_Plates': pd.DataFrame(summaries, columns=QC_PLATE_COLUMNS),
+        'QC_Edges': pd.concat(edges, ignore_index=True) if edges else pd.DataFrame(columns=QC_EDGE_COLUMNS),
+    }
+
+
+def drug_columns(results):
+    """One column of Numbers per drug (sorted), in row order, NaN-padded to the longest drug"""
+    position = results.groupby('Drug', sort=False).cumcount()
+    table = results.assign(_position=position).pivot(index='_position', columns='Drug', values='Number')
+    return table.rename_axis(index=None, columns=None)
+
+
+def dosed_results(results):
+    """Rows of the results table that have a drug and a day digit, the input of the drug and ratio tables"""
+    return results[results['Drug'].notna() & results['Drug'].ne('') & results['Day'].notna()]
+
+
+def export_results(plates, file_path=None, columnar_dir=None, columnar_format='parquet', cache=None,
+                   kinetics=None, kinetic_threshold=None, fit_cache=None, workers=None, qc_threshold=None):
+    """Write the results of {sheet_name: {file_name: Plate}} as an Excel workbook and/or columnar datasets.
+
+    The workbook (file_path) has one sheet of assigned values per sheet name,
+    Drugs_<day>_Cuboid_<n> sheets grouped by the last digit of each file name,
+    day-to-day ratio sheets and a Ratio_Summary sheet of per-drug statistics
+    (see tecan.ratios). columnar_dir receives the same results as Parquet or
+    Arrow IPC datasets partitioned by day and cuboid count (see tecan.columnar).
+    cache is passed on to results_frame. With kinetics (from load_kinetics),
+    the per-well curve metrics of kinetic_results are added as a Kinetics
+    sheet and a kinetics dataset. When dosed wells carry concentrations, 4PL
+    fits per drug, day and cuboid count (see tecan.doseresponse) are added as
+    a Dose_Response sheet with EC50_Cuboid_<n> summaries and a dose_response
+    dataset; fit_cache and workers are passed on to doseresponse.fit_curves.
+    With a qc_threshold, the tables of qc_results are added as QC_* sheets and
+    qc_wells / qc_z_prime datasets.
+    """
+    with profiling.span('results_frame', plates=sum(len(file_plates) for file_plates in plates.values())) as span:
+        results = results_frame(plates, cache)
+        span.set(rows=len(results))
+    if kinetics:
+        with profiling.span('kinetic_results', reads=len(kinetics)):
+            kinetic_table = kinetic_results(plates, kinetics, kinetic_threshold)
+    else:
+        kinetic_table = None
+    if qc_threshold is not None:
+        with profiling.span('qc_results') as span:
+            qc_tables = qc_results(plates, qc_threshold)
+            span.set(wells=len(qc_tables['QC_Wells']))
+    else:
+        qc_tables = None
+    dosed = dosed_results(results)
+    if dosed['Concentration'].notna().any():
+        with profiling.span('fit_curves') as span:
+            fits = doseresponse.fit_curves(dosed, workers, fit_cache)
+            span.set(groups=len(fits))
+    else:
+        fits = None
+    with profiling.span('ratios', rows=len(dosed)):
+        day_arrays = {cuboids: arrays for cuboids, arrays in ratios.day_arrays(dosed).items()
+                      if len(arrays.days) >= 2}  # Need at least 2 days to create ratios
+    if file_path is not None:
+        with profiling.span('write_workbook', file=os.path.basename(file_path)) as span:
+            write_workbook(results, dosed, day_arrays, file_path, kinetic_table, fits, qc_tables)
+            if profiling.PROFILER.enabled and os.path.exists(file_path):
+                span.set(bytes=os.path.getsize(file_path))
+    if columnar_dir is not None:
+        with profiling.span('write_columnar', format=columnar_format):
+            columnar.write_results(results, day_arrays, columnar_dir, columnar_format, kinetic_table, fits, qc_tables)
+
+
+def write_workbook(results, dosed, day_arrays, file_path, kinetic_table=None, fits=None, qc_tables=None):
+    with xlsx.StreamingWorkbook(file_path) as workbook:
+        # Main sheets: one per original sheet name (excluding background and NaN)
+        for sheet_name, sheet_results in results.groupby('Sheet', sort=False):
+            workbook.write_frame(sheet_name, sheet_results[RESULT_COLUMNS])
+
+        # Drug sheets by day and cuboid count, all files of the same day pooled
+        for (day, cuboids), group in dosed.groupby(['Day', 'Cuboids'], sort=False):
+            workbook.write_frame(f"Drugs_{day}_Cuboid_{cuboids}", drug_columns(group).fillna(0.0))
+
+        # Ratio sheets: every later day against the earliest day, per cuboid count, plus their statistics
+        for cuboids, arrays in day_arrays.items():
+            for k, day in enumerate(arrays.days[1:], start=1):
+                ratio_df = arrays.ratio_frame(k)
+                if ratio_df is not None:
+                    workbook.write_frame(f"Ratio_{day}_to_{arrays.days[0]}_Cuboid_{cuboids}", ratio_df)
+        if day_arrays:
+            workbook.write_frame("Ratio_Summary", ratios.summary_table(day_arrays))
+        if kinetic_table is not None and len(kinetic_table):
+            workbook.write_frame("Kinetics", kinetic_table[KINETIC_COLUMNS])
+        if fits is not None and len(fits):
+            workbook.write_frame("Dose_Response", fits)
+            for cuboids, table in doseresponse.ec50_table(fits).items():
+                workbook.write_frame(f"EC50_Cuboid_{cuboids}", table)
+        if qc_tables is not None:
+            workbook.write_frame("QC_Plates", qc_tables['QC_Plates'])
+            workbook.write_frame("QC_Wells", qc_tables['QC_Wells'][QC_WELL_COLUMNS])
+            workbook.write_frame("QC_Z_Prime", qc_tables['QC_Z_Prime'].drop(columns='Day'))
+            workbook.write_frame("QC_Edges", qc_tables['QC_Edges'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m tecan", description="Batch-process Tecan plate-reader workbooks without the GUI.")
+    parser.add_argument("input_dir", help="Directory containing the .xlsx/.xls workbooks")
+    parser.add_argument("layout", help="Plate layout file (.csv, .xlsx or .json) with Row, Column, Drug, Cuboids, Background")
+    parser.add_argument("-o", "--output", default="results.xlsx", help="Result workbook to write (default: results.xlsx)")
+    parser.add_argument("--no-excel", action="store_true", help="Do not write the result workbook")
+    parser.add_argument("--columnar", metavar="DIR", default=None,
+                        help="Also write results, ratios and ratio summary as datasets partitioned by day and cuboid count")
+    parser.add_argument("--columnar-format", choices=columnar.COLUMNAR_FORMATS, default="parquet",
+                        help="Format of the --columnar datasets (default: parquet)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes for loading and curve fitting (default: one per CPU)")
+    parser.add_argument("--cache-dir", default=None, help="Parse cache directory (default: $TECAN_CACHE_DIR or ~/.cache/tecan-analysis)")
+    parser.add_argument("--no-cache", action="store_true", help="Parse every workbook without reading or filling the parse cache")
+    parser.add_argument("--no-background", action="store_true", help="Skip background subtraction")
+    parser.add_argument("--background-mode", choices=background.BACKGROUND_MODES, default="plate",
+                        help="Subtract one background level per plate, per row or per column (default: plate)")
+    parser.add_argument("--background-stat", choices=background.BACKGROUND_STATISTICS, default="mean",
+                        help="Summarise background cells by mean or median (default: mean)")
+    parser.add_argument("--kinetics", action="store_true",
+                        help="Also export slope, AUC, max and time to threshold of every well of kinetic (multi-cycle) sheets")
+    parser.add_argument("--kinetic-threshold", type=float, default=None,
+                        help="Reading for time to threshold (default: each well's half-maximum)")
+    parser.add_argument("--qc", action="store_true",
+                        help="Also export robust z-scores of every well, Z' of every drug group and row / column edge effects")
+    parser.add_argument("--qc-threshold", type=float, default=qc.OUTLIER_THRESHOLD,
+                        help=f"|Robust z| above which a well is flagged as an outlier (default: {qc.OUTLIER_THRESHOLD})")
+    args = parser.parse_args(argv)
+    if args.no_excel and args.columnar is None:
+        parser.error("--no-excel needs --columnar")
+
+    file_paths = find_workbooks(args.input_dir)
+    if not file_paths:
+        parser.error(f"no Excel workbooks found in {args.input_dir}")
+    kinetics = {} if args.kinetics else None
+    sheet_data = load_workbooks(file_paths, args.workers, args.cache_dir, not args.no_cache, kinetics)
+    plates = build_plates(sheet_data)
+    plate_layout = layout.read_layout(args.layout)
+    with profiling.span('apply_layout', plates=sum(len(file_plates) for file_plates in plates.values())):
+        for sheet_name, file_plates in plates.items():
+            for plate in file_plates.values():
+                layout.apply_layout(plate, plate_layout, sheet_name)
+                if not args.no_background:
+                    subtract_background(plate, args.background_mode, args.background_stat)
+    output = None if args.no_excel else args.output
+    export_results(plates, output, args.columnar, args.columnar_format,
+                   kinetics=kinetics, kinetic_threshold=args.kinetic_threshold, workers=args.workers,
+                   qc_threshold=args.qc_threshold if args.qc else None)
+    destinations = " and ".join(d for d in (output, args.columnar) if d is not None)
+    print(f"Exported {sum(len(p) for p in plates.values())} plates from {len(file_paths)} files to {destinations}", file=sys.stderr)
+    return 0
@@ -0,0 +1,53 @@
+"""Heatmap pixels of plate arrays, for the GUI's plate overview.
+
+heatmap_argb maps a whole plate through a 256-entry color table with one
+indexing operation and returns 32-bit 0xAARRGGBB pixels, one per well, that
+QImage.Format_ARGB32 can wrap without any per-well Python code. color_range
+gives a shared scale so the plates of an overview are comparable.
+"""
+import numpy as np
+
+MISSING_COLOR = 0xFFE6E6E6  # Light gray: empty or text wells
+REMOVED_COLOR = 0xFF9A9A9A  # Darker gray: removed wells
+# Viridis sampled at 9 evenly spaced points, interpolated to the full table
+_ANCHORS = np.array([(68, 1, 84), (71, 44, 122), (59, 81, 139), (44, 113, 142), (33, 144, 141),
+                     (39, 173, 129), (92, 200, 99), (170, 220, 50), (253, 231, 37)], dtype=np.float64)
+
+
+def colormap(n=256):
+    """(n,) uint32 opaque 0xAARRGGBB colors running through _ANCHORS"""
+    positions = np.linspace(0, len(_ANCHORS) - 1, n)
+    rgb = np.column_stack([np.interp(positions, np.arange(len(_ANCHORS)), _ANCHORS[:, k]) for k in range(3)])
+    rgb = np.rint(rgb).astype(np.uint32)
+    return np.uint32(0xFF000000) | (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
+
+
+COLORMAP = colormap()
+
+
+def color_range(arrays, low=2, high=98):
+    """(vmin, vmax) at the low and high percentiles of the finite values of all arrays; (0, 1) if there are none.
+
+    Percentiles rather than the extremes keep one saturated well from
+    flattening every other plate to a single color.
+    """
+    finite = [a[np.isfinite(a)] for a in arrays]
+    finite = np.concatenate(finite) if finite else np.empty(0)
+    if not len(finite):
+        return 0.0, 1.0
+    vmin, vmax = np.percentile(finite, [low, high])
+    if vmax <= vmin:
+        vmax = vmin + 1.0
+    return float(vmin), float(vmax)
+
+
+def heatmap_argb(values, vmin, vmax, removed=None):
+    """C-contiguous (rows, cols) uint32 pixels of values on the [vmin, vmax] scale; NaN and removed wells in gray"""
+    values = np.asarray(values, dtype=np.float64)
+    missing = ~np.isfinite(values)
+    scaled = (np.where(missing, vmin, values) - vmin) * ((len(COLORMAP) - 1) / (vmax - vmin))
+    pixels = COLORMAP[np.clip(np.rint(scaled), 0, len(COLORMAP) - 1).astype(np.intp)]
+    pixels[missing] = MISSING_COLOR
+    if removed is not None:
+        pixels[removed] = REMOVED_COLOR
+    return np.ascontiguousarray(pixels)
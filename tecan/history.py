@@ -0,0 +1,137 @@
+"""Undo / redo of assignment edits as per-cell diffs of PlateState arrays.
+
+A command keeps, for every plate it touched, only the cells whose state
+actually changed, packed as CELL_STATE records before and after the edit
+(27 bytes each). Undo and redo write those records back and touch nothing
+else, so the history has no depth limit: applying a layout to every well of
+a hundred 1536-well plates costs about 10 MB.
+
+A command also keeps a plate's corrected_values when the edit replaced or
+dropped them. Only references are kept: tecan.background always assigns new
+arrays and never writes into the old ones. Background subtraction and its
+removal are commands of their own, so the correction a command puts back on
+undo is always the one it replaced.
+"""
+import numpy as np
+
+from tecan.state import CELL_STATE
+
+
+def _changed(before, after):
+    # Field-wise comparison; NaN original values and concentrations compare equal to each other
+    changed = np.zeros(len(before), dtype=bool)
+    for name in CELL_STATE.names:
+        if CELL_STATE[name].kind == 'f':
+            old, new = before[name], after[name]
+            changed |= (old != new) & ~(np.isnan(old) & np.isnan(new))
+        else:
+            changed |= before[name] != after[name]
+    return changed
+
+
+class PlateChange:
+    """Cells of one plate changed by a command, with their CELL_STATE records before and after"""
+    def __init__(self, plate, rows, cols, before, after, corrected=None):
+        self.plate = plate
+        self.rows = rows
+        self.cols = cols
+        self.before = before
+        self.after = after
+        self.corrected = corrected  # (corrected_values before, after) if the command replaced them, else None
+
+    @property
+    def nbytes(self):
+        return self.rows.nbytes + self.cols.nbytes + self.before.nbytes + self.after.nbytes
+
+
+class Command:
+    """One user action: a name for the undo / redo labels and the PlateChange of every plate it changed"""
+    def __init__(self, name, changes):
+        self.name = name
+        self.changes = changes
+
+    @property
+    def n_cells(self):
+        return sum(len(change.rows) for change in self.changes)
+
+    @property
+    def nbytes(self):
+        return sum(change.nbytes for change in self.changes)
+
+
+class History:
+    """Undo and redo stacks of Commands"""
+    def __init__(self, on_change=None):
+        self.undo_stack = []
+        self.redo_stack = []
+        self.on_change = on_change  # Called after the stacks changed, e.g. to update undo / redo buttons
+
+    def record(self, name, targets, edit):
+        """Run edit() and push a Command of what it changed; returns the Command, or None if nothing changed.
+
+        targets lists (plate, rows, cols) for the cells edit may touch, with
+        rows and cols None for the whole plate. A new command clears the redo
+        stack.
+        """
+        snapshots = []
+        for plate, rows, cols in targets:
+            if rows is None:
+                rows, cols = np.indices(plate.shape).reshape(2, -1)
+            rows, cols = plate.state.cells(rows, cols)
+            flat = np.unique(np.ravel_multi_index((rows, cols), plate.shape))
+            rows, cols = (index.astype(np.int32) for index in np.unravel_index(flat, plate.shape))
+            snapshots.append((plate, rows, cols, plate.state.cell_state(rows, cols), plate.corrected_values))
+        edit()
+        changes = []
+        for plate, rows, cols, before, corrected in snapshots:
+            after = plate.state.cell_state(rows, cols)
+            changed = _changed(before, after)
+            corrected = (corrected, plate.corrected_values) if plate.corrected_values is not corrected else None
+            if changed.any() or corrected is not None:
+                changes.append(PlateChange(plate, rows[changed], cols[changed], before[changed], after[changed], corrected))
+        if not changes:
+            return None
+        command = Command(name, changes)
+        self.undo_stack.append(command)
+        self.redo_stack.clear()
+        self._notify()
+        return command
+
+    def undo(self):
+        """Restore the cells of the last command to their previous state; returns the Command or None"""
+        if not self.undo_stack:
+            return None
+        command = self.undo_stack.pop()
+        for change in reversed(command.changes):
+            change.plate.state.set_cell_state(change.rows, change.cols, change.before)
+            if change.corrected is not None:
+                change.plate.corrected_values = change.corrected[0]
+        self.redo_stack.append(command)
+        self._notify()
+        return command
+
+    def redo(self):
+        """Apply the last undone command again; returns the Command or None"""
+        if not self.redo_stack:
+            return None
+        command = self.redo_stack.pop()
+        for change in command.changes:
+            change.plate.state.set_cell_state(change.rows, change.cols, change.after)
+            if change.corrected is not None:
+                change.plate.corrected_values = change.corrected[1]
+        self.undo_stack.append(command)
+        self._notify()
+        return command
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self._notify()
+
+    def _notify(self):
+        if self.on_change:
+            self.on_change()
+
+    @property
+    def nbytes(self):
+        return sum(command.nbytes for command in self.undo_stack + self.redo_stack)
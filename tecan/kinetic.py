@@ -0,0 +1,145 @@
+"""Kinetic plate reads: every cycle of a sheet as a (cycles, rows, cols) array, and per-well curve metrics.
+
+A Tecan kinetic export repeats the plate block once per cycle, each preceded
+by label rows in the first column:
+
+    Cycle Nr.       | 2
+    Time [s]        | 60
+    Temp. [°C]      | 25.3      (or "Temperature [°C]")
+    <>              | 1 | 2 | ...
+    A               | 0.12 | 0.15 | ...
+    ...
+    (blank row)
+
+parse_kinetic stacks the blocks into one float array with the time and
+temperature of each cycle. curve_metrics reduces the cycle axis to per-well
+slope, AUC, maximum and time to threshold, all as NumPy operations over the
+whole plate at once.
+"""
+import numpy as np
+import pandas as pd
+
+from tecan import tables
+
+METRIC_COLUMNS = ['Slope', 'AUC', 'Max', 'Time to Threshold']
+
+
+class KineticRead:
+    """Every cycle of one kinetic sheet as values[cycle, row, col] with the time (s) and temperature (°C) of each cycle"""
+    def __init__(self, values, times, temperatures, row_labels, col_labels, blocks=None):
+        self.values = values  # float64, NaN where a reading is missing or not numeric (e.g. "OVER")
+        self.times = times  # float64 per cycle, NaN if the sheet has no time row
+        self.temperatures = temperatures  # float64 per cycle, NaN if the sheet has no temperature row
+        self.row_labels = row_labels
+        self.col_labels = col_labels
+        self.blocks = blocks or []  # (start, end) sheet rows of each cycle's plate block, header row included
+
+    @property
+    def n_cycles(self):
+        return self.values.shape[0]
+
+    @property
+    def shape(self):
+        """(rows, cols) of the plate"""
+        return self.values.shape[1:]
+
+
+def _first_column_text(df):
+    # Lower-cased, stripped text of the first column; '' where it is not text
+    col = df.iloc[:, 0]
+    return np.array([value.strip().lower() if isinstance(value, str) else '' for value in col], dtype=object)
+
+
+def _label_value(numeric, labels, start, stop, prefixes):
+    # Number next to the first label row in [start, stop) starting with one of prefixes, or NaN
+    for i in range(start, stop):
+        if labels[i].startswith(prefixes):
+            return numeric[i, 1] if numeric.shape[1] > 1 else np.nan
+    return np.nan
+
+
+def parse_kinetic(df):
+    """KineticRead of a raw sheet with at least two 'Cycle Nr.' plate blocks, or None for an end-point sheet.
+
+    A truncated last cycle (e.g. an aborted run) whose block is smaller than
+    the first one is dropped.
+    """
+    if df.shape[1] < 2:
+        return None
+    labels = _first_column_text(df)
+    cycle_rows = np.flatnonzero([label.startswith('cycle') for label in labels])
+    if len(cycle_rows) < 2:
+        return None
+    header_rows = np.flatnonzero(labels == '<>')
+    empty_idx = np.flatnonzero(tables.empty_rows(df))
+    numeric = df.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    bounds = np.append(cycle_rows[1:], len(df))
+    blocks, times, temperatures = [], [], []
+    for cycle_row, next_cycle in zip(cycle_rows, bounds):
+        pos = np.searchsorted(header_rows, cycle_row)
+        if pos == len(header_rows) or header_rows[pos] >= next_cycle:
+            break  # Cycle label without a plate block
+        header = int(header_rows[pos])
+        pos = np.searchsorted(empty_idx, header)
+        end = min(int(empty_idx[pos]) if pos < len(empty_idx) else len(df), int(next_cycle))
+        if blocks and end - header != blocks[0][1] - blocks[0][0]:
+            break
+        blocks.append((header, end))
+        times.append(_label_value(numeric, labels, cycle_row, header, ('time',)))
+        temperatures.append(_label_value(numeric, labels, cycle_row, header, ('temp',)))
+    if len(blocks) < 2:
+        return None
+    first_start, first_end = blocks[0]
+    header = df.iloc[first_start, 1:]
+    n_cols = int(header.notna().to_numpy().nonzero()[0].max()) + 1 if header.notna().any() else 0
+    col_labels = [str(label) for label in header.iloc[:n_cols]]
+    row_labels = [str(label) for label in df.iloc[first_start + 1:first_end, 0]]
+    values = np.stack([numeric[start + 1:end, 1:1 + n_cols] for start, end in blocks])
+    return KineticRead(values, np.array(times, dtype=np.float64), np.array(temperatures, dtype=np.float64),
+                       row_labels, col_labels, blocks)
+
+
+def curve_metrics(values, times, threshold=None):
+    """Per-well curve metrics of values[cycle, row, col] over times, as {name: (rows, cols) float array}.
+
+    Slope: least-squares slope against time over the cycles with a reading.
+    AUC: trapezoidal area under the curve; NaN if any cycle is missing.
+    Max: highest reading. Time to Threshold: first time the curve reaches
+    threshold, linearly interpolated between cycles; NaN if it never does.
+    threshold is a scalar or one value per well; None uses each well's
+    half-maximum, halfway between its lowest and highest reading.
+    Wells without any reading are NaN throughout.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    times = np.asarray(times, dtype=np.float64)
+    if np.isnan(times).any():
+        times = np.arange(len(times), dtype=np.float64)  # No time row: use the cycle index
+    t = times[:, None, None]
+    present = ~np.isnan(values)
+    n = present.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t_mean = np.where(present, t, 0.0).sum(axis=0) / n
+        y_mean = np.where(present, values, 0.0).sum(axis=0) / n
+        dt = np.where(present, t - t_mean, 0.0)
+        slope = (dt * np.where(present, values - y_mean, 0.0)).sum(axis=0) / (dt ** 2).sum(axis=0)
+        slope[n < 2] = np.nan
+        auc = ((values[1:] + values[:-1]) / 2 * np.diff(times)[:, None, None]).sum(axis=0)
+        highest = np.where(present, values, -np.inf).max(axis=0)
+        lowest = np.where(present, values, np.inf).min(axis=0)
+        highest[n == 0] = np.nan
+        lowest[n == 0] = np.nan
+        if threshold is None:
+            threshold = (lowest + highest) / 2
+        threshold = np.broadcast_to(np.asarray(threshold, dtype=np.float64), values.shape[1:])
+        above = present & (values >= threshold)
+        first = above.argmax(axis=0)[None]
+        previous = np.maximum(first - 1, 0)
+        y1 = np.take_along_axis(values, first, axis=0)[0]
+        y0 = np.take_along_axis(values, previous, axis=0)[0]
+        t1, t0 = times[first[0]], times[previous[0]]
+        crossing = t0 + (threshold - y0) * (t1 - t0) / (y1 - y0)
+        # Reached at the first cycle, or after a missing reading: no interpolation
+        exact = (first[0] == 0) | np.isnan(y0)
+        time_to_threshold = np.where(exact, t1, crossing)
+        time_to_threshold[~above.any(axis=0)] = np.nan
+    return {'Slope': slope, 'AUC': auc, 'Max': highest, 'Time to Threshold': time_to_threshold}
@@ -0,0 +1,147 @@
+"""Plate layout files: which drug, cuboid count and background flag each well gets.
+
+A layout is a table with one row per well. Row and Column are 1-based cell
+positions in the plate table (the same numbering extract_conditions writes);
+Drug, Cuboids and Background describe the assignment. Optional columns:
+Well (e.g. "B7", used when Row/Column are missing), Concentration (dose of
+the drug, for dose-response fits), Removed (exclude the well as NaN) and
+Sheet (limit the row to one sheet name).
+
+Saved templates are CSV or JSON records with the columns of TEMPLATE_COLUMNS.
+"""
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from tecan.state import REMOVED
+
+LAYOUT_COLUMNS = ['Row', 'Column', 'Drug', 'Cuboids', 'Background']
+TEMPLATE_COLUMNS = ['Well', 'Row', 'Column', 'Drug', 'Cuboids', 'Concentration', 'Background', 'Removed']
+_WELL_RE = re.compile(r'^\s*([A-Za-z]+)\s*(\d+)\s*$')
+_TRUE_STRINGS = {'true', 'yes', 'y', '1', 'x'}
+
+
+def _as_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in _TRUE_STRINGS
+    return bool(value) and not pd.isna(value)
+
+
+def read_layout(path):
+    """Read a layout from .csv, .xlsx/.xls or .json into a DataFrame with normalized columns"""
+    suffix = Path(path).suffix.lower()
+    if suffix == '.csv':
+        df = pd.read_csv(path)
+    elif suffix in ('.xlsx', '.xls'):
+        df = pd.read_excel(path)
+    elif suffix == '.json':
+        df = pd.read_json(path, orient='records')
+    else:
+        raise ValueError(f"Unsupported layout file type: {path}")
+    return normalize_layout(df)
+
+
+def parse_well(well):
+    """1-based (row, column) of a well name such as 'B7' or 'AA12' (rows A..Z, AA..)"""
+    match = _WELL_RE.match(str(well))
+    if not match:
+        raise ValueError(f"Invalid well name: {well!r}")
+    row = 0
+    for char in match.group(1).upper():
+        row = row * 26 + (ord(char) - ord('A') + 1)
+    return row, int(match.group(2))
+
+
+def well_name(row, col):
+    """Well name of a 0-based (row, col) cell, the inverse of parse_well"""
+    letters = ''
+    row += 1
+    while row:
+        row, rem = divmod(row - 1, 26)
+        letters = chr(ord('A') + rem) + letters
+    return f"{letters}{col + 1}"
+
+
+def normalize_layout(df):
+    df = df.copy()
+    if ('Row' not in df.columns or 'Column' not in df.columns) and 'Well' in df.columns:
+        positions = [parse_well(well) for well in df['Well']]
+        df['Row'] = [row for row, _ in positions]
+        df['Column'] = [col for _, col in positions]
+    missing = [col for col in ('Row', 'Column') if col not in df.columns]
+    if missing:
+        raise ValueError(f"Layout is missing column(s): {', '.join(missing)}")
+    for col in ('Drug', 'Cuboids', 'Concentration', 'Background', 'Removed'):
+        if col not in df.columns:
+            df[col] = None
+    df['Row'] = df['Row'].astype(int)
+    df['Column'] = df['Column'].astype(int)
+    df['Drug'] = df['Drug'].astype(object).where(df['Drug'].notna(), None)
+    df['Cuboids'] = pd.to_numeric(df['Cuboids'], errors='coerce').astype('Int64')
+    df['Concentration'] = pd.to_numeric(df['Concentration'], errors='coerce').astype(np.float64)
+    df['Background'] = df['Background'].map(_as_bool)
+    df['Removed'] = df['Removed'].map(_as_bool)
+    return df
+
+
+def layout_from_plate(plate):
+    """Template of every assigned or removed well of a Plate, one row per well"""
+    state = plate.state
+    rows, cols = np.nonzero(state.assigned | state.removed)  # Row-major, i.e. sorted by (row, col)
+    cuboids = state.cuboids[rows, cols]
+    return pd.DataFrame({
+        'Well': [well_name(row, col) for row, col in zip(rows.tolist(), cols.tolist())],
+        'Row': rows + 1,
+        'Column': cols + 1,
+        'Drug': state.drug_table()[state.drug_ids[rows, cols]],
+        'Cuboids': pd.array(np.where(cuboids > 0, cuboids.astype(object), None), dtype='Int64'),
+        'Concentration': state.concentrations[rows, cols],
+        'Background': state.background[rows, cols],
+        'Removed': state.removed[rows, cols],
+    }, columns=TEMPLATE_COLUMNS)
+
+
+def write_layout(layout_df, path):
+    """Save a layout template as .json records or .csv"""
+    if Path(path).suffix.lower() == '.json':
+        layout_df.to_json(path, orient='records', indent=1)
+    else:
+        layout_df.to_csv(path, index=False)
+
+
+def layout_arrays(layout_df, sheet_name=None):
+    """Turn a normalized layout into 0-based row/col index arrays plus per-well value arrays.
+
+    Rows with a Sheet column only apply to that sheet. When a well appears
+    more than once the last row wins.
+    """
+    if 'Sheet' in layout_df.columns and sheet_name is not None:
+        layout_df = layout_df[layout_df['Sheet'].isna() | (layout_df['Sheet'] == sheet_name)]
+    layout_df = layout_df.drop_duplicates(subset=['Row', 'Column'], keep='last')
+    return {
+        'rows': layout_df['Row'].to_numpy(dtype=np.int64) - 1,
+        'cols': layout_df['Column'].to_numpy(dtype=np.int64) - 1,
+        'drugs': layout_df['Drug'].to_numpy(dtype=object),
+        'cuboids': layout_df['Cuboids'].fillna(0).to_numpy(dtype=np.int64),
+        'concentrations': layout_df['Concentration'].to_numpy(dtype=np.float64),
+        'background': layout_df['Background'].to_numpy(dtype=bool),
+        'removed': layout_df['Removed'].to_numpy(dtype=bool),
+    }
+
+
+def apply_layout(plate, layout_df, sheet_name=None):
+    """Assign every well of the layout on a Plate in one pass; returns the (row, col) cells changed.
+
+    Wells outside the plate are ignored. Wells not in the layout keep their
+    current assignment.
+    """
+    arrays = layout_arrays(layout_df, sheet_name)
+    n_rows, n_cols = plate.shape
+    inside = (arrays['rows'] >= 0) & (arrays['rows'] < n_rows) & (arrays['cols'] >= 0) & (arrays['cols'] < n_cols)
+    rows, cols = arrays['rows'][inside], arrays['cols'][inside]
+    plate.assign(rows, cols, drug=arrays['drugs'][inside], cuboids=arrays['cuboids'][inside],
+                 is_background=arrays['background'][inside], concentration=arrays['concentrations'][inside])
+    plate.state.set_flag(rows, cols, REMOVED, arrays['removed'][inside])
+    return list(zip(rows.tolist(), cols.tolist()))
@@ -0,0 +1,130 @@
+"""Workbook parsing for Tecan plate-reader exports.
+
+Everything here runs inside worker processes, so it only depends on pandas.
+"""
+import zipfile
+from pathlib import Path
+from xml.etree import ElementTree
+
+import pandas as pd
+
+from tecan import kinetic, tables
+
+_SPREADSHEET_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_OFFICE_RELS_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_PACKAGE_RELS_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+PARSER_VERSION = 3  # Bump when parsing or trimming changes, so tecan.cache entries are re-parsed
+
+
+def _use_header_row(table_df):
+    # Use first row as header if it contains text
+    if len(table_df) > 0 and (table_df.iloc[0].dtype == 'object' or any(isinstance(val, str) for val in table_df.iloc[0])):
+        table_df.columns = table_df.iloc[0]
+        table_df = table_df.iloc[1:].reset_index(drop=True)
+    return table_df
+
+
+def trim_table(df):
+    """Cut a raw sheet down to its first plate table and use its first row as header if it contains text"""
+    start = tables.find_table_start(df)
+    end = tables.find_table_end(df, start)
+    return _use_header_row(df.iloc[start:end].reset_index(drop=True))
+
+
+def split_tables(df):
+    """Trim every plate table stacked in a raw sheet; the first entry is the same as trim_table(df)"""
+    trimmed = []
+    for k, (start, end) in enumerate(tables.find_table_blocks(df)):
+        table_df = _use_header_row(df.iloc[start:end].reset_index(drop=True))
+        # Later blocks must hold numbers, so a stray 'temperature' note in a footer is not a table
+        if k > 0 and table_df.apply(pd.to_numeric, errors='coerce').notna().to_numpy().sum() == 0:
+            continue
+        trimmed.append(table_df)
+    return trimmed
+
+
+def _xlsx_worksheet_names(file_path):
+    # Worksheet names in tab order straight from xl/workbook.xml and its relationships, without
+    # opening the workbook (openpyxl scans the dimensions of every sheet when it does)
+    with zipfile.ZipFile(file_path) as archive:
+        workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+        rels = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    targets = {rel.get('Id'): rel.get('Target', '') for rel in rels.iter(f"{{{_PACKAGE_RELS_NS}}}Relationship")}
+    return [sheet.get('name') for sheet in workbook.iter(f"{{{_SPREADSHEET_NS}}}sheet")
+            if 'worksheets/' in targets.get(sheet.get(f"{{{_OFFICE_RELS_NS}}}id"), '')]
+
+
+def list_sheets(file_path):
+    """Names of the sheets load_workbook would parse, read from the workbook index without parsing any sheet"""
+    try:
+        names = _xlsx_worksheet_names(file_path)
+    except (zipfile.BadZipFile, KeyError, ElementTree.ParseError):
+        names = None
+    if not names:
+        with pd.ExcelFile(file_path) as excel_file:  # .xls, or an .xlsx laid out unusually
+            names = excel_file.sheet_names
+    return [sheet_name for sheet_name in names if sheet_name != "Sheet1"]
+
+
+def _parse_sheet(excel_file, sheet_name, file_path):
+    # [(table_name, table_df)] for one sheet, its error messages and its [(sheet_name, KineticRead)] if it is a
+    # kinetic run; a None table if parsing failed
+    try:
+        df = excel_file.parse(sheet_name, header=None)
+        read = kinetic.parse_kinetic(df)
+        if read is not None:
+            # Kinetic run: the first cycle is the sheet's table, the others are cycles rather than stacked tables
+            start, end = read.blocks[0]
+            return [(sheet_name, _use_header_row(df.iloc[start:end].reset_index(drop=True)))], [], [(sheet_name, read)]
+        tables_found = [(sheet_name if k == 0 else f"{sheet_name} #{k + 1}", table_df)
+                        for k, table_df in enumerate(split_tables(df))]
+        return tables_found, [], []
+    except Exception as e:
+        return [(sheet_name, None)], [f"Error loading {sheet_name} from {file_path}: {e}"], []
+
+
+def load_sheet(file_path, sheet_name):
+    """Parse and trim a single sheet.
+
+    Returns (file_name, sheet_name, [(table_name, table_df), ...], [error message, ...],
+    [(sheet_name, KineticRead)] or [] for an end-point sheet).
+    """
+    return load_sheets(file_path, [sheet_name])[0]
+
+
+def load_sheets(file_path, sheet_names):
+    """load_sheet of several sheets of one workbook, which is opened once: a list in sheet_names order"""
+    file_name = Path(file_path).name
+    try:
+        with pd.ExcelFile(file_path) as excel_file:
+            return [(file_name, sheet_name, *_parse_sheet(excel_file, sheet_name, file_path)) for sheet_name in sheet_names]
+    except Exception as e:
+        return [(file_name, sheet_name, [(sheet_name, None)], [f"Error loading {sheet_name} from {file_path}: {e}"], [])
+                for sheet_name in sheet_names]
+
+
+def load_workbook(file_path):
+    """Parse and trim every sheet (except 'Sheet1') of one workbook.
+
+    Returns (file_name, [(sheet_name, table_df), ...], [error message, ...],
+    [(sheet_name, KineticRead), ...]). Extra tables stacked below the first
+    one in a sheet are returned as "<sheet_name> #2", "#3", ... Sheets that
+    fail to parse are reported in the error list with a None table. Kinetic
+    sheets (see tecan.kinetic) have their first cycle as table and every
+    cycle in the KineticRead, from the same pass over the sheet.
+    """
+    file_name = Path(file_path).name
+    sheets = []
+    errors = []
+    kinetics = []
+    # Open the workbook once and parse every sheet from that handle;
+    # pd.read_excel(file_path, ...) per sheet re-opens and re-parses the whole zip
+    with pd.ExcelFile(file_path) as excel_file:
+        for sheet_name in excel_file.sheet_names:
+            if sheet_name == "Sheet1":
+                continue
+            sheet_tables, sheet_errors, sheet_kinetics = _parse_sheet(excel_file, sheet_name, file_path)
+            sheets += sheet_tables
+            errors += sheet_errors
+            kinetics += sheet_kinetics
+    return file_name, sheets, errors, kinetics
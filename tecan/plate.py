@@ -0,0 +1,169 @@
+"""Numeric plate tables and their per-cell assignments, independent of Qt."""
+import numpy as np
+import pandas as pd
+
+from tecan.state import BACKGROUND, REMOVED, UNCHANGED, PlateState
+
+CORRECTED_DECIMALS = 4  # Background-corrected values are shown with a fixed number of decimals
+
+
+class Plate:
+    """One trimmed sheet of one file as a float64 array with labels and cell assignments.
+
+    The assignments (drug, cuboids, background, removed, original value) live
+    in a PlateState of arrays over the plate shape, which the table widgets
+    edit through assign, remove_cells, restore_cells and clear_assignments.
+    """
+    def __init__(self, values, text=None, row_labels=None, col_labels=None):
+        self.raw_values = np.asarray(values, dtype=np.float64)  # NaN where the cell is empty or not numeric
+        self._values_revision = 0
+        self.corrected_values = None  # Background-corrected copy of raw_values, see tecan.background
+        self.text = text or {}  # {(row, col): str} for non-numeric cells such as "OVER"
+        n_rows, n_cols = self.raw_values.shape
+        self.row_labels = row_labels if row_labels is not None else [str(i + 1) for i in range(n_rows)]
+        self.col_labels = col_labels if col_labels is not None else [str(j + 1) for j in range(n_cols)]
+        self.state = PlateState((n_rows, n_cols))
+
+    @classmethod
+    def from_dataframe(cls, df):
+        # If first column is all letters, use as row labels
+        if df.shape[1] > 1 and df.iloc[:, 0].apply(lambda x: isinstance(x, str) and x.isalpha()).all():
+            row_labels = df.iloc[:, 0].astype(str).tolist()
+            df = df.iloc[:, 1:].reset_index(drop=True)
+        else:
+            row_labels = [str(i+1) for i in range(len(df))]
+        numeric = df.apply(pd.to_numeric, errors='coerce')
+        values = numeric.to_numpy(dtype=np.float64, na_value=np.nan)
+        # Keep the original text of cells that are present but not numeric
+        text_mask = df.notna().to_numpy() & np.isnan(values)
+        text = {(i, j): str(df.iat[i, j]) for i, j in zip(*np.nonzero(text_mask))}
+        return cls(values, text, row_labels, [str(col) for col in df.columns])
+
+    @property
+    def shape(self):
+        return self.raw_values.shape
+
+    @property
+    def corrected_values(self):
+        return self._corrected_values
+
+    @corrected_values.setter
+    def corrected_values(self, values):
+        self._corrected_values = values
+        self._values_revision += 1
+
+    @property
+    def revision(self):
+        """Changes whenever the assignments or the corrected values change"""
+        return self.state.revision, self._values_revision
+
+    @property
+    def values(self):
+        """Values used for analysis: background-corrected when available, raw otherwise"""
+        return self.raw_values if self.corrected_values is None else self.corrected_values
+
+    def in_bounds(self, row, col):
+        return 0 <= row < self.raw_values.shape[0] and 0 <= col < self.raw_values.shape[1]
+
+    def has_value(self, row, col):
+        return not np.isnan(self.raw_values[row, col]) or (row, col) in self.text
+
+    def row_label(self, row):
+        return self.row_labels[row] if 0 <= row < len(self.row_labels) else str(row + 1)
+
+    def col_label(self, col):
+        return self.col_labels[col] if 0 <= col < len(self.col_labels) else str(col + 1)
+
+    def cell_text(self, row, col, corrected=True):
+        """Text shown for a cell (corrected value if available and requested), or None for an empty cell"""
+        if self.state.flags[row, col] & REMOVED:
+            return "NaN"
+        if corrected and self.corrected_values is not None:
+            value = self.corrected_values[row, col]
+            if not np.isnan(value):
+                return f"{value:.{CORRECTED_DECIMALS}f}"
+        value = self.raw_values[row, col]
+        if np.isnan(value):
+            return self.text.get((row, col))
+        return str(value)  # Same text as str() of the workbook cell, e.g. '1.0'
+
+    def cell_texts(self, rows, cols, corrected=True):
+        """cell_text for arrays of in-bounds rows and cols, as an object array"""
+        rows, cols = np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)
+        texts = np.full(len(rows), None, dtype=object)
+        raw = self.raw_values[rows, cols]
+        use_corrected = np.zeros(len(rows), dtype=bool)
+        if corrected and self.corrected_values is not None:
+            values = self.corrected_values[rows, cols]
+            use_corrected = ~np.isnan(values)
+            texts[use_corrected] = [f"{value:.{CORRECTED_DECIMALS}f}" for value in values[use_corrected]]
+        numeric = ~use_corrected & ~np.isnan(raw)
+        texts[numeric] = [str(value) for value in raw[numeric].tolist()]
+        if self.text:
+            for k in np.flatnonzero(~use_corrected & ~numeric):
+                texts[k] = self.text.get((rows[k], cols[k]))
+        texts[self.state.removed[rows, cols]] = "NaN"
+        return texts
+
+    def original_values(self, rows, cols):
+        """Values saved when cells are first assigned: the raw value, 0.0 for text and NaN for empty cells"""
+        values = self.raw_values[rows, cols]
+        if self.text:
+            text = [k for k in np.flatnonzero(np.isnan(values)) if (rows[k], cols[k]) in self.text]
+            values[text] = 0.0
+        return values
+
+    def assign(self, rows, cols, drug=UNCHANGED, cuboids=UNCHANGED, is_background=UNCHANGED, concentration=UNCHANGED):
+        """Assign cells, changing only the attributes given (a scalar or one value per cell); cells outside the plate are skipped"""
+        rows, cols = np.asarray(rows, dtype=np.intp).ravel(), np.asarray(cols, dtype=np.intp).ravel()
+        inside = self.state.in_bounds(rows, cols)
+        # Per-cell attribute values follow the cells that are kept
+        if drug is not UNCHANGED and np.ndim(drug):
+            drug = np.asarray(drug, dtype=object)[inside]
+        if cuboids is not UNCHANGED and np.ndim(cuboids):
+            cuboids = np.asarray(cuboids)[inside]
+        if is_background is not UNCHANGED and np.ndim(is_background):
+            is_background = np.asarray(is_background, dtype=bool)[inside]
+        if concentration is not UNCHANGED and np.ndim(concentration):
+            concentration = np.asarray(concentration, dtype=np.float64)[inside]
+        rows, cols = rows[inside], cols[inside]
+        self.state.assign(rows, cols, self.original_values(rows, cols), drug, cuboids, is_background, concentration)
+
+    def remove_cells(self, rows, cols):
+        """Exclude cells as NaN, saving their original value first"""
+        self.assign(rows, cols)
+        rows, cols = self.state.cells(rows, cols)
+        self.state.set_flag(rows, cols, REMOVED, True)
+
+    def restore_cells(self, rows, cols):
+        rows, cols = self.state.cells(rows, cols)
+        self.state.set_flag(rows, cols, REMOVED, False)
+
+    def clear_assignments(self, rows, cols):
+        """Reset drug, cuboids, concentration and background of cells, keeping their saved original value"""
+        self.state.clear(*self.state.cells(rows, cols))
+
+    def assignments(self):
+        """{(row, col): {'drug', 'cuboids', 'is_background', 'original_value'}} in assignment order (a copy)"""
+        state = self.state
+        rows, cols = state.assigned_cells()
+        drugs = state.drug_table()[state.drug_ids[rows, cols]]
+        return {(row, col): {'drug': drug,
+                             'cuboids': int(state.cuboids[row, col]) or None,
+                             'is_background': bool(state.flags[row, col] & BACKGROUND),
+                             'original_value': None if np.isnan(state.original_values[row, col]) else float(state.original_values[row, col])}
+                for row, col, drug in zip(rows.tolist(), cols.tolist(), drugs)}
+
+    def assignment_table(self):
+        """Assigned cells in assignment order with 1-based Row and Column, Drug, Cuboids (None if unset), Concentration (NaN if unset) and Background"""
+        state = self.state
+        rows, cols = state.assigned_cells()
+        cuboids = state.cuboids[rows, cols]
+        return pd.DataFrame({
+            'Row': rows + 1,
+            'Column': cols + 1,
+            'Drug': state.drug_table()[state.drug_ids[rows, cols]],
+            'Cuboids': np.where(cuboids > 0, cuboids.astype(object), None),
+            'Concentration': state.concentrations[rows, cols],
+            'Background': state.background[rows, cols],
+        })
@@ -0,0 +1,151 @@
+"""Timing spans of the load, display, assign, paint and export stages, plus the loader errors of a run.
+
+Instrumented code wraps a stage in
+
+    with profiling.span('export', plates=len(plates)) as s:
+        ...
+        s.set(rows=len(results))
+
+and PROFILER keeps (name, start, duration, thread, args) records that the
+GUI's diagnostics panel summarises and that can be saved as JSON or as a
+Chrome trace (chrome://tracing, Perfetto). Recording is off unless the
+TECAN_PROFILE environment variable is set: '1' turns it on, a path ending
+in .json also writes a Chrome trace there when the process exits. While
+off, span() hands back one shared no-op object, so an instrumented call
+costs an attribute check and nothing is stored.
+
+Loader errors are kept in PROFILER.errors whether or not timing is on.
+"""
+import atexit
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+ENV_VAR = 'TECAN_PROFILE'
+MAX_SPANS = 100_000  # Oldest spans are dropped beyond this, so a long session cannot grow without bound
+MAX_ERRORS = 1_000
+
+
+class _NullSpan:
+    # Stand-in for a span while recording is off
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('profiler', 'name', 'args', 'start')
+
+    def __init__(self, profiler, name, args):
+        self.profiler = profiler
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.profiler.record(self.name, self.start, time.perf_counter_ns() - self.start, **self.args)
+        return False
+
+    def set(self, **args):
+        """Add arguments known only once the stage has run, e.g. the number of cells it touched"""
+        self.args.update(args)
+
+
+class Profiler:
+    """Recorder of timing spans; times are perf_counter nanoseconds"""
+    def __init__(self, enabled=False, max_spans=MAX_SPANS):
+        self.enabled = enabled
+        self.spans = deque(maxlen=max_spans)  # (name, start_ns, duration_ns, thread_id, args)
+        self.errors = deque(maxlen=MAX_ERRORS)  # (time.time(), message)
+        self.origin = time.perf_counter_ns()  # Trace timestamps count from here
+
+    def span(self, name, **args):
+        """Context manager timing one stage; args (counts, sizes) are stored with it"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def record(self, name, start_ns, duration_ns, **args):
+        """Store a span measured elsewhere, e.g. a workbook from its submission to a worker until its result arrived"""
+        if self.enabled:
+            self.spans.append((name, start_ns, duration_ns, threading.get_ident(), args))
+
+    def error(self, message):
+        """Keep a loader or parse error for the diagnostics panel and print it as before"""
+        self.errors.append((time.time(), message))
+        print(message, file=sys.stderr)
+
+    def clear(self):
+        self.spans.clear()
+        self.errors.clear()
+
+    def summary(self):
+        """[(name, calls, total ms, mean ms, max ms)] per span name, slowest total first"""
+        totals = {}
+        for name, _, duration, _, _ in self.spans:
+            calls, total, longest = totals.get(name, (0, 0, 0))
+            totals[name] = (calls + 1, total + duration, max(longest, duration))
+        rows = [(name, calls, total / 1e6, total / calls / 1e6, longest / 1e6)
+                for name, (calls, total, longest) in totals.items()]
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+
+    def span_records(self):
+        """Spans as JSON-ready dicts with millisecond start (from origin) and duration"""
+        return [{'name': name, 'start_ms': (start - self.origin) / 1e6, 'duration_ms': duration / 1e6,
+                 'thread': thread, 'args': args}
+                for name, start, duration, thread, args in self.spans]
+
+    def write_json(self, file_path):
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump({'spans': self.span_records(),
+                       'summary': [dict(zip(('name', 'calls', 'total_ms', 'mean_ms', 'max_ms'), row)) for row in self.summary()],
+                       'errors': [{'time': t, 'message': message} for t, message in self.errors]},
+                      f, indent=1, default=str)
+
+    def write_chrome_trace(self, file_path):
+        """Write the spans as complete ('X') events of the Chrome trace event format"""
+        pid = os.getpid()
+        events = [{'name': name, 'cat': 'tecan', 'ph': 'X', 'ts': (start - self.origin) / 1e3, 'dur': duration / 1e3,
+                   'pid': pid, 'tid': thread, 'args': args}
+                  for name, start, duration, thread, args in self.spans]
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, default=str)
+
+
+def _from_environment():
+    setting = os.environ.get(ENV_VAR, '').strip()
+    profiler = Profiler(enabled=setting.lower() not in ('', '0', 'false', 'no', 'off'))
+    if setting.lower().endswith('.json') and multiprocessing.parent_process() is None:
+        # Main process only: worker processes re-import this module and would overwrite the trace
+        atexit.register(profiler.write_chrome_trace, setting)
+    return profiler
+
+
+PROFILER = _from_environment()
+
+
+def span(name, **args):
+    """PROFILER.span, without the second call while recording is off"""
+    if not PROFILER.enabled:
+        return _NULL_SPAN
+    return _Span(PROFILER, name, args)
+
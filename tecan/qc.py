@@ -0,0 +1,150 @@
+"""Per-well quality control of one plate: robust z-scores, Z'-factors and edge effects.
+
+Scored wells are the assigned, non-removed wells with a numeric value that
+have a drug or are background. They form replicate groups of the same drug,
+cuboid count and concentration (all background wells are one group). Within
+each group a well's robust z-score is
+
+    (value - group median) / (1.4826 * MAD)
+
+so one bad replicate cannot hide itself by inflating the spread; wells beyond
+the threshold are proposed for removal. Z' compares every drug group with
+the plate's background wells, and the edge statistics average each well's
+deviation from its group median per row, per column and over the outer ring
+of the plate against the interior.
+
+Everything is computed with sorts and bincounts over the scored wells of the
+whole plate at once, so a 1536-well plate takes about a millisecond and the
+GUI can rerun it after every edit.
+"""
+import numpy as np
+import pandas as pd
+
+OUTLIER_THRESHOLD = 3.5  # |robust z| above which a well is proposed for removal (Iglewicz and Hoaglin)
+MIN_REPLICATES = 3  # Groups with fewer scored wells get no robust z
+MAD_SCALE = 1.4826  # MAD times this estimates the standard deviation of normal data
+MEAN_AD_SCALE = 1.2533  # Same for the mean absolute deviation, used where more than half the group is identical
+Z_PRIME_COLUMNS = ['Drug', 'Cuboids', 'Concentration', 'Wells', 'Mean', 'SD', 'Background Mean', 'Background SD', "Z'"]
+
+
+class PlateQC:
+    """QC of one plate: per-well arrays over the plate shape and the statistics of its replicate groups"""
+    def __init__(self, robust_z, medians, deviations, outliers, groups):
+        self.robust_z = robust_z  # NaN where a well is not scored or its group is too small
+        self.medians = medians  # Median of each scored well's replicate group, NaN elsewhere
+        self.deviations = deviations  # value / group median - 1 of scored, non-background wells, NaN elsewhere
+        self.outliers = outliers  # bool, |robust_z| above the threshold
+        self.groups = groups  # {name: array per replicate group}, see plate_qc
+
+    @property
+    def z_prime(self):
+        """Z' = 1 - 3 (SD + background SD) / |mean - background mean| of every drug group, as a DataFrame with the columns of Z_PRIME_COLUMNS"""
+        groups = self.groups
+        drug = ~groups['background']
+        background = np.flatnonzero(groups['background'] & (groups['wells'] >= 2))
+        background_mean = groups['mean'][background[0]] if len(background) else np.nan
+        background_sd = groups['sd'][background[0]] if len(background) else np.nan
+        with np.errstate(invalid='ignore', divide='ignore'):
+            z_prime = 1 - 3 * (groups['sd'][drug] + background_sd) / np.abs(groups['mean'][drug] - background_mean)
+        return pd.DataFrame({
+            'Drug': groups['drug'][drug],
+            'Cuboids': groups['cuboids'][drug].astype(np.int64),
+            'Concentration': groups['concentration'][drug],
+            'Wells': groups['wells'][drug],
+            'Mean': groups['mean'][drug],
+            'SD': groups['sd'][drug],
+            'Background Mean': background_mean,
+            'Background SD': background_sd,
+            "Z'": z_prime,
+        }, columns=Z_PRIME_COLUMNS)
+
+    def outlier_cells(self):
+        """rows, cols of the wells proposed for removal"""
+        return np.nonzero(self.outliers)
+
+    @property
+    def row_effect(self):
+        """Mean deviation of each row's wells from their group medians"""
+        return _nanmean(self.deviations, axis=1)
+
+    @property
+    def col_effect(self):
+        """Mean deviation of each column's wells from their group medians"""
+        return _nanmean(self.deviations, axis=0)
+
+    @property
+    def edge_deviation(self):
+        """(mean deviation of the outer rows and columns, mean deviation of the interior)"""
+        edge = np.ones(self.deviations.shape, dtype=bool)
+        edge[1:-1, 1:-1] = False
+        return _nanmean(self.deviations[edge]), _nanmean(self.deviations[~edge])
+
+
+def _nanmean(values, axis=None):
+    # nanmean that returns NaN for all-NaN slices without a warning
+    with np.errstate(invalid='ignore', divide='ignore'):
+        present = ~np.isnan(values)
+        return np.where(present, values, 0.0).sum(axis=axis) / present.sum(axis=axis)
+
+
+def group_medians(ids, values, n_groups):
+    """Median of values per group id (0 .. n_groups - 1, every group non-empty) from one sort"""
+    order = np.lexsort((values, ids))
+    sorted_values = values[order]
+    counts = np.bincount(ids, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    return (sorted_values[starts + (counts - 1) // 2] + sorted_values[starts + counts // 2]) / 2
+
+
+def plate_qc(plate, threshold=OUTLIER_THRESHOLD):
+    """PlateQC of a plate's analysis values (background-corrected when available)"""
+    state = plate.state
+    values = plate.values
+    shape = plate.shape
+    scored = state.assigned & ~state.removed & ~np.isnan(values) & ((state.drug_ids >= 0) | state.background)
+    rows, cols = np.nonzero(scored)
+    x = values[rows, cols]
+    is_background = state.background[rows, cols]
+    # One integer key per (drug, cuboids, concentration), -1 for background; np.unique on it numbers the groups
+    _, cuboid_codes = np.unique(state.cuboids[rows, cols], return_inverse=True)
+    _, concentration_codes = np.unique(np.nan_to_num(state.concentrations[rows, cols], nan=-1.0), return_inverse=True)
+    n_cuboids, n_concentrations = cuboid_codes.max(initial=0) + 1, concentration_codes.max(initial=0) + 1
+    keys = ((state.drug_ids[rows, cols].astype(np.int64) + 1) * n_cuboids + cuboid_codes) * n_concentrations + concentration_codes
+    keys[is_background] = -1
+    _, first, ids = np.unique(keys, return_index=True, return_inverse=True)
+    n_groups = len(first)
+    counts = np.bincount(ids, minlength=n_groups)
+    medians = group_medians(ids, x, n_groups)
+    distance = np.abs(x - medians[ids])
+    mad = group_medians(ids, distance, n_groups)
+    scale = np.where(mad > 0, MAD_SCALE * mad, MEAN_AD_SCALE * np.bincount(ids, distance, n_groups) / np.maximum(counts, 1))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = np.where(scale[ids] > 0, (x - medians[ids]) / scale[ids], 0.0)
+        deviation = np.where(medians[ids] != 0, x / medians[ids] - 1, np.nan)
+    small = counts[ids] < MIN_REPLICATES
+    z[small] = np.nan
+    deviation[small | is_background] = np.nan
+
+    robust_z = np.full(shape, np.nan)
+    robust_z[rows, cols] = z
+    group_median = np.full(shape, np.nan)
+    group_median[rows, cols] = medians[ids]
+    deviations = np.full(shape, np.nan)
+    deviations[rows, cols] = deviation
+    with np.errstate(invalid='ignore'):
+        outliers = np.abs(robust_z) > threshold
+    first_rows, first_cols = rows[first], cols[first]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.bincount(ids, x, n_groups) / counts
+        sds = np.sqrt(np.bincount(ids, (x - means[ids]) ** 2, n_groups) / (counts - 1))
+    groups = {
+        'background': is_background[first],
+        'drug': state.drug_table()[state.drug_ids[first_rows, first_cols]],
+        'cuboids': state.cuboids[first_rows, first_cols],
+        'concentration': state.concentrations[first_rows, first_cols],
+        'wells': counts,
+        'median': medians,
+        'mean': means,
+        'sd': np.where(counts >= 2, sds, np.nan),
+    }
+    return PlateQC(robust_z, group_median, deviations, outliers, groups)
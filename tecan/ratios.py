@@ -0,0 +1,115 @@
+"""Day-to-day ratios and per-drug summaries over aligned NumPy arrays.
+
+The dosed wells of the results table (see engine.results_frame) are laid out
+per cuboid count as a (days, drugs, wells) float array, NaN-padded where a
+drug has fewer wells on a day. Ratios against the earliest day and the
+per-drug statistics are then single masked-array operations: a missing
+well, a non-numeric reading or a zero baseline gives NaN, never 0.0, inf or 1.0.
+"""
+import numpy as np
+import pandas as pd
+
+SUMMARY_COLUMNS = ['Cuboids', 'Day', 'Drug', 'Wells', 'Mean', 'SD', 'CV', 'Baseline Day', 'Fold Change']
+RATIO_COLUMNS = ['Cuboids', 'Day', 'Baseline Day', 'Drug', 'Replicate', 'Ratio']
+
+
+class DayArrays:
+    """Wells of one cuboid count as values[day, drug, well] plus the matching present mask"""
+    def __init__(self, days, drugs, values, present):
+        self.days = days  # Sorted day digits; days[0] is the baseline
+        self.drugs = drugs  # Sorted drug names
+        self.values = values  # float64, NaN where the well is missing or not numeric
+        self.present = present  # True where the drug has a well at that position on that day
+
+    def ratios(self):
+        """values[1:] / values[0] as a float array, NaN where either side is missing or the baseline is 0"""
+        baseline = np.ma.masked_equal(np.ma.masked_invalid(self.values[0]), 0.0)
+        return (np.ma.masked_invalid(self.values[1:]) / baseline).filled(np.nan)
+
+    def ratio_frame(self, k):
+        """Ratio sheet for days[k] against days[0]: one column per drug present on both days, or None"""
+        shared = self.present[0].any(axis=1) & self.present[k].any(axis=1)
+        if not shared.any():
+            return None
+        ratios = self.ratios()[k - 1][shared]
+        n_wells = (self.present[0] | self.present[k])[shared].any(axis=0).nonzero()[0].max() + 1
+        return pd.DataFrame(ratios[:, :n_wells].T, columns=[drug for drug, keep in zip(self.drugs, shared) if keep])
+
+    def ratio_records(self, cuboids):
+        """Every ratio sheet in long form: one row per drug and replicate that has a well on either day"""
+        present = self.present[0] | self.present[1:]
+        present &= (self.present[0].any(axis=1) & self.present[1:].any(axis=2))[:, :, None]
+        day_index, drug_index, well_index = np.nonzero(present)
+        return pd.DataFrame({
+            'Cuboids': cuboids,
+            'Day': np.asarray(self.days[1:])[day_index],
+            'Baseline Day': self.days[0],
+            'Drug': np.asarray(self.drugs, dtype=object)[drug_index],
+            'Replicate': well_index + 1,
+            'Ratio': self.ratios()[day_index, drug_index, well_index],
+        }, columns=RATIO_COLUMNS)
+
+    def summary_frame(self, cuboids):
+        """Per (day, drug) well count, mean, SD, CV and fold change of the mean against the baseline day"""
+        values = np.ma.masked_invalid(self.values)
+        wells = self.present.sum(axis=2)
+        mean = values.mean(axis=2)
+        sd = values.std(axis=2, ddof=1)
+        cv = sd / mean
+        fold_change = mean / np.ma.masked_equal(mean[0], 0.0)
+        day_index, drug_index = np.nonzero(wells)
+        return pd.DataFrame({
+            'Cuboids': cuboids,
+            'Day': np.asarray(self.days)[day_index],
+            'Drug': np.asarray(self.drugs, dtype=object)[drug_index],
+            'Wells': wells[day_index, drug_index],
+            'Mean': mean.filled(np.nan)[day_index, drug_index],
+            'SD': sd.filled(np.nan)[day_index, drug_index],
+            'CV': cv.filled(np.nan)[day_index, drug_index],
+            'Baseline Day': self.days[0],
+            'Fold Change': fold_change.filled(np.nan)[day_index, drug_index],
+        }, columns=SUMMARY_COLUMNS)
+
+
+def day_arrays(dosed):
+    """{cuboids: DayArrays} for the rows of the results table that have a drug and a day.
+
+    When several files share a day digit, the last of them is used for that
+    day, as the ratio sheets always have. Cuboid counts keep their order of
+    first appearance.
+    """
+    order = pd.unique(dosed['Cuboids'])
+    pairs = dosed[['File', 'Cuboids', 'Day']].drop_duplicates(['File', 'Cuboids'])
+    chosen = pd.MultiIndex.from_frame(pairs.drop_duplicates(['Cuboids', 'Day'], keep='last')[['File', 'Cuboids']])
+    dosed = dosed[pd.MultiIndex.from_frame(dosed[['File', 'Cuboids']]).isin(chosen)]
+    keys = ['Cuboids', 'Day', 'Drug']
+    wells = pd.DataFrame({
+        'Number': pd.to_numeric(dosed['Value'], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan),
+        'Present': True,
+        'Well': dosed.groupby(keys, sort=False).cumcount().to_numpy(),
+    }, index=pd.MultiIndex.from_frame(dosed[keys].astype({'Day': np.int64})))
+    wells = wells.set_index('Well', append=True)
+
+    arrays = {}
+    for cuboids in order:
+        group = wells.xs(cuboids, level='Cuboids')
+        days = sorted(group.index.unique('Day'))
+        drugs = sorted(group.index.unique('Drug'))
+        n_wells = group.index.get_level_values('Well').max() + 1
+        grid = pd.MultiIndex.from_product([days, drugs, range(n_wells)], names=['Day', 'Drug', 'Well'])
+        group = group.reindex(grid)
+        shape = (len(days), len(drugs), n_wells)
+        arrays[cuboids] = DayArrays(days, drugs,
+                                    group['Number'].to_numpy(dtype=np.float64, na_value=np.nan).reshape(shape),
+                                    group['Present'].notna().to_numpy().reshape(shape))
+    return arrays
+
+
+def ratio_table(day_arrays):
+    """ratio_records of every cuboid count in {cuboids: DayArrays}, as one DataFrame"""
+    return pd.concat([arrays.ratio_records(cuboids) for cuboids, arrays in day_arrays.items()], ignore_index=True)
+
+
+def summary_table(day_arrays):
+    """summary_frame of every cuboid count in {cuboids: DayArrays}, as one DataFrame"""
+    return pd.concat([arrays.summary_frame(cuboids) for cuboids, arrays in day_arrays.items()], ignore_index=True)
@@ -0,0 +1,136 @@
+"""Session files: the loaded workbooks, their plates and all assignment state in one .npz.
+
+Every plate's arrays (raw and corrected values, PlateState arrays) are
+flattened and concatenated per field, so a session of hundreds of plates is
+a dozen arrays plus one JSON header with the shapes, labels, text cells, drug
+names, selections and GUI settings. Nothing is pickled. Opening a session
+rebuilds the plates from these arrays without parsing any workbook.
+
+Each source workbook is recorded with its size, mtime and SHA-256, so
+changed_files can tell which ones were edited or removed since the save.
+"""
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from tecan import cache
+from tecan.plate import Plate
+from tecan.state import PlateState
+
+SESSION_VERSION = 2  # 2 added concentrations; version 1 files open with none annotated
+STATE_FIELDS = {'drug_ids': np.int16, 'cuboids': np.int32, 'flags': np.uint8, 'original_values': np.float64,
+                'order': np.int32, 'concentrations': np.float64}  # PlateState arrays, in from_arrays order
+
+
+def file_record(file_path):
+    stat = os.stat(file_path)
+    return {'path': str(Path(file_path).resolve()), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+            'sha256': cache.file_hash(file_path)}
+
+
+def changed_files(files):
+    """(path, 'missing' or 'modified') for every file record whose workbook is gone or has other content"""
+    changed = []
+    for record in files:
+        try:
+            stat = os.stat(record['path'])
+        except OSError:
+            changed.append((record['path'], 'missing'))
+            continue
+        if stat.st_size == record['size'] and stat.st_mtime_ns == record['mtime_ns']:
+            continue  # Untouched: skip hashing
+        if stat.st_size != record['size'] or cache.file_hash(record['path']) != record['sha256']:
+            changed.append((record['path'], 'modified'))
+    return changed
+
+
+def save_session(file_path, source_files, plates, selections=None, settings=None):
+    """Write a session to file_path (.npz).
+
+    source_files are the workbook paths, plates is {(sheet_name, file_name):
+    Plate or None} in display order (None for sheets that failed to load),
+    selections is {(sheet_name, file_name): set of (row, col)} and settings
+    any JSON-serializable dict of GUI state.
+    """
+    selections = selections or {}
+    meta = {'version': SESSION_VERSION, 'files': [file_record(path) for path in source_files],
+            'settings': settings or {}, 'plates': []}
+    columns = {name: [] for name in ['raw_values', 'corrected_values', *STATE_FIELDS, 'selections']}
+    for (sheet_name, file_name), plate in plates.items():
+        selected = sorted(selections.get((sheet_name, file_name), ()))
+        columns['selections'].append(np.array(selected, dtype=np.int32).reshape(-1, 2))
+        if plate is None:
+            meta['plates'].append({'sheet': sheet_name, 'file': file_name, 'shape': None, 'selected': len(selected)})
+            continue
+        meta['plates'].append({
+            'sheet': sheet_name, 'file': file_name, 'shape': list(plate.shape), 'selected': len(selected),
+            'corrected': plate.corrected_values is not None,
+            'row_labels': list(plate.row_labels), 'col_labels': list(plate.col_labels),
+            'text': [[int(i), int(j), value] for (i, j), value in plate.text.items()],
+            'drug_names': list(plate.state.drug_names),
+        })
+        columns['raw_values'].append(plate.raw_values.ravel())
+        if plate.corrected_values is not None:
+            columns['corrected_values'].append(plate.corrected_values.ravel())
+        for name in STATE_FIELDS:
+            columns[name].append(getattr(plate.state, name).ravel())
+    arrays = {name: np.concatenate(parts) if parts else np.empty(0) for name, parts in columns.items()
+              if name != 'selections'}
+    arrays['selections'] = np.concatenate(columns['selections']) if columns['selections'] else np.empty((0, 2), np.int32)
+    arrays['meta'] = np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8)
+    # Write next to the target and rename, so an interrupted save never leaves a broken session behind
+    file_path = Path(file_path)
+    fd, tmp = tempfile.mkstemp(dir=file_path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp, file_path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def load_session(file_path):
+    """Read a session written by save_session.
+
+    Returns {'files': file records, 'plates': {(sheet_name, file_name): Plate
+    or None}, 'selections': {(sheet_name, file_name): set of (row, col)},
+    'settings': dict}.
+    """
+    with np.load(file_path, allow_pickle=False) as npz:
+        arrays = {name: npz[name] for name in npz.files}
+    meta = json.loads(arrays.pop('meta').tobytes())
+    if meta.get('version') not in (1, SESSION_VERSION):
+        raise ValueError(f"Unsupported session version {meta.get('version')!r} in {file_path}")
+    if 'concentrations' not in arrays:
+        arrays['concentrations'] = np.full(len(arrays['flags']), np.nan)
+    offsets = dict.fromkeys(['raw_values', 'corrected_values', *STATE_FIELDS, 'selections'], 0)
+
+    def take(name, count):
+        start = offsets[name]
+        offsets[name] = start + count
+        return arrays[name][start:start + count]
+
+    plates, selections = {}, {}
+    for entry in meta['plates']:
+        key = (entry['sheet'], entry['file'])
+        selected = take('selections', entry['selected'])
+        if len(selected):
+            selections[key] = set(map(tuple, selected.tolist()))
+        if entry['shape'] is None:
+            plates[key] = None
+            continue
+        shape = tuple(entry['shape'])
+        size = shape[0] * shape[1]
+        plate = Plate(take('raw_values', size).reshape(shape),
+                      {(i, j): value for i, j, value in entry['text']},
+                      entry['row_labels'], entry['col_labels'])
+        if entry['corrected']:
+            plate.corrected_values = take('corrected_values', size).reshape(shape)
+        plate.state = PlateState.from_arrays(*(take(name, size).reshape(shape).astype(dtype)
+                                               for name, dtype in STATE_FIELDS.items()), entry['drug_names'])
+        plates[key] = plate
+    return {'files': meta['files'], 'plates': plates, 'selections': selections, 'settings': meta['settings']}
@@ -0,0 +1,181 @@
+"""Array-backed assignment state of one plate.
+
+Every per-cell attribute is an array over the plate shape: drug ids (int16)
+into an interned table of drug names, cuboid counts (0 for none), a uint8
+bitmask of the assigned / background / removed flags, the value saved when a
+cell was first assigned, the order of first assignment and the drug
+concentration (NaN for none). Bulk queries for export, summaries and
+background subtraction are array operations, and a 1536-well plate takes
+about 40 kB however many cells are assigned.
+"""
+import numpy as np
+
+ASSIGNED = 1  # Cell has an assignment record, possibly without drug or cuboids
+BACKGROUND = 2
+REMOVED = 4  # Cell excluded from analysis and shown as NaN
+NO_DRUG = -1
+MAX_DRUGS = np.iinfo(np.int16).max
+UNCHANGED = object()  # Default of PlateState.assign: leave that attribute as it is
+CELL_STATE = np.dtype([('drug_id', np.int16), ('cuboids', np.int32), ('flags', np.uint8),
+                       ('original_value', np.float64), ('order', np.int32),
+                       ('concentration', np.float64)])  # 27 bytes per cell
+
+
+class PlateState:
+    """Drug, cuboids, background / removed flags and original values of every cell of one plate"""
+    def __init__(self, shape):
+        self.drug_ids = np.full(shape, NO_DRUG, dtype=np.int16)
+        self.cuboids = np.zeros(shape, dtype=np.int32)  # 0 = no cuboid count
+        self.flags = np.zeros(shape, dtype=np.uint8)  # ASSIGNED | BACKGROUND | REMOVED bits
+        self.original_values = np.full(shape, np.nan)  # Saved on first assignment: NaN for empty cells, 0.0 for text
+        self.order = np.zeros(shape, dtype=np.int32)  # Position in assignment order, 0 = never assigned
+        self.concentrations = np.full(shape, np.nan)  # Dose of the cell's drug for curve fitting, NaN = not annotated
+        self.drug_names = []  # Interned drug names, indexed by drug_ids
+        self._drug_index = {}
+        self._next_order = 1
+        self.revision = 0  # Incremented by every edit, so derived tables know when to recompute
+
+    @classmethod
+    def from_arrays(cls, drug_ids, cuboids, flags, original_values, order, concentrations, drug_names):
+        """State rebuilt from saved arrays, e.g. by tecan.session"""
+        state = cls(flags.shape)
+        state.drug_ids[...] = drug_ids
+        state.cuboids[...] = cuboids
+        state.flags[...] = flags
+        state.original_values[...] = original_values
+        state.order[...] = order
+        state.concentrations[...] = concentrations
+        for drug_name in drug_names:
+            state.intern_drug(drug_name)
+        state._next_order = int(order.max(initial=0)) + 1
+        return state
+
+    @property
+    def shape(self):
+        return self.flags.shape
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.drug_ids, self.cuboids, self.flags, self.original_values, self.order,
+                                      self.concentrations))
+
+    @property
+    def assigned(self):
+        return (self.flags & ASSIGNED) != 0
+
+    @property
+    def background(self):
+        return (self.flags & BACKGROUND) != 0
+
+    @property
+    def removed(self):
+        return (self.flags & REMOVED) != 0
+
+    def intern_drug(self, drug_name):
+        """Id of a drug name, added to drug_names on first use; NO_DRUG for None or ''"""
+        if not drug_name:
+            return NO_DRUG
+        if drug_name not in self._drug_index:
+            if len(self.drug_names) >= MAX_DRUGS:
+                raise ValueError(f"More than {MAX_DRUGS} drug names on one plate")
+            self._drug_index[drug_name] = len(self.drug_names)
+            self.drug_names.append(drug_name)
+        return self._drug_index[drug_name]
+
+    def drug_name(self, row, col):
+        drug_id = self.drug_ids[row, col]
+        return self.drug_names[drug_id] if drug_id >= 0 else None
+
+    def drug_table(self):
+        """drug_names as an object array ending in None, so drug_table()[drug_ids] maps NO_DRUG to None"""
+        return np.array(self.drug_names + [None], dtype=object)
+
+    def in_bounds(self, rows, cols):
+        n_rows, n_cols = self.shape
+        return (rows >= 0) & (rows < n_rows) & (cols >= 0) & (cols < n_cols)
+
+    def cells(self, rows, cols):
+        """The in-bounds pairs of rows and cols as intp arrays"""
+        rows, cols = np.asarray(rows, dtype=np.intp).ravel(), np.asarray(cols, dtype=np.intp).ravel()
+        inside = self.in_bounds(rows, cols)
+        return rows[inside], cols[inside]
+
+    def assigned_cells(self):
+        """rows, cols of the assigned cells in the order they were first assigned"""
+        rows, cols = np.nonzero(self.assigned)
+        order = np.argsort(self.order[rows, cols], kind='stable')
+        return rows[order], cols[order]
+
+    def assign(self, rows, cols, original_values, drug=UNCHANGED, cuboids=UNCHANGED, background=UNCHANGED,
+               concentration=UNCHANGED):
+        """Mark cells (all in bounds) as assigned and set the given attributes, each a scalar or one value per cell.
+
+        Cells assigned for the first time get the next positions in assignment
+        order and keep original_values (one per cell) as their saved value.
+        """
+        rows, cols = np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)
+        flat = np.ravel_multi_index((rows, cols), self.shape)
+        _, first = np.unique(flat, return_index=True)
+        first = np.sort(first)
+        first = first[(self.flags.flat[flat[first]] & ASSIGNED) == 0]
+        self.order.flat[flat[first]] = np.arange(self._next_order, self._next_order + len(first))
+        self._next_order += len(first)
+        self.original_values.flat[flat[first]] = np.asarray(original_values, dtype=np.float64)[first]
+        self.flags[rows, cols] |= ASSIGNED
+        if drug is not UNCHANGED:
+            if np.ndim(drug) == 0:
+                self.drug_ids[rows, cols] = self.intern_drug(drug)
+            else:
+                self.drug_ids[rows, cols] = [self.intern_drug(name) for name in drug]
+        if cuboids is not UNCHANGED:
+            self.cuboids[rows, cols] = 0 if cuboids is None else cuboids
+        if background is not UNCHANGED:
+            self.set_flag(rows, cols, BACKGROUND, background)
+        if concentration is not UNCHANGED:
+            self.concentrations[rows, cols] = np.nan if concentration is None else concentration
+        self.revision += 1
+
+    def set_flag(self, rows, cols, bit, on=True):
+        """Set (on True) or clear (on False) one flag bit; on may be one bool per cell"""
+        on = np.broadcast_to(np.asarray(on, dtype=bool), np.shape(rows))
+        self.flags[rows[on], cols[on]] |= bit
+        self.flags[rows[~on], cols[~on]] &= np.uint8(0xFF ^ bit)
+        self.revision += 1
+
+    def clear(self, rows, cols):
+        """Reset drug, cuboids, concentration and background of cells; they stay assigned with their original value"""
+        self.drug_ids[rows, cols] = NO_DRUG
+        self.cuboids[rows, cols] = 0
+        self.concentrations[rows, cols] = np.nan
+        self.set_flag(rows, cols, BACKGROUND, False)
+
+    def reset(self, rows, cols):
+        """Return cells to their never-assigned state"""
+        self.set_cell_state(rows, cols, np.array((NO_DRUG, 0, 0, np.nan, 0, np.nan), dtype=CELL_STATE))
+
+    def cell_state(self, rows, cols):
+        """Every attribute of the given cells packed as a CELL_STATE record array"""
+        states = np.empty(len(rows), dtype=CELL_STATE)
+        states['drug_id'] = self.drug_ids[rows, cols]
+        states['cuboids'] = self.cuboids[rows, cols]
+        states['flags'] = self.flags[rows, cols]
+        states['original_value'] = self.original_values[rows, cols]
+        states['order'] = self.order[rows, cols]
+        states['concentration'] = self.concentrations[rows, cols]
+        return states
+
+    def set_cell_state(self, rows, cols, states):
+        """Write CELL_STATE records (one per cell, or one for all) back into the arrays"""
+        self.drug_ids[rows, cols] = states['drug_id']
+        self.cuboids[rows, cols] = states['cuboids']
+        self.flags[rows, cols] = states['flags']
+        self.original_values[rows, cols] = states['original_value']
+        self.order[rows, cols] = states['order']
+        self.concentrations[rows, cols] = states['concentration']
+        self.revision += 1
+
+
+def cell_arrays(cells):
+    """rows, cols intp arrays of a sequence of (row, col) pairs"""
+    cells = np.asarray(list(cells), dtype=np.intp).reshape(-1, 2)
+    return cells[:, 0], cells[:, 1]
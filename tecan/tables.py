@@ -0,0 +1,75 @@
+"""Vectorized detection of plate tables inside a raw Tecan sheet.
+
+A table starts on the row after a cell containing 'temperature' and stops at
+the first completely empty row (every cell NaN or blank text). The scans use
+column-wise pandas string operations and NumPy masks instead of walking the
+sheet row by row.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _text_column_masks(df, func):
+    # Yield (column position, bool mask) for each column that holds text; func maps a .str accessor to a result
+    for j in range(df.shape[1]):
+        col = df.iloc[:, j]
+        if not (col.dtype == object or isinstance(col.dtype, pd.StringDtype)):
+            continue
+        try:
+            result = func(col.str)
+        except AttributeError:
+            continue  # Object column without any strings
+        yield j, result.to_numpy(dtype=bool, na_value=False)
+
+
+def temperature_rows(df):
+    """Boolean mask of rows with a text cell containing 'temperature' (case-insensitive)"""
+    mask = np.zeros(len(df), dtype=bool)
+    for _, col_mask in _text_column_masks(df, lambda s: s.contains('temperature', case=False, regex=False)):
+        mask |= col_mask
+    return mask
+
+
+def empty_rows(df):
+    """Boolean mask of rows where every cell is NaN or blank text"""
+    blank = df.isna().to_numpy(copy=True)
+    for j, col_mask in _text_column_masks(df, lambda s: s.strip().eq("")):
+        blank[:, j] |= col_mask
+    return blank.all(axis=1)
+
+
+def find_table_start(df):
+    """Find where the actual data table starts: after the row containing 'temperature' (excluding it)"""
+    mask = temperature_rows(df)
+    if mask.any():
+        return int(mask.argmax()) + 1
+    return 0  # Default to start if not found
+
+
+def find_table_end(df, start=0):
+    """Index of the first completely empty row at or after start, or len(df) if there is none"""
+    mask = empty_rows(df.iloc[start:])
+    if mask.any():
+        return start + int(mask.argmax())
+    return len(df)
+
+
+def find_table_blocks(df):
+    """Return (start, end) row ranges of every table in the sheet, in sheet order.
+
+    The first block is the same as find_table_start/find_table_end. Every later
+    'temperature' row that falls after the end of the previous block starts
+    another block, e.g. absorbance and fluorescence plates stacked in one sheet.
+    """
+    starts = np.flatnonzero(temperature_rows(df)) + 1
+    if len(starts) == 0:
+        starts = np.array([0])
+    empty_idx = np.flatnonzero(empty_rows(df))
+    blocks = []
+    for start in starts:
+        if blocks and start <= blocks[-1][1]:
+            continue  # 'temperature' text inside the previous table
+        pos = np.searchsorted(empty_idx, start)
+        end = int(empty_idx[pos]) if pos < len(empty_idx) else len(df)
+        blocks.append((int(start), end))
+    return blocks
@@ -0,0 +1,61 @@
+"""Row-streaming .xlsx writer for result workbooks.
+
+pd.ExcelWriter(engine='openpyxl') keeps every cell of every sheet in memory
+until the workbook is saved. StreamingWorkbook uses openpyxl's write-only mode
+instead: each sheet is written row by row to a temporary file as soon as its
+DataFrame is ready, so memory stays bounded by the largest single DataFrame.
+Cells come out the way DataFrame.to_excel(index=False) writes them: a header
+row of column names, NaN as an empty cell and infinities as 'inf' / '-inf'.
+"""
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+MAX_SHEET_NAME = 31  # Excel's limit on sheet name length
+
+
+def _column_cells(column):
+    """Values of one column as Python objects ready for openpyxl (None for missing)"""
+    values = column.to_numpy(dtype=object, copy=True)
+    if pd.api.types.is_float_dtype(column.dtype):
+        floats = column.to_numpy(dtype=np.float64, na_value=np.nan)
+        values[np.isposinf(floats)] = 'inf'
+        values[np.isneginf(floats)] = '-inf'
+    values[pd.isna(column).to_numpy()] = None
+    return values
+
+
+class StreamingWorkbook:
+    """Write-only workbook; use as a context manager and call write_frame once per sheet"""
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.workbook = Workbook(write_only=True)
+        self.sheet_names = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.workbook.save(self.file_path)
+        else:
+            self.discard()
+        return False
+
+    def discard(self):
+        """Close the sheets written so far and delete their temporary files, without saving"""
+        for sheet in self.workbook.worksheets:
+            if not sheet.closed:
+                sheet.close()
+            if sheet._writer is not None:  # openpyxl keeps each write-only sheet in a temporary file until save
+                sheet._writer.cleanup()
+
+    def write_frame(self, sheet_name, df):
+        """Append df as a new sheet: header row, then one row per record (like to_excel(index=False))"""
+        sheet = self.workbook.create_sheet(title=str(sheet_name)[:MAX_SHEET_NAME])
+        self.sheet_names.append(sheet.title)
+        sheet.append([None if pd.isna(name) else name for name in df.columns])
+        columns = [_column_cells(df.iloc[:, j]) for j in range(df.shape[1])]
+        for row in zip(*columns):
+            sheet.append(row)
+        return sheet
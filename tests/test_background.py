@@ -0,0 +1,73 @@
+"""Background levels and corrected values of tecan.background."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import numpy as np
+import pytest
+
+from tecan import background
+from tecan.plate import Plate
+
+nan = np.nan
+
+
+def background_plate():
+    # Background wells (0, 0) = 1, (0, 1) = 3, (1, 0) = 5 and (2, 3) = NaN; (1, 1) = 100 is removed
+    plate = Plate(np.array([[1.0, 3.0, 10.0, 20.0],
+                            [5.0, 100.0, 30.0, 40.0],
+                            [50.0, 60.0, 70.0, nan]]))
+    plate.assign([0, 0, 1, 1, 2], [0, 1, 0, 1, 3], is_background=True)
+    plate.remove_cells([1], [1])
+    return plate
+
+
+def test_background_mask_skips_removed_wells():
+    mask = background.background_mask(background_plate())
+    assert list(zip(*np.nonzero(mask))) == [(0, 0), (0, 1), (1, 0), (2, 3)]
+
+
+def test_plate_levels():
+    plate = background_plate()
+    assert background.subtract_background(plate) == pytest.approx(3.0)
+    np.testing.assert_allclose(plate.corrected_values, plate.raw_values - 3.0, equal_nan=True)
+    assert background.subtract_background(plate, statistic='median') == pytest.approx(3.0)
+    plate.raw_values[1, 0] = 11.0
+    assert background.subtract_background(plate) == pytest.approx(5.0)
+    assert background.subtract_background(plate, statistic='median') == pytest.approx(3.0)
+
+
+def test_row_and_column_levels():
+    plate = background_plate()
+    # Rows: mean of 1 and 3, then 5, then only NaN (left unchanged); columns: mean of 1 and 5, then 3, then none
+    level = background.subtract_background(plate, mode='row')
+    np.testing.assert_allclose(level, [[2.0], [5.0], [0.0]])
+    np.testing.assert_allclose(plate.corrected_values[:, 2], [8.0, 25.0, 70.0])
+    level = background.subtract_background(plate, mode='column', statistic='median')
+    np.testing.assert_allclose(level, [[3.0, 3.0, 0.0, 0.0]])
+    np.testing.assert_allclose(plate.corrected_values[1], [2.0, 97.0, 30.0, 40.0])
+
+
+def test_raw_values_are_kept_and_clear_restores_them():
+    plate = background_plate()
+    raw = plate.raw_values.copy()
+    background.subtract_background(plate, mode='row')
+    np.testing.assert_array_equal(plate.raw_values, raw)
+    assert plate.cell_text(0, 2) == "8.0000" and plate.cell_text(0, 2, corrected=False) == "10.0"
+    background.clear_background(plate)
+    assert plate.corrected_values is None and plate.cell_text(0, 2) == "10.0"
+
+
+def test_no_background_wells_leave_values_unchanged():
+    plate = Plate(np.arange(6.0).reshape(2, 3))
+    assert background.subtract_background(plate) == 0.0
+    np.testing.assert_array_equal(plate.corrected_values, plate.raw_values)
+
+
+def test_unknown_mode_and_statistic():
+    plate = background_plate()
+    with pytest.raises(ValueError):
+        background.subtract_background(plate, mode='well')
+    with pytest.raises(ValueError):
+        background.subtract_background(plate, statistic='mode')
@@ -0,0 +1,61 @@
+"""Parse cache: what is stored, and cached tables staying memory-mapped through load_workbooks."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'benchmarks'))
+
+import numpy as np
+import pandas as pd
+
+from synthetic import write_kinetic_workbook, write_tecan_workbook
+from tecan import cache, engine, loader
+
+
+def is_memory_mapped(array):
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = array.base
+    return False
+
+
+def test_results_with_errors_are_not_stored(tmp_path):
+    table = pd.DataFrame({'<>': ['A'], 1: [0.5]})
+    cache.store(tmp_path, 'bad', ('plate.xlsx', [('Plate_1', table), ('Plate_2', None)], ["Error loading Plate_2"], []))
+    assert cache.lookup(tmp_path, 'bad') is None
+    cache.store(tmp_path, 'good', ('plate.xlsx', [('Plate_1', table)], [], []))
+    file_name, sheets, errors, kinetics = cache.lookup(tmp_path, 'good')
+    assert (file_name, errors) == ('plate.xlsx', []) and sheets[0][1].equals(table)
+
+
+def test_cached_workbooks_are_read_in_the_calling_process(tmp_path):
+    path = write_tecan_workbook(str(tmp_path / "exp_day1.xlsx"), n_sheets=2)
+    cache_dir = tmp_path / "cache"
+    assert cache.cached_result(path, cache_dir) is None
+    first = engine.load_workbooks([path], workers=1, cache_dir=cache_dir)
+    key, (file_name, sheets, errors, kinetics) = cache.cached_result(path, cache_dir)
+    assert file_name == "exp_day1.xlsx" and not errors
+
+    second = engine.load_workbooks([path], workers=1, cache_dir=cache_dir)
+    expected = dict(((sheet_name, file_name), table) for sheet_name, table in loader.load_workbook(path)[1])
+    assert list(first) == list(second) == list(expected)
+    for key, table in second.items():
+        assert table.equals(expected[key]) and first[key].equals(expected[key])
+        assert is_memory_mapped(table.iloc[:, 1].to_numpy())
+
+
+def test_kinetic_cycles_come_from_the_load_pass_and_the_cache(tmp_path):
+    path = write_kinetic_workbook(str(tmp_path / "kinetic_day1.xlsx"), n_sheets=2, n_cycles=5)
+    cache_dir = tmp_path / "cache"
+    _, sheets, _, expected = loader.load_workbook(path)
+    assert [name for name, _ in expected] == [name for name, _ in sheets] == ["Plate_1", "Plate_2"]
+    for attempt in range(2):  # Parsed in a worker, then read from the cache
+        kinetics = {}
+        engine.load_workbooks([path], workers=1, cache_dir=cache_dir, kinetics=kinetics)
+        assert list(kinetics) == [(name, "kinetic_day1.xlsx") for name, _ in expected]
+        for (name, read), cached in zip(expected, kinetics.values()):
+            assert cached.values.shape == (5, 8, 12) and np.array_equal(cached.values, read.values, equal_nan=True)
+            assert np.array_equal(cached.times, read.times) and cached.blocks == read.blocks
+            assert (cached.row_labels, cached.col_labels) == (read.row_labels, read.col_labels)
+    assert is_memory_mapped(cached.values)
@@ -0,0 +1,86 @@
+"""Datasets written by tecan.columnar read back with the same rows."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tecan import columnar, ratios
+
+ds = pytest.importorskip('pyarrow.dataset')
+
+
+def results_frame():
+    # Rows shaped like engine.results_frame over two days, two cuboid counts and a file without a day digit
+    n = 24
+    rng = np.random.default_rng(0)
+    values = rng.uniform(size=n)
+    values[5] = np.nan
+    return pd.DataFrame({
+        'File': [f"exp_day{1 + 2 * (k % 2)}.xlsx" if k < 20 else "extra.xlsx" for k in range(n)],
+        'Sheet': [f"Plate_{k % 3}" for k in range(n)],
+        'Well': [f"A{k + 1}" for k in range(n)],
+        'Row': np.ones(n, dtype=np.int64),
+        'Column': np.arange(1, n + 1),
+        'Day': pd.array([1 + 2 * (k % 2) if k < 20 else None for k in range(n)], dtype='Int64'),
+        'Drug': [f"Drug{k % 4}" if k % 5 else None for k in range(n)],
+        'Cuboids': pd.array([2 + 3 * (k % 3 == 0) for k in range(n)], dtype='Int64'),
+        'Concentration': np.where(np.arange(n) % 2, 0.1 * np.arange(n), np.nan),
+        'Value': values,
+        'Raw': values + 0.05,
+        'Corrected': values,
+        'Background': np.arange(n) % 7 == 0,
+    })
+
+
+def read_back(directory, columns, file_format='parquet', order='Well'):
+    df = ds.dataset(str(directory), format=file_format, partitioning='hive').to_table().to_pandas()[columns]
+    return df.sort_values(order).reset_index(drop=True)
+
+
+def assert_same_rows(actual, expected):
+    expected = expected.sort_values(['Well']).reset_index(drop=True)
+    for name in ['Day', 'Cuboids']:
+        expected[name] = expected[name].astype('Float64')
+        actual[name] = actual[name].astype('Float64')
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False, check_exact=True)
+
+
+@pytest.mark.parametrize('file_format, suffix', [('parquet', '.parquet'), ('ipc', '.arrow')])
+def test_results_dataset_reads_back_the_same_rows(tmp_path, file_format, suffix):
+    results = results_frame()
+    columnar.write_results(results, {}, tmp_path, file_format)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['results']
+    partitions = sorted(str(path.parent.relative_to(tmp_path / 'results')) for path in (tmp_path / 'results').rglob('*' + suffix))
+    assert 'Day=1/Cuboids=2' in partitions and 'Day=3/Cuboids=5' in partitions and len(partitions) == 6
+    assert_same_rows(read_back(tmp_path / 'results', columnar.RESULT_TABLE_COLUMNS, file_format),
+                     results[columnar.RESULT_TABLE_COLUMNS])
+
+
+def test_rewriting_replaces_matching_partitions(tmp_path):
+    results = results_frame()
+    columnar.write_dataset(results, tmp_path, 'parquet')
+    day_one = results[results['Day'] == 1].assign(Value=-1.0)
+    columnar.write_dataset(day_one, tmp_path, 'parquet')
+    # Day 1 partitions now hold only the new rows; day 3 and the rows without a day are untouched
+    expected = pd.concat([results[results['Day'].fillna(0) != 1], day_one])
+    assert_same_rows(read_back(tmp_path, list(results.columns)), expected[list(results.columns)])
+
+
+def test_ratio_tables(tmp_path):
+    dosed = pd.DataFrame({'File': ['d1.xlsx'] * 2 + ['d3.xlsx'] * 2, 'Cuboids': 2, 'Day': [1, 1, 3, 3],
+                          'Drug': 'DrugA', 'Value': [1.0, 2.0, 3.0, 3.0]})
+    day_arrays = ratios.day_arrays(dosed)
+    columnar.write_results(results_frame(), day_arrays, tmp_path, 'parquet')
+    ratio_rows = read_back(tmp_path / 'ratios', ratios.RATIO_COLUMNS, order='Replicate')
+    np.testing.assert_array_equal(ratio_rows['Ratio'], [3.0, 1.5])
+    summary = ds.dataset(str(tmp_path / 'ratio_summary'), partitioning='hive').to_table().to_pandas()
+    assert len(summary) == 2 and sorted(summary['Mean']) == [1.5, 3.0]
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError, match="Unknown columnar format"):
+        columnar.write_dataset(results_frame(), tmp_path, 'csv')
@@ -0,0 +1,62 @@
+"""4PL fits of tecan.doseresponse on curves with known parameters and on flat responses."""
+import os
+import sys
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import numpy as np
+import pandas as pd
+
+from tecan import doseresponse
+
+CONCENTRATIONS = np.repeat(10.0 ** (np.arange(10) / 2 - 3), 3)  # 1 nM to ~32 uM, half-log steps, triplicates
+
+
+def dosed(groups):
+    # {drug: responses at CONCENTRATIONS} as engine.dosed_results rows
+    frames = [pd.DataFrame({'Cuboids': 2, 'Day': 1, 'Drug': drug, 'Concentration': CONCENTRATIONS, 'Value': values})
+              for drug, values in groups.items()]
+    table = pd.concat(frames, ignore_index=True)
+    table['Day'] = table['Day'].astype('Int64')
+    return table
+
+
+def test_known_sigmoids_are_recovered():
+    rng = np.random.default_rng(1)
+    log_x = np.log10(CONCENTRATIONS)
+    rising = doseresponse.logistic(log_x, (0.1, 2.0, -1.0, 1.5)) + rng.normal(0, 0.01, log_x.size)
+    falling = doseresponse.logistic(log_x, (0.2, 1.2, -2.5, -0.8)) + rng.normal(0, 0.01, log_x.size)
+    fits = doseresponse.fit_curves(dosed({'Rising': rising, 'Falling': falling}), workers=1).set_index('Drug')
+    assert fits['Converged'].all()
+    np.testing.assert_allclose(fits.loc['Rising', ['Bottom', 'Top', 'EC50', 'Hill Slope']].astype(float),
+                               [0.1, 2.0, 0.1, 1.5], rtol=0.1, atol=0.02)
+    np.testing.assert_allclose(fits.loc['Falling', ['Bottom', 'Top', 'EC50', 'Hill Slope']].astype(float),
+                               [0.2, 1.2, 10 ** -2.5, -0.8], rtol=0.1, atol=0.02)
+    assert (fits['R2'] > 0.99).all()
+
+
+def test_flat_responses_are_not_converged():
+    rng = np.random.default_rng(2)
+    groups = {'Constant': np.full(CONCENTRATIONS.size, 0.8)}
+    groups.update({f"Noise{k}": 0.8 + rng.normal(0, 0.02, CONCENTRATIONS.size) for k in range(5)})
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        fits = doseresponse.fit_curves(dosed(groups), workers=1)
+    assert not fits['Converged'].any()
+    assert fits['EC50'].isna().all() and fits['Hill Slope'].isna().all()
+    assert not np.isinf(fits[['Bottom', 'Top', 'R2']].to_numpy(dtype=float)).any()
+
+
+def test_midpoint_beyond_tested_range_is_not_converged():
+    log_x = np.log10(CONCENTRATIONS)
+    params, r2, converged = doseresponse.fit_4pl(log_x, doseresponse.logistic(log_x, (0.0, 1.0, 4.0, 1.0)),
+                                                 (0.0, 1.0, 0.0, 1.0))
+    assert not converged and np.isnan(params[2]) and np.isnan(params[3])
+    lower, upper = doseresponse.fit_bounds(log_x)
+    assert lower[2] == log_x.min() - doseresponse.EC50_MARGIN and upper[3] == doseresponse.MAX_HILL
+
+
+def test_too_few_concentrations_give_nan():
+    fits = doseresponse.fit_curves(dosed({'Short': np.linspace(0, 1, CONCENTRATIONS.size)}).head(9), workers=1)
+    assert fits.loc[0, 'Concentrations'] == 3 and np.isnan(fits.loc[0, 'EC50']) and not fits.loc[0, 'Converged']
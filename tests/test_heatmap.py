@@ -0,0 +1,47 @@
+"""Colour mapping of tecan.heatmap for the plate overview."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import numpy as np
+
+from tecan import heatmap
+
+nan = np.nan
+
+
+def test_colormap_runs_from_the_first_to_the_last_anchor():
+    colors = heatmap.COLORMAP
+    assert colors.dtype == np.uint32 and len(colors) == 256
+    assert colors[0] == 0xFF440154 and colors[-1] == 0xFFFDE725  # Viridis (68, 1, 84) and (253, 231, 37)
+    assert ((colors >> 24) == 0xFF).all()
+
+
+def test_min_max_and_midpoint():
+    pixels = heatmap.heatmap_argb([[0.0, 10.0], [5.0, 2.5]], 0.0, 10.0)
+    assert pixels[0, 0] == heatmap.COLORMAP[0] and pixels[0, 1] == heatmap.COLORMAP[255]
+    assert pixels[1, 0] == heatmap.COLORMAP[128] and pixels[1, 1] == heatmap.COLORMAP[64]  # rint(127.5), rint(63.75)
+
+
+def test_values_outside_the_range_saturate():
+    pixels = heatmap.heatmap_argb([[-5.0, 100.0]], 0.0, 10.0)
+    assert pixels.tolist() == [[heatmap.COLORMAP[0], heatmap.COLORMAP[255]]]
+
+
+def test_missing_and_removed_wells_are_gray():
+    removed = np.array([[False, False, True], [False, False, False]])
+    pixels = heatmap.heatmap_argb([[nan, np.inf, 3.0], [-np.inf, 1.0, nan]], 0.0, 4.0, removed)
+    assert pixels.dtype == np.uint32 and pixels.flags['C_CONTIGUOUS'] and pixels.shape == (2, 3)
+    assert pixels[0, 0] == pixels[0, 1] == pixels[1, 0] == pixels[1, 2] == heatmap.MISSING_COLOR
+    assert pixels[0, 2] == heatmap.REMOVED_COLOR
+    assert pixels[1, 1] == heatmap.COLORMAP[64]
+
+
+def test_color_range():
+    plates = [np.arange(101.0).reshape(1, -1), np.array([[nan, np.inf]])]
+    assert heatmap.color_range(plates) == (2.0, 98.0)
+    assert heatmap.color_range(plates, 0, 100) == (0.0, 100.0)
+    assert heatmap.color_range([np.full((2, 2), 3.0)]) == (3.0, 4.0)  # One value: a unit-wide scale
+    assert heatmap.color_range([np.array([[nan]])]) == (0.0, 1.0)
+    assert heatmap.color_range([]) == (0.0, 1.0)
@@ -0,0 +1,75 @@
+"""Undo and redo of tecan.history commands, including the background correction they drop."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import numpy as np
+
+from tecan import background
+from tecan.history import History
+from tecan.plate import Plate
+
+
+def corrected_plate():
+    plate = Plate(np.arange(1.0, 13.0).reshape(3, 4))
+    plate.assign([0, 0], [0, 1], is_background=True)
+    plate.assign([1, 2], [2, 3], drug="DrugA", cuboids=2)
+    background.subtract_background(plate)
+    return plate
+
+
+def test_clear_all_undo_restores_assignments_and_correction():
+    plate = corrected_plate()
+    corrected = plate.corrected_values
+    drug_ids, flags = plate.state.drug_ids.copy(), plate.state.flags.copy()
+    history = History()
+    rows, cols = np.nonzero(plate.state.assigned | plate.state.removed)
+
+    def edit():
+        plate.state.reset(rows, cols)
+        background.clear_background(plate)
+    history.record("Clear All Assignments", [(plate, rows, cols)], edit)
+    assert plate.corrected_values is None and not plate.state.assigned.any()
+
+    history.undo()
+    assert plate.corrected_values is corrected
+    assert np.array_equal(plate.state.drug_ids, drug_ids) and np.array_equal(plate.state.flags, flags)
+    assert plate.cell_text(1, 2) == f"{corrected[1, 2]:.4f}"
+
+    history.redo()
+    assert plate.corrected_values is None and not plate.state.assigned.any()
+
+
+def test_correction_change_alone_is_a_command():
+    plate = corrected_plate()
+    history = History()
+    command = history.record("Clear Background", [(plate, np.empty(0, int), np.empty(0, int))],
+                             lambda: background.clear_background(plate))
+    assert command is not None and command.n_cells == 0
+    revision = plate.revision
+    history.undo()
+    assert plate.corrected_values is not None and plate.revision != revision
+
+
+def test_undo_after_a_newer_subtraction_keeps_corrections_in_order():
+    plate = corrected_plate()
+    first = plate.corrected_values
+    history = History()
+    rows, cols = np.nonzero(plate.state.assigned)
+
+    def clear():
+        plate.state.reset(rows, cols)
+        background.clear_background(plate)
+    history.record("Clear All Assignments", [(plate, rows, cols)], clear)
+    plate.assign([2], [0], is_background=True)
+    history.record("Subtract Background", [(plate, [], [])], lambda: background.subtract_background(plate, 'row'))
+    second = plate.corrected_values
+
+    assert history.undo().name == "Subtract Background"
+    assert plate.corrected_values is None
+    assert history.undo().name == "Clear All Assignments"
+    assert plate.corrected_values is first
+    history.redo()
+    history.redo()
+    assert plate.corrected_values is second
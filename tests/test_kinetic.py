@@ -0,0 +1,57 @@
+"""tecan.kinetic.curve_metrics on analytic curves with known slope, area and crossing time."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import numpy as np
+
+from tecan import kinetic
+
+nan = np.nan
+TIMES = np.arange(0.0, 101.0, 10.0)  # 11 cycles, 10 s apart
+
+
+def curves():
+    # (cycles, 2, 2): a ramp 0.5 + 0.02 t, a step from 0 to 1 at t = 50, a flat 0.2 and the ramp with cycle 3 missing
+    ramp = 0.5 + 0.02 * TIMES
+    step = np.where(TIMES >= 50, 1.0, 0.0)
+    gap = ramp.copy()
+    gap[3] = nan
+    return np.stack([np.column_stack([ramp, step]), np.column_stack([np.full_like(TIMES, 0.2), gap])], axis=1)
+
+
+def test_metrics_of_analytic_curves():
+    values = curves()
+    metrics = kinetic.curve_metrics(values, TIMES, threshold=1.0)
+    assert list(metrics) == kinetic.METRIC_COLUMNS
+    step_slope = np.polyfit(TIMES, values[:, 0, 1], 1)[0]
+    np.testing.assert_allclose(metrics['Slope'], [[0.02, step_slope], [0.0, 0.02]], atol=1e-12)
+    # Ramp: 0.5 * 100 + 0.01 * 100 ** 2; step: half of the 40-50 s interval plus 50 s at 1; flat: 0.2 * 100
+    np.testing.assert_allclose(metrics['AUC'], [[150.0, 55.0], [20.0, nan]], equal_nan=True)
+    np.testing.assert_allclose(metrics['Max'], [[2.5, 1.0], [0.2, 2.5]])
+    # The ramp reaches 1.0 at 25 s, between the cycles at 20 and 30 s; the flat well never does, and
+    # with the 30 s reading missing the gapped ramp is first seen above it at 40 s
+    np.testing.assert_allclose(metrics['Time to Threshold'], [[25.0, 50.0], [nan, 40.0]], equal_nan=True)
+
+
+def test_half_maximum_threshold():
+    metrics = kinetic.curve_metrics(curves(), TIMES)
+    # Half-maximum of the ramp is 1.5 (t = 50), of the step 0.5 (interpolated to t = 45); a flat well reaches its own at t = 0
+    np.testing.assert_allclose(metrics['Time to Threshold'], [[50.0, 45.0], [0.0, 50.0]])
+
+
+def test_threshold_per_well_and_after_a_missing_reading():
+    values = curves()
+    metrics = kinetic.curve_metrics(values, TIMES, threshold=np.array([[3.0, 0.0], [0.1, 1.1]]))
+    # 3.0 is above the ramp's maximum; 1.1 is first reached at cycle 4 (1.3), right after the missing reading, with no interpolation
+    np.testing.assert_allclose(metrics['Time to Threshold'], [[nan, 0.0], [0.0, 40.0]], equal_nan=True)
+
+
+def test_missing_times_use_the_cycle_index_and_empty_wells_are_nan():
+    values = curves()
+    values[:, 1, 0] = nan
+    metrics = kinetic.curve_metrics(values, np.full(len(TIMES), nan), threshold=1.0)
+    np.testing.assert_allclose(metrics['Slope'][0, 0], 0.2)
+    np.testing.assert_allclose(metrics['Time to Threshold'][0, 0], 2.5)
+    assert all(np.isnan(metric[1, 0]) for metric in metrics.values())
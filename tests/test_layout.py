@@ -0,0 +1,86 @@
+"""Reading, validating, saving and applying tecan.layout plate layouts."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tecan import layout
+from tecan.plate import Plate
+
+
+def write(tmp_path, text, name="layout.csv"):
+    path = tmp_path / name
+    path.write_text(text)
+    return str(path)
+
+
+def test_read_csv_with_wells_and_flags(tmp_path):
+    df = layout.read_layout(write(tmp_path, "Well,Drug,Cuboids,Concentration,Background,Removed\n"
+                                            "B7,DrugA,3,0.5,,\n"
+                                            " aa12 ,,,,yes,\n"
+                                            "A1,DrugB,x,,no,X\n"))
+    assert df['Row'].tolist() == [2, 27, 1] and df['Column'].tolist() == [7, 12, 1]
+    assert df['Drug'].tolist() == ['DrugA', None, 'DrugB']
+    assert df['Cuboids'].tolist()[0] == 3 and df['Cuboids'].isna().tolist() == [False, True, True]
+    assert df['Background'].tolist() == [False, True, False] and df['Removed'].tolist() == [False, False, True]
+    np.testing.assert_array_equal(df['Concentration'], [0.5, np.nan, np.nan])
+
+
+@pytest.mark.parametrize('text, message', [
+    ("Drug,Cuboids\nDrugA,3\n", "missing column(s): Row, Column"),
+    ("Row,Drug\n1,DrugA\n", "missing column(s): Column"),
+    ("Well,Drug\nB7,DrugA\n7B,DrugB\n", "Invalid well name: '7B'"),
+    ("Well,Drug\nB,DrugA\n", "Invalid well name: 'B'"),
+])
+def test_csv_errors(tmp_path, text, message):
+    with pytest.raises(ValueError, match=message.replace('(', r'\(').replace(')', r'\)')):
+        layout.read_layout(write(tmp_path, text))
+
+
+def test_letter_rows_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        layout.read_layout(write(tmp_path, "Row,Column,Drug\nB,7,DrugA\n"))
+
+
+def test_unsupported_file_type(tmp_path):
+    with pytest.raises(ValueError, match="Unsupported layout file type"):
+        layout.read_layout(write(tmp_path, "Row,Column\n1,1\n", "layout.txt"))
+
+
+def test_well_names_round_trip():
+    for row, col in [(0, 0), (7, 11), (25, 3), (26, 0), (701, 47), (702, 1)]:
+        assert layout.parse_well(layout.well_name(row, col)) == (row + 1, col + 1)
+    assert layout.well_name(26, 0) == "AA1"
+
+
+@pytest.mark.parametrize('suffix', ['.csv', '.json'])
+def test_template_round_trip_and_apply(tmp_path, suffix):
+    plate = Plate(np.arange(12.0).reshape(3, 4))
+    plate.assign([0, 1], [0, 3], drug="DrugA", cuboids=2, concentration=[1.0, np.nan])
+    plate.assign([2], [1], is_background=True)
+    plate.remove_cells([2], [3])
+    template = layout.layout_from_plate(plate)
+    path = str(tmp_path / f"template{suffix}")
+    layout.write_layout(template, path)
+    df = layout.read_layout(path)
+
+    target = Plate(np.arange(12.0).reshape(3, 4))
+    changed = layout.apply_layout(target, df)
+    assert changed == [(0, 0), (1, 3), (2, 1), (2, 3)]
+    for name in ['drug_ids', 'cuboids', 'flags', 'concentrations']:
+        np.testing.assert_array_equal(getattr(target.state, name), getattr(plate.state, name))
+
+
+def test_sheet_rows_duplicates_and_wells_outside_the_plate():
+    df = layout.normalize_layout(pd.DataFrame({
+        'Row': [1, 1, 2, 9], 'Column': [1, 1, 2, 1], 'Drug': ['Old', 'New', 'Other', 'Outside'],
+        'Sheet': [None, None, 'Plate_2', None]}))
+    plate = Plate(np.zeros((2, 2)))
+    assert layout.apply_layout(plate, df, 'Plate_1') == [(0, 0)]
+    assert plate.state.drug_name(0, 0) == 'New' and not plate.state.assigned[1, 1]
+    assert layout.apply_layout(plate, df, 'Plate_2') == [(0, 0), (1, 1)]
+    assert plate.state.drug_name(1, 1) == 'Other'
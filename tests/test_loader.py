@@ -0,0 +1,32 @@
+"""Parsing sheets one by one or in batches gives the tables of a whole-workbook parse."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'benchmarks'))
+
+from synthetic import write_tecan_workbook
+from tecan import loader
+
+
+def test_load_sheets_matches_load_workbook(tmp_path):
+    path = write_tecan_workbook(str(tmp_path / "exp_day1.xlsx"), n_sheets=4)
+    _, sheets, errors, _ = loader.load_workbook(path)
+    names = loader.list_sheets(path)
+    batch = loader.load_sheets(path, names[::-1])
+    assert [result[1] for result in batch] == names[::-1] and not errors
+    parsed = {sheet_name: tables for _, sheet_name, tables, _, _ in batch}
+    in_order = [table for name in names for table in parsed[name]]
+    assert [name for name, _ in in_order] == [name for name, _ in sheets]
+    assert all(a.equals(b) for (_, a), (_, b) in zip(in_order, sheets))
+    single = loader.load_sheet(path, names[1])
+    assert single[2][0][1].equals(sheets[1][1])
+
+
+def test_load_sheets_reports_an_unreadable_workbook(tmp_path):
+    path = tmp_path / "broken.xlsx"
+    path.write_bytes(b"not a workbook")
+    results = loader.load_sheets(str(path), ["Plate_1", "Plate_2"])
+    assert [(sheet_name, tables) for _, sheet_name, tables, _, _ in results] == [("Plate_1", [("Plate_1", None)]),
+                                                                                  ("Plate_2", [("Plate_2", None)])]
+    assert all(len(errors) == 1 for _, _, _, errors, _ in results)
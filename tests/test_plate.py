@@ -0,0 +1,19 @@
+"""Value text of Plate cells, which the table view and the exports show."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import numpy as np
+
+from tecan.plate import Plate
+
+
+def test_cell_text_matches_str_of_the_value():
+    values = np.array([[1.0, 0.1, 1e20, np.nan, np.nan]])
+    plate = Plate(values, {(0, 3): "OVER"})
+    expected = [str(v) for v in values[0, :3].tolist()] + ["OVER", None]
+    assert [plate.cell_text(0, j) for j in range(5)] == expected == ['1.0', '0.1', '1e+20', 'OVER', None]
+    assert list(plate.cell_texts([0] * 5, range(5))) == expected
+    plate.remove_cells([0], [0])
+    assert plate.cell_text(0, 0) == plate.cell_texts([0], [0])[0] == "NaN"
@@ -0,0 +1,80 @@
+"""tecan.profiling records nothing unless TECAN_PROFILE is set."""
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.insert(0, ROOT)
+
+import pytest
+
+from tecan import profiling
+
+
+def profiler_from(monkeypatch, setting):
+    registered = []
+    monkeypatch.setattr(profiling.atexit, 'register', lambda *args: registered.append(args))
+    if setting is None:
+        monkeypatch.delenv(profiling.ENV_VAR, raising=False)
+    else:
+        monkeypatch.setenv(profiling.ENV_VAR, setting)
+    return profiling._from_environment(), registered
+
+
+@pytest.mark.parametrize('setting', [None, '', '0', 'off', 'False', ' no '])
+def test_off_unless_set(monkeypatch, setting):
+    profiler, registered = profiler_from(monkeypatch, setting)
+    assert not profiler.enabled and not registered
+    with profiler.span('load', files=3) as s:
+        s.set(rows=10)
+    profiler.record('paint', 0, 5)
+    assert s is profiling._NULL_SPAN and len(profiler.spans) == 0 and profiler.summary() == []
+
+
+@pytest.mark.parametrize('setting', ['1', 'yes', 'on'])
+def test_on_when_set(monkeypatch, setting):
+    profiler, registered = profiler_from(monkeypatch, setting)
+    assert profiler.enabled and not registered
+    with pytest.raises(KeyError):
+        with profiler.span('load', files=3) as s:
+            s.set(rows=10)
+            raise KeyError('sheet')
+    (name, _, duration, _, args), = profiler.spans
+    assert name == 'load' and duration >= 0 and args == {'files': 3, 'rows': 10, 'error': 'KeyError'}
+
+
+def test_json_path_writes_a_trace_at_exit(monkeypatch, tmp_path):
+    path = str(tmp_path / "trace.json")
+    profiler, registered = profiler_from(monkeypatch, path)
+    assert profiler.enabled and registered == [(profiler.write_chrome_trace, path)]
+    profiler.record('export', profiler.origin + 2_000_000, 3_000_000, rows=4)
+    profiler.write_chrome_trace(path)
+    with open(path) as f:
+        (event,) = json.load(f)['traceEvents']
+    assert (event['name'], event['ph'], event['ts'], event['dur'], event['args']) == ('export', 'X', 2000.0, 3000.0, {'rows': 4})
+
+
+def test_module_profiler_is_off_in_a_fresh_process():
+    env = {key: value for key, value in os.environ.items() if key != profiling.ENV_VAR}
+    env['PYTHONPATH'] = ROOT
+    code = ("from tecan import profiling\n"
+            "with profiling.span('load') as s: pass\n"
+            "print(profiling.PROFILER.enabled, s is profiling._NULL_SPAN, len(profiling.PROFILER.spans))")
+    output = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True).stdout
+    assert output.split() == ['False', 'True', '0']
+
+
+def test_errors_are_kept_while_off(capsys):
+    profiler = profiling.Profiler()
+    profiler.error("Error loading Plate_1 from day1.xlsx: bad zip")
+    assert [message for _, message in profiler.errors] == ["Error loading Plate_1 from day1.xlsx: bad zip"]
+    assert "bad zip" in capsys.readouterr().err
+
+
+def test_summary():
+    profiler = profiling.Profiler(enabled=True)
+    for duration in (1_000_000, 3_000_000):
+        profiler.record('paint', 0, duration)
+    profiler.record('export', 0, 10_000_000)
+    assert profiler.summary() == [('export', 1, 10.0, 10.0, 10.0), ('paint', 2, 4.0, 2.0, 3.0)]
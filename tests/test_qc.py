@@ -0,0 +1,75 @@
+"""tecan.qc on a 4x4 plate whose robust z-scores, Z' and edge effects can be worked out by hand."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import numpy as np
+
+from tecan import qc
+from tecan.plate import Plate
+
+nan = np.nan
+
+
+def qc_plate():
+    # Row 0: background 0.1, 0.2, 0.3 and an unassigned well
+    # DrugA (5 wells): 1.0, 1.1, 0.9, 1.0 and the outlier 5.0; its removed well (2, 3) is not scored
+    # DrugB (2 wells): too few replicates. DrugC: 1.0, 1.0, 1.3 and an empty well, so its MAD is 0
+    plate = Plate(np.array([[0.1, 0.2, 0.3, 7.0],
+                            [1.0, 1.1, 0.9, 1.0],
+                            [5.0, 2.0, 3.0, 100.0],
+                            [1.0, 1.0, 1.3, nan]]))
+    plate.assign([0, 0, 0], [0, 1, 2], is_background=True)
+    plate.assign([1, 1, 1, 1, 2, 2], [0, 1, 2, 3, 0, 3], drug="DrugA", cuboids=1)
+    plate.remove_cells([2], [3])
+    plate.assign([2, 2], [1, 2], drug="DrugB", cuboids=1)
+    plate.assign([3, 3, 3, 3], [0, 1, 2, 3], drug="DrugC", cuboids=1)
+    return plate
+
+
+def test_robust_z_flags_the_outlier():
+    result = qc.plate_qc(qc_plate())
+    # DrugA: median 1.0, absolute deviations 0, 0.1, 0.1, 0, 4 -> MAD 0.1
+    scale = qc.MAD_SCALE * 0.1
+    np.testing.assert_allclose(result.robust_z[1], [0, 0.1 / scale, -0.1 / scale, 0])
+    assert np.isclose(result.robust_z[2, 0], 4.0 / scale)
+    assert list(zip(*result.outlier_cells())) == [(2, 0)]
+    assert np.isnan(result.robust_z[2, 3]) and np.isnan(result.robust_z[0, 3]) and np.isnan(result.robust_z[3, 3])
+
+
+def test_mad_zero_falls_back_to_mean_absolute_deviation():
+    result = qc.plate_qc(qc_plate())
+    # DrugC: median 1.0, absolute deviations 0, 0, 0.3 -> MAD 0, mean absolute deviation 0.1
+    np.testing.assert_allclose(result.robust_z[3, :3], [0, 0, 0.3 / (qc.MEAN_AD_SCALE * 0.1)])
+
+
+def test_under_replicated_group_has_no_robust_z():
+    result = qc.plate_qc(qc_plate())
+    assert qc.MIN_REPLICATES == 3
+    assert np.isnan(result.robust_z[2, 1:3]).all() and np.isnan(result.deviations[2, 1:3]).all()
+    assert np.isclose(result.medians[2, 1], 2.5)
+    # Background wells are scored among themselves: median 0.2, MAD 0.1
+    np.testing.assert_allclose(result.robust_z[0, :3], [-1 / qc.MAD_SCALE, 0, 1 / qc.MAD_SCALE])
+
+
+def test_z_prime_matches_the_formula():
+    table = qc.plate_qc(qc_plate()).z_prime.set_index('Drug')
+    background = np.array([0.1, 0.2, 0.3])
+    for drug, values in [('DrugA', [1.0, 1.1, 0.9, 1.0, 5.0]), ('DrugB', [2.0, 3.0]), ('DrugC', [1.0, 1.0, 1.3])]:
+        values = np.array(values)
+        expected = 1 - 3 * (values.std(ddof=1) + background.std(ddof=1)) / abs(values.mean() - background.mean())
+        row = table.loc[drug]
+        assert row['Wells'] == len(values) and row['Cuboids'] == 1
+        assert np.isclose(row['Mean'], values.mean()) and np.isclose(row['SD'], values.std(ddof=1))
+        assert np.isclose(row['Background Mean'], 0.2) and np.isclose(row['Background SD'], 0.1)
+        assert np.isclose(row["Z'"], expected)
+
+
+def test_edge_statistics():
+    result = qc.plate_qc(qc_plate())
+    # Deviations from the group median: DrugA 0, 0.1, -0.1, 0 / 4.0, DrugC 0, 0, 0.3
+    np.testing.assert_allclose(result.row_effect, [nan, 0.0, 4.0, 0.1], atol=1e-12, equal_nan=True)
+    np.testing.assert_allclose(result.col_effect, [4 / 3, 0.05, 0.1, 0.0], atol=1e-12)
+    edge, interior = result.edge_deviation
+    assert np.isclose(edge, 4.3 / 6) and np.isclose(interior, 0.0)
@@ -0,0 +1,80 @@
+"""NaN rules of tecan.ratios day-to-day ratios and the statistics of the Ratio_Summary sheet."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import numpy as np
+import pandas as pd
+
+from tecan import ratios
+
+nan = np.nan
+
+
+def dosed_rows(file_name, cuboids, day, wells):
+    # Rows of engine.dosed_results for {drug: [values]} of one file
+    return [(file_name, cuboids, day, drug, value) for drug, values in wells.items() for value in values]
+
+
+def dosed():
+    rows = (dosed_rows('day1.xlsx', 2, 1, {'DrugA': [1.0, 2.0, 0.0], 'DrugB': [4.0, 'OVER'], 'DrugC': [3.0]})
+            + dosed_rows('day3_old.xlsx', 2, 3, {'DrugA': [9.0, 9.0]})
+            + dosed_rows('day3.xlsx', 2, 3, {'DrugA': [2.0, 3.0, 5.0, 7.0], 'DrugB': [8.0, 8.0], 'DrugD': [1.0]})
+            + dosed_rows('day1.xlsx', 5, 1, {'DrugE': [0.0, 0.0]})
+            + dosed_rows('day2.xlsx', 5, 2, {'DrugE': [1.0, 2.0]}))
+    return pd.DataFrame(rows, columns=['File', 'Cuboids', 'Day', 'Drug', 'Value'])
+
+
+def test_day_arrays_use_the_last_file_of_a_day():
+    arrays = ratios.day_arrays(dosed())
+    assert list(arrays) == [2, 5]
+    two = arrays[2]
+    assert (two.days, two.drugs) == ([1, 3], ['DrugA', 'DrugB', 'DrugC', 'DrugD'])
+    np.testing.assert_array_equal(two.values[1, 0], [2.0, 3.0, 5.0, 7.0])
+    np.testing.assert_array_equal(two.present[0, 1], [True, True, False, False])
+    assert np.isnan(two.values[0, 1, 1])  # 'OVER' is present but not numeric
+
+
+def test_ratios_are_nan_for_missing_wells_and_zero_baselines():
+    arrays = ratios.day_arrays(dosed())
+    # DrugA: 2/1, 3/2, 5/0 (zero baseline), 7/missing; DrugB: 8/4, 8/'OVER'; DrugC and DrugD are on one day only
+    np.testing.assert_array_equal(arrays[2].ratios()[0], [[2.0, 1.5, nan, nan],
+                                                          [2.0, nan, nan, nan],
+                                                          [nan, nan, nan, nan],
+                                                          [nan, nan, nan, nan]])
+    np.testing.assert_array_equal(arrays[5].ratios()[0], [[nan, nan]])
+    frame = arrays[2].ratio_frame(1)
+    assert list(frame.columns) == ['DrugA', 'DrugB'] and len(frame) == 4
+    np.testing.assert_array_equal(frame['DrugB'], [2.0, nan, nan, nan])
+
+
+def test_ratio_records():
+    records = ratios.ratio_table(ratios.day_arrays(dosed()))
+    assert list(records.columns) == ratios.RATIO_COLUMNS
+    two = records[records['Cuboids'] == 2]
+    assert list(zip(two['Drug'], two['Replicate'])) == [('DrugA', 1), ('DrugA', 2), ('DrugA', 3), ('DrugA', 4),
+                                                        ('DrugB', 1), ('DrugB', 2)]
+    assert (two['Day'] == 3).all() and (two['Baseline Day'] == 1).all()
+    np.testing.assert_array_equal(two['Ratio'], [2.0, 1.5, nan, nan, 2.0, nan])
+
+
+def test_summary_statistics():
+    summary = ratios.summary_table(ratios.day_arrays(dosed())).set_index(['Cuboids', 'Day', 'Drug'])
+    assert list(summary.columns) == ratios.SUMMARY_COLUMNS[3:]
+    expected = {
+        # Wells counts present wells, including the non-numeric 'OVER'; statistics use the numeric ones
+        (2, 1, 'DrugA'): (3, 1.0, 1.0, 1.0, 1.0),
+        (2, 1, 'DrugB'): (2, 4.0, nan, nan, 1.0),
+        (2, 1, 'DrugC'): (1, 3.0, nan, nan, 1.0),
+        (2, 3, 'DrugA'): (4, 4.25, np.std([2, 3, 5, 7], ddof=1), np.std([2, 3, 5, 7], ddof=1) / 4.25, 4.25),
+        (2, 3, 'DrugB'): (2, 8.0, 0.0, 0.0, 2.0),
+        (2, 3, 'DrugD'): (1, 1.0, nan, nan, nan),  # No baseline
+        (5, 1, 'DrugE'): (2, 0.0, 0.0, nan, nan),  # Zero mean: no CV, zero baseline: no fold change
+        (5, 2, 'DrugE'): (2, 1.5, np.std([1, 2], ddof=1), np.std([1, 2], ddof=1) / 1.5, nan),
+    }
+    assert sorted(summary.index) == sorted(expected)
+    for key, row in expected.items():
+        np.testing.assert_allclose(summary.loc[key, ['Wells', 'Mean', 'SD', 'CV', 'Fold Change']].astype(float), row,
+                                   err_msg=str(key))
+    assert (summary.xs(2, level='Cuboids')['Baseline Day'] == 1).all()
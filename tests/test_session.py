@@ -0,0 +1,77 @@
+"""Round trip of tecan.session files and detection of changed source workbooks."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import numpy as np
+
+from tecan import background, session
+from tecan.plate import Plate
+from tecan.session import STATE_FIELDS
+
+
+def session_plates():
+    first = Plate(np.arange(1.0, 13.0).reshape(3, 4), {(2, 3): 'OVER'}, ['A', 'B', 'C'], ['1', '2', '3', '4'])
+    first.raw_values[2, 3] = np.nan
+    first.assign([0, 0], [0, 1], is_background=True)
+    first.assign([1, 1, 2], [2, 3, 0], drug="DrugA", cuboids=[2, 2, 5], concentration=[0.1, 1.0, np.nan])
+    first.assign([2], [1], drug="Drug B", cuboids=3)
+    first.remove_cells([1], [3])
+    background.subtract_background(first)
+    second = Plate(np.linspace(0, 1, 6).reshape(2, 3))
+    second.assign([1, 0], [2, 0], drug="DrugC", concentration=10.0)
+    return {('Plate_1', 'day1.xlsx'): first, ('Broken', 'day1.xlsx'): None, ('Plate_1', 'day2.xlsx'): second}
+
+
+def assert_same_plate(a, b):
+    np.testing.assert_array_equal(a.raw_values, b.raw_values)
+    assert (a.corrected_values is None) == (b.corrected_values is None)
+    if a.corrected_values is not None:
+        np.testing.assert_array_equal(a.corrected_values, b.corrected_values)
+    assert (a.text, list(a.row_labels), list(a.col_labels)) == (b.text, list(b.row_labels), list(b.col_labels))
+    for name, dtype in STATE_FIELDS.items():
+        saved, loaded = getattr(a.state, name), getattr(b.state, name)
+        assert loaded.dtype == dtype and loaded.shape == saved.shape
+        np.testing.assert_array_equal(saved, loaded)
+    assert list(a.state.drug_table()) == list(b.state.drug_table())
+    assert a.assignments() == b.assignments()
+
+
+def test_round_trip(tmp_path):
+    sources = [tmp_path / "day1.xlsx", tmp_path / "day2.xlsx"]
+    for k, path in enumerate(sources):
+        path.write_bytes(b"workbook %d" % k)
+    plates = session_plates()
+    assert plates[('Plate_1', 'day1.xlsx')].corrected_values is not None
+    selections = {('Plate_1', 'day1.xlsx'): {(0, 1), (2, 2)}, ('Broken', 'day1.xlsx'): {(0, 0)}}
+    settings = {'cuboid_count': 3, 'decimals': [2, 4]}
+    path = tmp_path / "study.npz"
+    session.save_session(path, sources, plates, selections, settings)
+    loaded = session.load_session(path)
+
+    assert list(loaded['plates']) == list(plates)
+    assert loaded['plates'][('Broken', 'day1.xlsx')] is None
+    for key, plate in plates.items():
+        if plate is not None:
+            assert_same_plate(plate, loaded['plates'][key])
+    assert loaded['selections'] == selections
+    assert loaded['settings'] == settings
+    assert [record['path'] for record in loaded['files']] == [str(path.resolve()) for path in sources]
+    assert session.changed_files(loaded['files']) == []
+
+
+def test_changed_files(tmp_path):
+    paths = [tmp_path / name for name in ["same.xlsx", "touched.xlsx", "edited.xlsx", "resized.xlsx", "gone.xlsx"]]
+    for path in paths:
+        path.write_bytes(b"original")
+    records = [session.file_record(path) for path in paths]
+    same, touched, edited, resized, gone = paths
+    stat = os.stat(touched)
+    os.utime(touched, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))  # Newer mtime, same content
+    edited.write_bytes(b"modified")  # Same size, other content
+    os.utime(edited, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10 ** 9))
+    resized.write_bytes(b"longer content")
+    gone.unlink()
+    assert session.changed_files(records) == [(str(edited.resolve()), 'modified'), (str(resized.resolve()), 'modified'),
+                                              (str(gone.resolve()), 'missing')]
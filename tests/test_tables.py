@@ -0,0 +1,141 @@
+"""Golden sheets for tecan.tables, checked against the row-by-row loops the loader used before."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tecan import tables
+
+nan = np.nan
+
+
+def legacy_find_table_start(df):
+    # find_table_start of tecan/loader.py before the vectorized scans
+    for i in range(len(df)):
+        row = df.iloc[i]
+        if any(isinstance(val, str) and 'temperature' in val.lower() for val in row if pd.notna(val)):
+            return i + 1
+    return 0
+
+
+def legacy_find_table_end(df, start=0):
+    # The iterrows scan of trim_table, as an index into df
+    for idx, row in df.iloc[start:].reset_index(drop=True).iterrows():
+        if all(pd.isna(val) or (isinstance(val, str) and val.strip() == "") for val in row):
+            return start + idx
+    return len(df)
+
+
+def legacy_find_table_blocks(df):
+    # The same loops applied from every 'temperature' row past the end of the previous table
+    blocks = []
+    for i in range(len(df)):
+        if any(isinstance(val, str) and 'temperature' in val.lower() for val in df.iloc[i] if pd.notna(val)):
+            if not blocks or i + 1 > blocks[-1][1]:
+                blocks.append((i + 1, legacy_find_table_end(df, i + 1)))
+    return blocks or [(0, legacy_find_table_end(df, 0))]
+
+
+def plate_rows(labels, n_cols, first=0.1):
+    return [[label] + [first + 0.01 * k for k in range(n_cols)] for label in labels]
+
+
+# name: (sheet rows, golden start, golden end, golden blocks)
+GOLDEN = {
+    'blank_leading_row': (
+        [[nan, nan, nan, nan],
+         ['Temperature: 37 °C', nan, nan, nan],
+         ['<>', 1, 2, 3],
+         *plate_rows('AB', 3),
+         [nan, nan, nan, nan],
+         ['End Time:', '2024-01-01', nan, nan]],
+        2, 5, [(2, 5)]),
+    'header_in_later_column': (
+        [['Application: Tecan i-control', nan, nan, nan, nan],
+         [nan, nan, 'temperature 25.1', nan, nan],
+         [nan, nan, '<>', 1, 2],
+         [nan, nan, 'A', 0.5, 0.6],
+         [nan, nan, 'B', 0.7, 0.8],
+         [nan, '  ', nan, nan, nan]],
+        2, 5, [(2, 5)]),
+    'trailing_nan_block': (
+        [['Temperature [°C]', 36.9, nan],
+         ['<>', 1, 2],
+         *plate_rows('ABC', 2),
+         [nan, nan, nan],
+         [nan, nan, nan],
+         [nan, nan, nan]],
+        1, 5, [(1, 5)]),
+    'no_temperature_row': (
+        [['<>', 1, 2],
+         *plate_rows('AB', 2),
+         ['', ' ', nan]],
+        0, 3, [(0, 3)]),
+    'multiple_blocks': (
+        [['Absorbance'],
+         ['Temperature: 37'],
+         ['<>'],
+         ['A'],
+         [nan],
+         ['Fluorescence'],
+         ['TEMPERATURE: 37'],
+         ['<>'],
+         ['A'],
+         ['B'],
+         [''],
+         ['Luminescence'],
+         ['Temperature: 36'],
+         ['<>'],
+         ['A']],
+        2, 4, [(2, 4), (7, 10), (13, 15)]),
+    'temperature_inside_table': (
+        [['Temperature: 37', nan],
+         ['<>', 1],
+         ['A', 'temperature probe'],
+         ['B', 0.4],
+         [nan, nan],
+         ['Temperature: 38', nan],
+         ['<>', 1],
+         ['A', 0.9]],
+        1, 4, [(1, 4), (6, 8)]),
+}
+
+
+def golden_sheet(name):
+    rows = GOLDEN[name][0]
+    width = max(len(row) for row in rows)
+    return pd.DataFrame([row + [nan] * (width - len(row)) for row in rows])
+
+
+@pytest.mark.parametrize('name', sorted(GOLDEN))
+def test_boundaries_match_golden_and_legacy(name):
+    df = golden_sheet(name)
+    _, start, end, blocks = GOLDEN[name]
+    assert tables.find_table_start(df) == legacy_find_table_start(df) == start
+    assert tables.find_table_end(df, start) == legacy_find_table_end(df, start) == end
+    assert tables.find_table_blocks(df) == legacy_find_table_blocks(df) == blocks
+
+
+def test_numeric_sheet_without_text():
+    df = pd.DataFrame(np.arange(12.0).reshape(4, 3))
+    df.iloc[2] = nan
+    assert tables.find_table_start(df) == legacy_find_table_start(df) == 0
+    assert tables.find_table_end(df) == legacy_find_table_end(df) == 2
+    assert tables.find_table_blocks(df) == legacy_find_table_blocks(df) == [(0, 2)]
+
+
+def test_random_sheets_match_legacy():
+    rng = np.random.default_rng(3)
+    cells = np.array([nan, 0.5, 2.0, '', '  ', 'A', '<>', 'Temperature: 37', 'temperature'], dtype=object)
+    weights = np.array([30, 20, 20, 5, 5, 8, 4, 4, 4], dtype=float)
+    for _ in range(200):
+        n_rows, n_cols = rng.integers(1, 15), rng.integers(1, 6)
+        df = pd.DataFrame(rng.choice(cells, size=(n_rows, n_cols), p=weights / weights.sum()))
+        start = legacy_find_table_start(df)
+        assert tables.find_table_start(df) == start
+        assert tables.find_table_end(df, start) == legacy_find_table_end(df, start)
+        assert tables.find_table_blocks(df) == legacy_find_table_blocks(df)
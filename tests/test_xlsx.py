@@ -0,0 +1,79 @@
+"""Workbooks streamed by tecan.xlsx read back the same as pandas' own to_excel output."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+from openpyxl.worksheet._writer import ALL_TEMP_FILES
+
+from tecan.xlsx import MAX_SHEET_NAME, StreamingWorkbook
+
+
+def frames():
+    mixed = pd.DataFrame({
+        'File': ['day1.xlsx', 'day1.xlsx', 'day3.xlsx', None],
+        'Row': [1, 2, 3, 4],
+        'Value': [0.125, np.nan, np.inf, -np.inf],
+        'Text': ['1.0', 'OVER', '', 'NaN'],
+        'Cuboids': pd.array([3, None, 5, 2], dtype='Int64'),
+        'Background': [True, False, True, False],
+        'Drug': pd.Series(['DrugA', None, 'DrugB', np.nan], dtype=object),
+    })
+    ratios = pd.DataFrame(np.random.default_rng(0).uniform(size=(50, 6)), columns=[f"Drug{k}" for k in range(6)])
+    ratios.iloc[::7, 2] = np.nan
+    return {'Results': mixed, 'Ratios_Day3_vs_Day1': ratios, 'Empty': pd.DataFrame(columns=['Drug', 'EC50']),
+            'No_Rows': pd.DataFrame({'Drug': pd.Series([], dtype=object), 'EC50': pd.Series([], dtype=float)})}
+
+
+def test_streamed_workbook_reads_back_like_to_excel(tmp_path):
+    streamed, reference = tmp_path / "streamed.xlsx", tmp_path / "reference.xlsx"
+    with StreamingWorkbook(streamed) as workbook:
+        for name, df in frames().items():
+            workbook.write_frame(name, df)
+    with pd.ExcelWriter(reference, engine='openpyxl') as writer:
+        for name, df in frames().items():
+            df.to_excel(writer, sheet_name=name, index=False)
+    expected = pd.read_excel(reference, sheet_name=None)
+    actual = pd.read_excel(streamed, sheet_name=None)
+    assert list(actual) == list(expected) == list(frames())
+    for name in expected:
+        pd.testing.assert_frame_equal(actual[name], expected[name], check_exact=True)
+
+
+def test_cells_keep_their_types(tmp_path):
+    path = tmp_path / "streamed.xlsx"
+    with StreamingWorkbook(path) as workbook:
+        workbook.write_frame('Results', frames()['Results'])
+    workbook = load_workbook(path)
+    rows = list(workbook['Results'].iter_rows(values_only=True))
+    workbook.close()
+    assert rows[0] == ('File', 'Row', 'Value', 'Text', 'Cuboids', 'Background', 'Drug')
+    assert rows[1] == ('day1.xlsx', 1, 0.125, '1.0', 3, True, 'DrugA')
+    assert rows[2] == ('day1.xlsx', 2, None, 'OVER', None, False, None)
+    assert rows[3][2] == 'inf' and rows[4][2] == '-inf'
+
+
+def test_long_sheet_names_are_truncated(tmp_path):
+    path = tmp_path / "streamed.xlsx"
+    name = "Ratios_Cuboids_12_Day14_vs_Day1_extra"
+    with StreamingWorkbook(path) as workbook:
+        workbook.write_frame(name, pd.DataFrame({'A': [1]}))
+        assert workbook.sheet_names == [name[:MAX_SHEET_NAME]]
+    with pd.ExcelFile(path) as excel_file:
+        assert excel_file.sheet_names == [name[:MAX_SHEET_NAME]]
+
+
+def test_nothing_is_saved_when_writing_fails(tmp_path):
+    path = tmp_path / "streamed.xlsx"
+    temp_files = set(ALL_TEMP_FILES)
+    with pytest.raises(RuntimeError):
+        with StreamingWorkbook(path) as workbook:
+            workbook.write_frame('Results', frames()['Results'])
+            workbook.write_frame('Ratios', frames()['Ratios_Day3_vs_Day1'])
+            raise RuntimeError("export failed")
+    assert not path.exists()
+    assert set(ALL_TEMP_FILES) == temp_files